@@ -0,0 +1,76 @@
+"""
+Compara una ejecución repetida de procesar_datos (leyendo el libro XLSX, con y sin la
+caché de lectura) con procesar_datos_almacen, que responde las consultas de familias,
+jefes solos, advertencias y repetidos desde el almacén SQLite.
+
+La primera ejecución con el almacén incluye la lectura del libro y su carga; las
+siguientes solo consultan el almacén. Se verifica que los resultados sean iguales.
+
+Uso:
+    python -m benchmarks.bench_almacen --personas 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from tabulate import tabulate
+from src import cache_excel
+from src.almacen_censo import procesar_datos_almacen
+from src.procesamiento import procesar_datos
+from .sintetico import generar_cuestionario, guardar_excel
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+def resumen_resultado(resultado):
+    """Forma comparable del resultado de procesar_datos."""
+    familias_multiples, familias_uno, advertencias, total_personas, repetidos = resultado
+    familias = lambda familias: [(cedula, data['jefe'], data['miembros'].values.tolist()) for cedula, data in familias.items()]
+    return repr((familias(familias_multiples), familias(familias_uno), advertencias, total_personas, repetidos.values.tolist()))
+
+def medir_escala(num_personas, directorio, semilla=0):
+    """
+    Mide el análisis del cuestionario leyendo el libro y consultando el almacén.
+
+    Returns:
+        dict: Personas y segundos de cada forma de obtener el análisis.
+    """
+    ruta_archivo = os.path.join(directorio, f'cuestionario_{num_personas}.xlsx')
+    ruta_almacen = os.path.join(directorio, f'censo_{num_personas}.sqlite')
+    guardar_excel(generar_cuestionario(num_personas, semilla=semilla), ruta_archivo)
+
+    cache_excel.CACHE_ACTIVA = False
+    original, t_sin_cache = cronometrar(procesar_datos, ruta_archivo)
+    _, t_carga = cronometrar(procesar_datos_almacen, ruta_archivo, ruta_almacen)
+    cache_excel.CACHE_ACTIVA = True
+    procesar_datos(ruta_archivo)
+    _, t_con_cache = cronometrar(procesar_datos, ruta_archivo)
+    almacen, t_almacen = cronometrar(procesar_datos_almacen, ruta_archivo, ruta_almacen)
+    assert resumen_resultado(original) == resumen_resultado(almacen)
+
+    return {
+        'Personas': num_personas,
+        'Libro XLSX (s)': t_sin_cache,
+        'Caché de lectura (s)': t_con_cache,
+        'Carga del almacén (s)': t_carga,
+        'Almacén (s)': t_almacen,
+        'Aceleración sobre el libro': t_sin_cache / t_almacen
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, nargs='+', default=[10_000, 100_000], help='Tamaños del cuestionario.')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    filas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        cache_excel.DIRECTORIO_CACHE = os.path.join(directorio, 'cache')
+        for num_personas in args.personas:
+            filas.append(medir_escala(num_personas, directorio, args.semilla))
+            print(f"-> {num_personas} personas: {filas[-1]['Almacén (s)']:.2f} s con el almacén")
+
+    print(tabulate(pd.DataFrame(filas).to_dict('list'), headers='keys', tablefmt='grid', floatfmt='.2f'))
@@ -0,0 +1,125 @@
+"""
+Compara el tiempo de comparar_bases_de_datos (joins y anti-joins por columnas sobre
+claves enteras) contra el bucle original, que filtraba la nueva base completa por
+cada familia antigua, para varios tamaños de la base nueva y de la antigua.
+
+La base antigua de cada caso se genera a partir de un cuestionario con la misma
+semilla, así que las dos bases comparten las primeras familias y el resto de la
+mayor no tiene pareja en la otra.
+
+Uso:
+    python -m benchmarks.bench_comparacion --personas 50000
+    python -m benchmarks.bench_comparacion --personas 10000 50000 100000 --vieja 10000 100000 --sin-bucle
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from tabulate import tabulate
+from src.cache_excel import leer_excel
+from src.reporte_avanzado import comparar_bases_de_datos
+from .sintetico import generar_cuestionario, generar_base_vieja, guardar_excel
+
+def comparar_bases_de_datos_bucle(ruta_vieja, ruta_nueva):
+    """Versión original de la comparación (filtrado por familia), conservada como referencia."""
+    df_vieja = leer_excel(ruta_vieja)
+    df_nueva = leer_excel(ruta_nueva)
+    df_nueva.columns = df_nueva.columns.str.strip()
+
+    df_vieja = df_vieja[['FAMILIA', 'NUMERO DOCUMENTO', 'NOMBRE', 'APELLIDOS']].copy()
+    df_vieja.columns = ['FAMILIA_VIEJA', 'DOCUMENTO_VIEJO', 'NOMBRE_VIEJA', 'APELLIDOS_VIEJA']
+    df_vieja['DOCUMENTO_VIEJO'] = df_vieja['DOCUMENTO_VIEJO'].astype(str).str.strip()
+    df_vieja['NOMBRE_COMPLETO_VIEJA'] = df_vieja['NOMBRE_VIEJA'].str.strip() + ' ' + df_vieja['APELLIDOS_VIEJA'].str.strip()
+
+    df_nueva = df_nueva[['Cedula de jefe(a) de Familia', 'Documento', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido', 'Parentesco']].copy()
+    df_nueva.columns = ['JEFE_FAMILIA_NUEVA', 'DOCUMENTO_NUEVO', 'NOMBRE_NUEVO_P', 'NOMBRE_NUEVO_S', 'APELLIDO_NUEVO_P', 'APELLIDO_NUEVO_S', 'PARENTESCO_NUEVO']
+    df_nueva['DOCUMENTO_NUEVO'] = df_nueva['DOCUMENTO_NUEVO'].astype(str).str.strip()
+    df_nueva['NOMBRE_COMPLETO_NUEVA'] = df_nueva[['NOMBRE_NUEVO_P', 'NOMBRE_NUEVO_S', 'APELLIDO_NUEVO_P', 'APELLIDO_NUEVO_S']].apply(lambda row: f"{row['NOMBRE_NUEVO_P']} {row['NOMBRE_NUEVO_S'] if pd.notna(row['NOMBRE_NUEVO_S']) else ''} {row['APELLIDO_NUEVO_P']} {row['APELLIDO_NUEVO_S'] if pd.notna(row['APELLIDO_NUEVO_S']) else ''}".strip(), axis=1)
+    df_nueva_doc_nombre_completo = df_nueva.set_index('DOCUMENTO_NUEVO')['NOMBRE_COMPLETO_NUEVA'].to_dict()
+    df_nueva_doc_parentesco = df_nueva.set_index('DOCUMENTO_NUEVO')['PARENTESCO_NUEVO'].to_dict()
+    df_nueva_jefes_set = set(df_nueva['JEFE_FAMILIA_NUEVA'].astype(str).unique())
+
+    df_vieja_grouped = df_vieja.groupby('FAMILIA_VIEJA')['DOCUMENTO_VIEJO'].apply(list).to_dict()
+    df_vieja_info = df_vieja.set_index('DOCUMENTO_VIEJO')['NOMBRE_COMPLETO_VIEJA'].to_dict()
+    reporte_por_familia = {}
+    advertencias_viejas = []
+
+    for familia_vieja, miembros_vieja_docs in df_vieja_grouped.items():
+        jefe_familia_nueva_doc = next((doc for doc in miembros_vieja_docs if doc in df_nueva_jefes_set), None)
+        miembros_vieja_info_familia = {doc: df_vieja_info.get(doc) for doc in miembros_vieja_docs}
+        if jefe_familia_nueva_doc:
+            nueva_familia_df = df_nueva[df_nueva['JEFE_FAMILIA_NUEVA'].astype(str) == jefe_familia_nueva_doc]
+            miembros_nueva_docs = set(nueva_familia_df['DOCUMENTO_NUEVO'].astype(str).tolist())
+            faltantes = [f"{miembros_vieja_info_familia.get(doc)} ({doc}) - Parentesco (Nueva DB): {df_nueva_doc_parentesco.get(doc, 'No encontrado')}"
+                         for doc in miembros_vieja_docs if doc not in miembros_nueva_docs]
+            reporte_por_familia[familia_vieja] = {
+                'jefe_nueva_info': {'documento': jefe_familia_nueva_doc, 'nombre': df_nueva_doc_nombre_completo.get(jefe_familia_nueva_doc, 'No encontrado')},
+                'miembros_vieja': [f"{miembros_vieja_info_familia.get(doc)} ({doc})" for doc in miembros_vieja_docs],
+                'miembros_nueva': [f"{df_nueva_doc_nombre_completo.get(doc, 'No encontrado')} ({doc}) - Parentesco: {df_nueva_doc_parentesco.get(doc, 'No encontrado')}" for doc in miembros_nueva_docs],
+                'faltantes': faltantes
+            }
+        else:
+            for doc_viejo in miembros_vieja_docs:
+                advertencias_viejas.append({'Persona (Antigua)': f"{miembros_vieja_info_familia.get(doc_viejo)} ({doc_viejo})", 'Familia Antigua (ID)': familia_vieja,
+                                            'Parentesco (Nueva DB)': df_nueva_doc_parentesco.get(doc_viejo, 'No encontrado')})
+
+    return {'reporte_por_familia': reporte_por_familia, 'advertencias_viejas': advertencias_viejas}
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+def medir_escala(personas_nueva, personas_vieja, directorio, semilla=0, con_bucle=True):
+    """
+    Mide la comparación para una base nueva y una antigua de los tamaños indicados.
+
+    Returns:
+        dict: Tamaños, familias antiguas, personas faltantes y segundos de cada versión.
+    """
+    ruta_nueva = os.path.join(directorio, f'cuestionario_{personas_nueva}.xlsx')
+    ruta_vieja = os.path.join(directorio, f'vieja_{personas_vieja}.xlsx')
+    if not os.path.exists(ruta_nueva):
+        guardar_excel(generar_cuestionario(personas_nueva, semilla=semilla), ruta_nueva)
+    if not os.path.exists(ruta_vieja):
+        guardar_excel(generar_base_vieja(generar_cuestionario(personas_vieja, semilla=semilla), semilla=semilla), ruta_vieja)
+
+    # La primera lectura llena la caché para que ambas versiones midan solo la comparación
+    leer_excel(ruta_vieja)
+    leer_excel(ruta_nueva)
+
+    nuevo, t_nuevo = cronometrar(comparar_bases_de_datos, ruta_vieja, ruta_nueva)
+    assert 'error' not in nuevo, nuevo.get('error')
+    fila = {
+        'Personas nueva': personas_nueva,
+        'Personas antigua': personas_vieja,
+        'Familias antiguas': int(nuevo['total_familias_comparadas_vieja']),
+        'Faltantes': int(nuevo['total_personas_faltantes']),
+        'Joins (s)': t_nuevo
+    }
+    if con_bucle:
+        original, t_original = cronometrar(comparar_bases_de_datos_bucle, ruta_vieja, ruta_nueva)
+        assert list(nuevo['reporte_por_familia']) == list(original['reporte_por_familia'])
+        assert len(nuevo['advertencias_viejas']) == len(original['advertencias_viejas'])
+        assert int(nuevo['total_personas_faltantes']) == sum(len(detalles['faltantes']) for detalles in original['reporte_por_familia'].values())
+        fila['Bucle original (s)'] = t_original
+        fila['Aceleración'] = t_original / t_nuevo
+    return fila
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, nargs='+', default=[50_000], help='Tamaños de la base nueva (cuestionario).')
+    parser.add_argument('--vieja', type=int, nargs='+', default=None, help='Tamaños de la base antigua; por defecto los mismos de --personas.')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--sin-bucle', action='store_true', help='No medir el bucle original (lento con bases grandes).')
+    args = parser.parse_args()
+
+    filas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for personas_vieja in args.vieja or args.personas:
+            for personas_nueva in args.personas:
+                filas.append(medir_escala(personas_nueva, personas_vieja, directorio, args.semilla, not args.sin_bucle))
+                print(f"-> nueva {personas_nueva} / antigua {personas_vieja}: {filas[-1]['Joins (s)']:.2f} s")
+
+    print(tabulate(pd.DataFrame(filas).to_dict('list'), headers='keys', tablefmt='grid', showindex=False, floatfmt='.2f'))
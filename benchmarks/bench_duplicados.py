@@ -0,0 +1,92 @@
+"""
+Mide el detector de personas casi duplicadas (claves de bloqueo) sobre censos sintéticos
+con copias alteradas de algunas personas: tildes, espacios dobles, nombres en otro orden
+y errores de digitación en el documento.
+
+Para cada tamaño se muestra el número de pares candidatos frente al total de pares posibles
+(que crecen de forma cuadrática), los pares candidatos por persona (que deben mantenerse
+casi constantes), el tiempo y la proporción de copias alteradas encontradas. Los censos
+sintéticos combinan pocos nombres, así que los bloques de homónimos crecen con el censo hasta
+que la ventana de vecinos (ver pares_por_bloque) limita los pares de cada persona.
+
+Uso:
+    python -m benchmarks.bench_duplicados --personas 10000 50000 100000 200000
+"""
+import argparse
+import random
+import time
+import pandas as pd
+from src.duplicados_aproximados import detectar_duplicados_aproximados, generar_pares_candidatos
+from src.procesamiento import agregar_nombre_completo, resumir_personas
+from .sintetico import generar_cuestionario
+
+TILDES = str.maketrans('AEIOUN', 'ÁÉÍÓÚÑ')
+
+def alterar_nombre(rng, fila):
+    """Aplica a la fila una alteración de nombre al azar."""
+    alteracion = rng.choice(['tilde', 'espacios', 'orden', 'minusculas'])
+    if alteracion == 'tilde':
+        fila['Primer Apellido'] = fila['Primer Apellido'].translate(TILDES)
+    elif alteracion == 'espacios' and pd.notna(fila['Segundo Nombre']):
+        # Ambos nombres en la misma celda con doble espacio (los extremos de cada celda se recortan)
+        fila['Primer Nombre'], fila['Segundo Nombre'] = f"{fila['Primer Nombre']}  {fila['Segundo Nombre']}", None
+    elif alteracion == 'orden' and pd.notna(fila['Segundo Nombre']):
+        fila['Primer Nombre'], fila['Segundo Nombre'] = fila['Segundo Nombre'], fila['Primer Nombre']
+    else:
+        fila['Primer Apellido'] = fila['Primer Apellido'].lower()
+    return fila
+
+def alterar_documento(rng, documento):
+    """Cambia un dígito o intercambia dos dígitos vecinos distintos del documento (sin tocar el primero)."""
+    digitos = list(str(documento))
+    i = rng.randrange(1, len(digitos) - 1)
+    if rng.random() < 0.5 or digitos[i] == digitos[i + 1]:
+        digitos[i] = str((int(digitos[i]) + rng.randint(1, 9)) % 10)
+    else:
+        digitos[i], digitos[i + 1] = digitos[i + 1], digitos[i]
+    return int(''.join(digitos))
+
+def generar_con_alterados(num_personas, tasa_alterados=0.02, semilla=0):
+    """Genera un cuestionario y agrega copias alteradas; devuelve el DataFrame y los pares (documento original, documento copia)."""
+    rng = random.Random(semilla)
+    df = generar_cuestionario(num_personas, semilla=semilla, tasa_repetidos=0)
+    copias = []
+    esperados = set()
+    for original in df.sample(n=int(num_personas * tasa_alterados), random_state=semilla).to_dict('records'):
+        copia = dict(original)
+        nombre_alterado = rng.random() < 0.7
+        if nombre_alterado:
+            copia = alterar_nombre(rng, copia)
+        if not nombre_alterado or rng.random() < 0.5:
+            copia['Documento'] = alterar_documento(rng, original['Documento'])
+        copias.append(copia)
+        esperados.add((str(original['Documento']), str(copia['Documento'])))
+    return pd.concat([df, pd.DataFrame(copias)], ignore_index=True), esperados
+
+def proporcion_encontrada(duplicados, esperados):
+    """Proporción de pares (original, copia) presentes en el reporte, en cualquier orden."""
+    encontrados = set(zip(duplicados['Cedula Persona A'], duplicados['Cedula Persona B']))
+    encontrados |= {(b, a) for a, b in encontrados}
+    return sum(par in encontrados for par in esperados) / max(len(esperados), 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, nargs='+', default=[10_000, 50_000, 100_000, 200_000], help='Tamaños de censo a medir.')
+    parser.add_argument('--umbral', type=float, default=0.85, help='Puntaje mínimo de los pares reportados.')
+    args = parser.parse_args()
+
+    print(f"{'Personas':>9} | {'Pares posibles':>15} | {'Candidatos':>10} | {'Cand./persona':>13} | {'Bloqueo (s)':>11} | {'Total (s)':>9} | {'Reportados':>10} | {'Encontrados':>11}")
+    for num_personas in args.personas:
+        df, esperados = generar_con_alterados(num_personas)
+        personas = resumir_personas(agregar_nombre_completo(df)).reset_index(drop=True)
+
+        inicio = time.perf_counter()
+        candidatos, _ = generar_pares_candidatos(personas)
+        t_bloqueo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        duplicados = detectar_duplicados_aproximados(personas, args.umbral)
+        t_total = time.perf_counter() - inicio
+
+        n = len(personas)
+        print(f"{n:>9} | {n * (n - 1) // 2:>15} | {len(candidatos):>10} | {len(candidatos) / n:>13.2f} | {t_bloqueo:>11.2f} | {t_total:>9.2f} | {len(duplicados):>10} | {proporcion_encontrada(duplicados, esperados):>10.1%}")
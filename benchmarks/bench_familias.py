@@ -0,0 +1,75 @@
+"""
+Compara el tiempo del índice de familias de una sola pasada contra el bucle
+original (un filtrado completo del DataFrame por cada cédula de jefe).
+
+Uso:
+    python -m benchmarks.bench_familias --filas 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from src.procesamiento import construir_indice_familias
+from .sintetico import generar_cuestionario, guardar_excel
+
+def indice_familias_bucle(df):
+    """Versión original del análisis de familias, conservada como referencia."""
+    familias_multiples = {}
+    familias_uno = {}
+    advertencias = []
+    jefes_de_familia_documentos = set(df[df['Cedula de jefe(a) de Familia'].astype(str) == df['Documento'].astype(str)]['Documento'].astype(str).tolist())
+
+    for jefe_cedula_num in df['Cedula de jefe(a) de Familia'].unique():
+        jefe_cedula = str(jefe_cedula_num)
+        familia = df[df['Cedula de jefe(a) de Familia'].astype(str) == jefe_cedula].copy()
+
+        if not familia.empty:
+            familia['Cedula de jefe(a) de Familia'] = familia['Cedula de jefe(a) de Familia'].astype(str)
+            familia['Documento'] = familia['Documento'].astype(str)
+            jefe_df = familia[familia['Cedula de jefe(a) de Familia'] == familia['Documento']].copy()
+
+            if not jefe_df.empty:
+                jefe_df['Nombre Completo Jefe'] = jefe_df['Nombre Completo Persona']
+                if len(jefe_df) == 1:
+                    nombre_jefe = jefe_df.iloc[0]['Nombre Completo Jefe']
+                    miembros_tabla = familia[['Documento', 'Nombre Completo Persona', 'Parentesco']]
+                    destino = familias_multiples if len(miembros_tabla) > 1 else familias_uno
+                    destino[jefe_cedula] = {"jefe": [jefe_df.iloc[0]['Documento'], nombre_jefe], "miembros": miembros_tabla}
+                elif len(jefe_df) > 1:
+                    nombres_multiples_jefes = ", ".join(jefe_df['Primer Nombre'].astype(str).str.strip() + " " + jefe_df['Primer Apellido'].astype(str).str.strip())
+                    advertencias.append([jefe_cedula, nombres_multiples_jefes, "Múltiples jefes de familia identificados con la misma cédula."])
+
+    return familias_multiples, familias_uno, advertencias, jefes_de_familia_documentos
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100_000, help='Número de personas a generar.')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = guardar_excel(generar_cuestionario(args.filas, semilla=args.semilla), os.path.join(directorio, 'sintetico.xlsx'))
+        df, t_lectura = cronometrar(pd.read_excel, ruta)
+
+    df.columns = df.columns.str.strip()
+    df['Nombre Completo Persona'] = df['Primer Nombre'].astype(str).str.strip() + ' ' + \
+                                      df['Segundo Nombre'].fillna('').astype(str).str.strip() + ' ' + \
+                                      df['Primer Apellido'].astype(str).str.strip() + ' ' + \
+                                      df['Segundo Apellido'].fillna('').astype(str).str.strip()
+
+    nuevo, t_nuevo = cronometrar(construir_indice_familias, df)
+    original, t_original = cronometrar(indice_familias_bucle, df)
+
+    assert list(nuevo[0]) == list(original[0]) and list(nuevo[1]) == list(original[1])
+    assert nuevo[2] == original[2] and nuevo[3] == original[3]
+
+    print(f"Filas: {len(df)} | Familias: {len(nuevo[0]) + len(nuevo[1])} | Lectura xlsx: {t_lectura:.2f} s")
+    print(f"Bucle original:        {t_original:8.2f} s")
+    print(f"Índice de una pasada:  {t_nuevo:8.2f} s")
+    print(f"Aceleración:           {t_original / t_nuevo:8.1f}x")
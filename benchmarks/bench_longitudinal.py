@@ -0,0 +1,56 @@
+"""
+Mide la línea de tiempo longitudinal con varias vigencias sintéticas.
+
+Para cada vigencia se mide el tiempo de agregarla a la línea de tiempo (solo se compara
+con la vigencia anterior) frente a volver a comparar esa vigencia con todas las
+anteriores, que es lo que haría falta sin la línea de tiempo para responder cualquier
+par de años. Al final se mide la consulta de un par consecutivo (cambios ya guardados) y
+la del primer y el último año (solo se leen esos dos censos).
+
+Uso:
+    python -m benchmarks.bench_longitudinal --personas 100000 --vigencias 6
+"""
+import argparse
+import tempfile
+import time
+import pandas as pd
+from tabulate import tabulate
+from src.longitudinal import LineaDeTiempo, censo_anual, comparar_censos
+from .sintetico import generar_base_vieja, generar_cuestionario, generar_vigencias
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, default=100_000, help='Personas de la primera vigencia.')
+    parser.add_argument('--vigencias', type=int, default=6, help='Número de vigencias consecutivas.')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    base = generar_vigencias(generar_base_vieja(generar_cuestionario(args.personas, semilla=args.semilla), semilla=args.semilla), args.vigencias, semilla=args.semilla)
+    censos = {int(año): censo_anual(filas) for año, filas in base.groupby('VIGENCIA')}
+
+    filas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        linea = LineaDeTiempo(directorio)
+        for año, censo in censos.items():
+            _, t_agregar = cronometrar(linea.agregar, año, censo)
+            anteriores = [anterior for anterior in censos if anterior < año]
+            inicio = time.perf_counter()
+            for anterior in anteriores:
+                comparar_censos(censos[anterior], censo)
+            t_todos = time.perf_counter() - inicio
+            filas.append({'Vigencia': año, 'Personas': len(censo), 'Agregar a la línea (s)': t_agregar,
+                          'Comparar con todas las anteriores (s)': t_todos, 'Pares comparados': len(anteriores)})
+
+        años = linea.años()
+        _, t_consecutivo = cronometrar(linea.cambios, años[-2], años[-1])
+        _, t_extremos = cronometrar(linea.cambios, años[0], años[-1])
+
+    print(tabulate(pd.DataFrame(filas).to_dict('list'), headers='keys', tablefmt='grid', floatfmt='.2f'))
+    print(f"Consulta {años[-2]} -> {años[-1]} (cambios guardados): {t_consecutivo:.3f} s")
+    print(f"Consulta {años[0]} -> {años[-1]} (solo esos dos censos): {t_extremos:.3f} s")
+    print(linea.resumen().to_string(index=False))
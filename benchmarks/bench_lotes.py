@@ -0,0 +1,57 @@
+"""
+Compara procesar_datos leyendo la hoja completa con la lectura por lotes (tamano_lote) y
+verifica que ambos den los mismos resultados.
+
+El cuestionario sintético tiene documentos de tipos mezclados: un documento con letras
+cerca del final (así los primeros lotes leen los documentos como números y el último como
+texto) y algunas cédulas y documentos vacíos.
+
+Uso:
+    python -m benchmarks.bench_lotes --personas 100000 --lotes 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+from src.procesamiento import procesar_datos
+from .sintetico import generar_cuestionario, guardar_excel
+
+def cuestionario_mixto(num_personas, semilla=0):
+    """Cuestionario sintético con un documento alfanumérico cerca del final y algunos vacíos."""
+    df = generar_cuestionario(num_personas, semilla=semilla)
+    df['Documento'] = df['Documento'].astype(object)
+    df['Cedula de jefe(a) de Familia'] = df['Cedula de jefe(a) de Familia'].astype(object)
+    miembros = df.index[df['Parentesco'] != 'Jefe']
+    df.loc[miembros[-10], 'Documento'] = f"AB{df.loc[miembros[-10], 'Documento']}"
+    df.loc[miembros[::997], 'Documento'] = None
+    df.loc[miembros[5::1499], ['Cedula de jefe(a) de Familia', 'Documento']] = None
+    return df
+
+def comparable(resultado):
+    """Resultados de procesar_datos como valores simples, para compararlos con ==."""
+    familias_multiples, familias_uno, advertencias, total_personas, personas_repetidas = resultado
+    familias = lambda familias: [(cedula, list(data['jefe']), data['miembros'].astype(str).values.tolist()) for cedula, data in familias.items()]
+    return familias(familias_multiples), familias(familias_uno), advertencias, total_personas, personas_repetidas.astype(str).values.tolist()
+
+def cronometrar(funcion, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = funcion(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, default=100_000, help='Tamaño del cuestionario.')
+    parser.add_argument('--lotes', type=int, nargs='+', default=[1000, 10000], help='Tamaños de lote a medir.')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = guardar_excel(cuestionario_mixto(args.personas, args.semilla), os.path.join(directorio, 'mixto.xlsx'))
+        completo, t_completo = cronometrar(procesar_datos, ruta)
+        esperado = comparable(completo)
+        print(f"Hoja completa:    {t_completo:8.2f} s ({len(completo[4])} filas de repetidos)")
+
+        for tamano_lote in args.lotes:
+            por_lotes, segundos = cronometrar(procesar_datos, ruta, tamano_lote=tamano_lote)
+            assert comparable(por_lotes) == esperado, f"La lectura por lotes de {tamano_lote} filas no coincide con la hoja completa"
+            print(f"Lotes de {tamano_lote:>7}: {segundos:8.2f} s (mismos resultados)")
@@ -0,0 +1,58 @@
+"""
+Mide la memoria del censo en memoria antes y después de aplicar_esquema (tipos compactos).
+
+Se leen con pandas.read_excel el cuestionario y la base de datos antigua sintéticos del
+tamaño indicado y se muestra, por columna, el tipo y los MB tal como se leen y después
+del esquema. Los MB cuentan una sola vez cada objeto de texto de Python aunque varias
+filas lo compartan (memory_usage(deep=True) de pandas lo contaría una vez por fila); la
+columna 'pandas' muestra también esa cifra.
+
+Uso:
+    python -m benchmarks.bench_memoria --personas 100000
+"""
+import argparse
+import os
+import sys
+import pandas as pd
+from src.esquema import aplicar_esquema
+from .suite import generar_datos
+
+def bytes_columna(serie):
+    """Bytes que ocupa la columna, contando una sola vez cada objeto de Python compartido."""
+    if serie.dtype == object or getattr(serie.dtype, 'storage', None) == 'python':
+        valores = serie.to_numpy(dtype=object)
+        unicos = {id(valor): valor for valor in valores}
+        return valores.nbytes + sum(sys.getsizeof(valor) for valor in unicos.values())
+    return int(serie.memory_usage(deep=True, index=False))
+
+def comparar_memoria(df):
+    """Tabla por columna con el tipo y los MB antes y después de aplicar_esquema, más una fila de totales."""
+    compacto = aplicar_esquema(df.copy())
+    filas = [{
+        'Columna': columna,
+        'Tipo leído': str(df[columna].dtype),
+        'MB leído': bytes_columna(df[columna]) / 2**20,
+        'Tipo compacto': str(compacto[columna].dtype),
+        'MB compacto': bytes_columna(compacto[columna]) / 2**20,
+        'MB pandas leído': df[columna].memory_usage(deep=True, index=False) / 2**20,
+        'MB pandas compacto': compacto[columna].memory_usage(deep=True, index=False) / 2**20
+    } for columna in df.columns]
+    tabla = pd.DataFrame(filas)
+    totales = tabla.select_dtypes('number').sum()
+    return pd.concat([tabla, pd.DataFrame([{'Columna': 'TOTAL', 'Tipo leído': '', 'Tipo compacto': '', **totales}])], ignore_index=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, default=100_000, help='Tamaño del censo sintético.')
+    parser.add_argument('--datos', default=os.path.join('.cache', 'benchmarks'), help='Carpeta de los libros sintéticos (se reutilizan entre ejecuciones).')
+    args = parser.parse_args()
+
+    rutas = generar_datos(args.personas, args.datos)
+    for titulo, ruta in [('CUESTIONARIO', rutas['cuestionario']), ('BASE DE DATOS ANTIGUA', rutas['vieja'])]:
+        df = pd.read_excel(ruta)
+        df.columns = df.columns.str.strip()
+        tabla = comparar_memoria(df)
+        print(f"\n{titulo} ({len(df)} filas)")
+        print(tabla.to_string(index=False, float_format=lambda mb: f"{mb:.2f}"))
+        total = tabla.iloc[-1]
+        print(f"-> {total['MB leído']:.2f} MB leído -> {total['MB compacto']:.2f} MB compacto ({1 - total['MB compacto'] / total['MB leído']:.0%} menos)")
@@ -0,0 +1,69 @@
+"""
+Compara el reporte PDF de familias dibujado en un solo proceso (escribir_reporte_familias)
+con escribir_reporte_familias_por_partes, que lo divide en partes dibujadas en procesos
+aparte y las une en un solo archivo. Se verifica que el documento unido tenga a lo sumo una
+página más por parte (cada parte empieza en una página nueva).
+
+La aceleración depende de los núcleos disponibles: con un solo núcleo las partes se
+dibujan una tras otra y solo se suma el costo de enviar las familias y unir los documentos.
+Se ejecuta desde la raíz del proyecto (las fuentes se leen de fonts/).
+
+Uso:
+    python -m benchmarks.bench_pdf_partes --personas 100000 --partes 2 4 8
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from pypdf import PdfReader
+from tabulate import tabulate
+from src.procesamiento import procesar_datos
+from src.reportes.reportes_pdf import PDFReport, escribir_reporte_familias, escribir_reporte_familias_por_partes
+from .sintetico import generar_cuestionario, guardar_excel
+
+def contar_paginas(ruta_pdf):
+    """Número de páginas del documento."""
+    return len(PdfReader(ruta_pdf).pages)
+
+def medir_secuencial(familias_multiples, total_personas, ruta_pdf):
+    inicio = time.perf_counter()
+    reporte = PDFReport(title="")
+    escribir_reporte_familias(reporte, familias_multiples, total_personas)
+    reporte.save_pdf(ruta_pdf)
+    return time.perf_counter() - inicio
+
+def medir_por_partes(familias_multiples, total_personas, ruta_pdf, partes):
+    inicio = time.perf_counter()
+    partes = escribir_reporte_familias_por_partes(familias_multiples, total_personas, ruta_pdf, partes)
+    return time.perf_counter() - inicio, partes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, default=100_000, help='Tamaño del cuestionario.')
+    parser.add_argument('--partes', type=int, nargs='+', default=[2, 4, 8], help='Números de partes a medir.')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"-> Núcleos disponibles: {os.cpu_count()}")
+    filas = []
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_archivo = os.path.join(directorio, f'cuestionario_{args.personas}.xlsx')
+        guardar_excel(generar_cuestionario(args.personas, semilla=args.semilla), ruta_archivo)
+        familias_multiples, _, _, total_personas, _ = procesar_datos(ruta_archivo)
+
+        ruta_secuencial = os.path.join(directorio, 'familias_secuencial.pdf')
+        t_secuencial = medir_secuencial(familias_multiples, total_personas, ruta_secuencial)
+        paginas = contar_paginas(ruta_secuencial)
+        filas.append({'Partes': 1, 'Páginas': paginas, 'Segundos': t_secuencial, 'Aceleración': 1.0})
+        print(f"-> Un proceso: {paginas} páginas en {t_secuencial:.2f} s")
+
+        for partes in args.partes:
+            ruta_partes = os.path.join(directorio, f'familias_{partes}_partes.pdf')
+            segundos, partes_usadas = medir_por_partes(familias_multiples, total_personas, ruta_partes, partes)
+            paginas_partes = contar_paginas(ruta_partes)
+            assert paginas <= paginas_partes < paginas + partes_usadas
+            filas.append({'Partes': partes_usadas, 'Páginas': paginas_partes, 'Segundos': segundos, 'Aceleración': t_secuencial / segundos})
+            print(f"-> {partes_usadas} partes: {segundos:.2f} s")
+
+    print(tabulate(pd.DataFrame(filas).to_dict('list'), headers='keys', tablefmt='grid', floatfmt='.2f'))
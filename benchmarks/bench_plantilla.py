@@ -0,0 +1,86 @@
+"""
+Compara la fase 3 del formateador (inyección en la plantilla) original, celda a
+celda, contra la escritura masiva en memoria y la escritura en streaming.
+
+Uso:
+    python -m benchmarks.bench_plantilla --filas 20000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.styles import Alignment
+from src.formateador import TIPOS_ESPERADOS, inyectar_en_plantilla, inyectar_en_plantilla_streaming
+from .sintetico import generar_formato_censal
+
+def inyectar_en_plantilla_celda_a_celda(df_formateado, ruta_referencia, ruta_destino, fila_ref):
+    """Versión original de la fase 3, conservada como referencia."""
+    shutil.copy2(ruta_referencia, ruta_destino)
+    fila_inicio_datos = fila_ref + 1
+
+    wb = load_workbook(ruta_destino)
+    ws = wb.active
+
+    filas_totales = ws.max_row if ws.max_row else 1000
+    for row in range(fila_inicio_datos, filas_totales + 1):
+        for col in range(1, 19):
+            ws.cell(row=row, column=col, value=None)
+
+    for r_idx, row_data in enumerate(df_formateado.values, start=fila_inicio_datos):
+        for c_idx, value in enumerate(row_data, start=1):
+            cell = ws.cell(row=r_idx, column=c_idx, value=value)
+            cell.alignment = Alignment(horizontal='left', vertical='center')
+
+    wb.save(ruta_destino)
+    wb.close()
+
+def generar_datos(num_filas):
+    """Genera un DataFrame con las columnas del formato censal ya transformadas."""
+    return pd.DataFrame({col: [f"{col[:3]}{i}" for i in range(num_filas)] for col in TIPOS_ESPERADOS}, dtype=object)
+
+def leer_valores(ruta_archivo):
+    """Devuelve las filas del libro como tuplas de valores, sin celdas vacías al final ni filas vacías finales."""
+    wb = load_workbook(ruta_archivo, read_only=True)
+    valores = []
+    for fila in wb.active.iter_rows(values_only=True):
+        fila = list(fila)
+        while fila and fila[-1] is None:
+            fila.pop()
+        valores.append(tuple(fila))
+    wb.close()
+    while valores and not valores[-1]:
+        valores.pop()
+    return valores
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=20_000, help='Número de registros a escribir.')
+    args = parser.parse_args()
+
+    df = generar_datos(args.filas)
+    with tempfile.TemporaryDirectory() as directorio:
+        plantilla = generar_formato_censal(os.path.join(directorio, 'plantilla.xlsx'))
+        rutas = {nombre: os.path.join(directorio, f'{nombre}.xlsx') for nombre in ('original', 'masiva', 'streaming')}
+
+        t_original = cronometrar(inyectar_en_plantilla_celda_a_celda, df, plantilla, rutas['original'], 4)
+        t_masiva = cronometrar(inyectar_en_plantilla, df, plantilla, rutas['masiva'], 4)
+        t_streaming = cronometrar(inyectar_en_plantilla_streaming, df, plantilla, rutas['streaming'], 4)
+
+        # La versión original no borraba las filas de ejemplo de la plantilla (ws.cell con
+        # value=None no modifica la celda), así que solo se comparan encabezados y datos
+        masiva = leer_valores(rutas['masiva'])
+        assert leer_valores(rutas['original'])[:len(masiva)] == masiva
+        assert leer_valores(rutas['streaming']) == masiva
+
+    print(f"Filas: {args.filas} | Columnas: {len(TIPOS_ESPERADOS)}")
+    print(f"Celda a celda (original): {t_original:8.2f} s")
+    print(f"Escritura masiva:         {t_masiva:8.2f} s ({t_original / t_masiva:.1f}x)")
+    print(f"Escritura en streaming:   {t_streaming:8.2f} s ({t_original / t_streaming:.1f}x)")
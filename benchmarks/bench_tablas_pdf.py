@@ -0,0 +1,71 @@
+"""
+Compara el dibujo de tablas de PDFReport original (iterrows y pdf.cell por celda)
+contra dibujar_tabla (columnas convertidas a texto una vez y celdas dibujadas con
+rectángulos y texto en posición fija), en páginas por segundo.
+
+Uso:
+    python -m benchmarks.bench_tablas_pdf --filas 1000 10000 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from src.reportes.reportes_pdf import PDFReport
+from .sintetico import generar_cuestionario
+
+def create_table_from_dataframe_celdas(reporte, df, col_widths=None):
+    """Versión original de PDFReport.create_table_from_dataframe, conservada como referencia."""
+    if col_widths is None:
+        col_widths = [reporte.pdf.epw / len(df.columns)] * len(df.columns)
+
+    reporte.pdf.set_font('DejaVu', 'B', 13)
+    reporte.pdf.set_fill_color(200, 220, 255)
+    for i, col in enumerate(df.columns):
+        reporte.pdf.cell(col_widths[i], 7, str(col), border=1, align='C', fill=True)
+    reporte.pdf.ln()
+
+    reporte.pdf.set_font('DejaVu', '', 13)
+    reporte.pdf.set_fill_color(255, 255, 255)
+    for _, row in df.iterrows():
+        for i, col in enumerate(df.columns):
+            reporte.pdf.cell(col_widths[i], 6, str(row[col]), border=1, align='L')
+        reporte.pdf.ln()
+    reporte.pdf.ln(2)
+
+def generar_tabla(num_filas):
+    """Tabla con la forma del reporte de personas repetidas."""
+    df = generar_cuestionario(num_filas)
+    nombres = df['Primer Nombre'] + ' ' + df['Segundo Nombre'].fillna('') + ' ' + df['Primer Apellido']
+    return pd.DataFrame({
+        'Documento': df['Documento'],
+        'Nombre Completo Persona': nombres,
+        'Parentesco': df['Parentesco'],
+        'Cantidad_Docs_Repetido': 2
+    })
+
+def medir(dibujar, df, ruta_pdf):
+    """Dibuja la tabla en un reporte nuevo y lo guarda; devuelve (segundos, páginas)."""
+    reporte = PDFReport(title="REPORTE DE PERSONAS REPETIDAS")
+    reporte.add_title()
+    inicio = time.perf_counter()
+    dibujar(reporte, df)
+    reporte.save_pdf(ruta_pdf)
+    return time.perf_counter() - inicio, reporte.pdf.pages_count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 10_000, 50_000], help='Tamaños de tabla a medir.')
+    args = parser.parse_args()
+
+    print(f"{'Filas':>8} | {'Método':<22} | {'Páginas':>7} | {'Segundos':>8} | {'Páginas/s':>9}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for num_filas in args.filas:
+            df = generar_tabla(num_filas)
+            metodos = {
+                'pdf.cell por celda': create_table_from_dataframe_celdas,
+                'dibujar_tabla': PDFReport.create_table_from_dataframe
+            }
+            for nombre, dibujar in metodos.items():
+                segundos, paginas = medir(dibujar, df, os.path.join(directorio, 'tabla.pdf'))
+                print(f"{num_filas:>8} | {nombre:<22} | {paginas:>7} | {segundos:>8.2f} | {paginas / segundos:>9.1f}")
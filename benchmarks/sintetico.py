@@ -0,0 +1,224 @@
+"""
+Generador determinista de censos sintéticos (sin datos reales) en los tres formatos que usa
+el proyecto: el cuestionario de registro ('Cuestionario'), la base de datos antigua
+('basededatosvieja', con las columnas del formato del Ministerio, de una o varias
+vigencias) y la plantilla del Formato Censal del Ministerio del Interior.
+"""
+import random
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Font
+from src.formateador import TIPOS_ESPERADOS
+
+PRIMEROS_NOMBRES = ['JUAN', 'MARIA', 'JOSE', 'ANA', 'LUIS', 'CARMEN', 'PEDRO', 'ROSA', 'JORGE', 'LUZ',
+                    'CARLOS', 'MARTA', 'DIEGO', 'SANDRA', 'ANDRES', 'GLORIA', 'FELIPE', 'NUBIA', 'OSCAR', 'DORA']
+SEGUNDOS_NOMBRES = ['ANTONIO', 'ELENA', 'MANUEL', 'ISABEL', 'ALBERTO', 'PATRICIA', 'ENRIQUE', 'ESTELA', None, None]
+APELLIDOS = ['GARCIA', 'RODRIGUEZ', 'MARTINEZ', 'LOPEZ', 'GONZALEZ', 'PEREZ', 'SANCHEZ', 'RAMIREZ', 'TORRES', 'FLOREZ',
+             'RIVERA', 'GOMEZ', 'DIAZ', 'MORENO', 'MUÑOZ', 'ROJAS', 'JIMENEZ', 'VARGAS', 'CASTRO', 'ORTIZ']
+PARENTESCOS_MIEMBRO = ['Esposa', 'Esposo', 'Hijo', 'Hijo(a)', 'Nieto', 'Madre', 'Padre', 'Hermano(a)', 'Sobrino']
+TIPOS_IDENTIFICACION = ['Cédula de Ciudadanía', 'Tarjeta de Identidad', 'Registro Civil de Nacimiento']
+
+# Columnas de la base antigua: las del Formato Censal, con 'NOMBRE' en lugar de 'NOMBRES'
+COLUMNAS_VIEJA = ['NOMBRE' if columna == 'NOMBRES' else columna for columna in TIPOS_ESPERADOS]
+
+
+def _persona(rng, documento, cedula_jefe, parentesco):
+    """Genera una fila del cuestionario para una persona."""
+    return {
+        'Cedula de jefe(a) de Familia': cedula_jefe,
+        'Primer Nombre': rng.choice(PRIMEROS_NOMBRES),
+        'Segundo Nombre': rng.choice(SEGUNDOS_NOMBRES),
+        'Primer Apellido': rng.choice(APELLIDOS),
+        'Segundo Apellido': rng.choice(APELLIDOS + [None]),
+        'Documento': documento,
+        'Parentesco': parentesco,
+    }
+
+
+def generar_cuestionario(num_personas, semilla=0, max_miembros=6, tasa_huerfanos=0.02,
+                         tasa_repetidos=0.01, tasa_jefes_multiples=0.005, min_miembros=1):
+    """
+    Genera un DataFrame sintético con la estructura del cuestionario de registro.
+
+    Args:
+        num_personas (int): Número aproximado de filas a generar.
+        semilla (int): Semilla para que el resultado sea reproducible.
+        max_miembros (int): Tamaño máximo de cada familia (incluido el jefe).
+        min_miembros (int): Tamaño mínimo de cada familia (incluido el jefe).
+        tasa_huerfanos (float): Proporción de personas cuyo jefe no está registrado.
+        tasa_repetidos (float): Proporción de personas registradas dos veces.
+        tasa_jefes_multiples (float): Proporción de familias con el jefe registrado dos veces.
+
+    Returns:
+        pandas.DataFrame: Filas del cuestionario en orden de registro.
+    """
+    rng = random.Random(semilla)
+    filas = []
+    siguiente_doc = 10_000_000
+
+    while len(filas) < num_personas:
+        cedula_jefe = siguiente_doc
+        siguiente_doc += 1
+        jefe = _persona(rng, cedula_jefe, cedula_jefe, 'Jefe')
+        filas.append(jefe)
+        if rng.random() < tasa_jefes_multiples:
+            filas.append(dict(jefe))
+
+        for _ in range(rng.randint(min_miembros - 1, max_miembros - 1)):
+            filas.append(_persona(rng, siguiente_doc, cedula_jefe, rng.choice(PARENTESCOS_MIEMBRO)))
+            siguiente_doc += 1
+
+        if rng.random() < tasa_huerfanos * max_miembros / 2:
+            filas.append(_persona(rng, siguiente_doc, siguiente_doc + 500_000_000, rng.choice(PARENTESCOS_MIEMBRO)))
+            siguiente_doc += 1
+
+    filas = filas[:num_personas]
+    for _ in range(int(num_personas * tasa_repetidos)):
+        filas.insert(rng.randrange(len(filas)), dict(rng.choice(filas)))
+
+    return pd.DataFrame(filas[:num_personas])
+
+def guardar_excel(df, ruta_archivo):
+    """Guarda un DataFrame sintético como libro de Excel (modo de solo escritura, para censos grandes)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for fila in df.astype(object).where(df.notna(), None).itertuples(index=False):
+        ws.append(fila)
+    wb.save(ruta_archivo)
+    return ruta_archivo
+
+def generar_base_vieja(cuestionario, semilla=0, tasa_ausentes=0.05):
+    """
+    Genera una base de datos antigua (formato 'basededatosvieja') a partir de un cuestionario sintético.
+
+    Cada cédula de jefe del cuestionario se convierte en un número de FAMILIA y se
+    agregan personas que ya no aparecen en el cuestionario, para que la comparación
+    encuentre miembros faltantes. Las demás columnas del formato del Ministerio (vigencia,
+    tipo de identificación, fecha de nacimiento, sexo...) se completan al azar para que la
+    base también sirva como origen de ejecutar_formateo.
+
+    Args:
+        cuestionario (pandas.DataFrame): Resultado de generar_cuestionario.
+        semilla (int): Semilla para que el resultado sea reproducible.
+        tasa_ausentes (float): Proporción de personas antiguas que no están en el cuestionario.
+
+    Returns:
+        pandas.DataFrame: Filas con las columnas de COLUMNAS_VIEJA, ordenadas por FAMILIA.
+    """
+    rng = random.Random(semilla)
+    numero_familia = {cedula: i + 1 for i, cedula in enumerate(cuestionario['Cedula de jefe(a) de Familia'].unique())}
+    vieja = pd.DataFrame({
+        'FAMILIA': cuestionario['Cedula de jefe(a) de Familia'].map(numero_familia),
+        'NUMERO DOCUMENTO': cuestionario['Documento'],
+        'NOMBRE': (cuestionario['Primer Nombre'] + ' ' + cuestionario['Segundo Nombre'].fillna('')).str.strip(),
+        'APELLIDOS': (cuestionario['Primer Apellido'] + ' ' + cuestionario['Segundo Apellido'].fillna('')).str.strip(),
+        'PARENTESCO': cuestionario['Parentesco']
+    }).drop_duplicates('NUMERO DOCUMENTO')
+
+    ausentes = [{
+        'FAMILIA': rng.randint(1, len(numero_familia)),
+        'NUMERO DOCUMENTO': 900_000_000 + i,
+        'NOMBRE': rng.choice(PRIMEROS_NOMBRES),
+        'APELLIDOS': rng.choice(APELLIDOS),
+        'PARENTESCO': rng.choice(PARENTESCOS_MIEMBRO)
+    } for i in range(int(len(vieja) * tasa_ausentes))]
+
+    vieja = pd.concat([vieja, pd.DataFrame(ausentes)], ignore_index=True).sort_values('FAMILIA', kind='stable', ignore_index=True)
+    return completar_columnas_ministerio(vieja, semilla)[COLUMNAS_VIEJA]
+
+def completar_columnas_ministerio(vieja, semilla=0):
+    """Agrega a la base antigua las columnas del formato del Ministerio que no salen del cuestionario."""
+    rng = np.random.default_rng(semilla)
+    n = len(vieja)
+    nacimiento = (pd.Timestamp(1940, 1, 1) + pd.to_timedelta(rng.integers(0, 365 * 80, n), unit='D')).to_numpy()
+    return vieja.assign(**{
+        'VIGENCIA': 2023,
+        'RESGUARDO INDIGENA': '0',
+        'COMUNIDAD INDIGENA': 'COMUNIDAD SINTETICA',
+        'TIPO IDENTIFICACION': rng.choice(TIPOS_IDENTIFICACION, n),
+        'FECHA NACIMIENTO': nacimiento,
+        'SEXO': rng.choice(['Masculino', 'Femenino'], n),
+        'ESTADO CIVIL': rng.choice(['Soltero(a)', 'Casado(a)', 'Unión libre', 'Viudo'], n),
+        'PROFESION': rng.choice(['AGRICULTOR', 'ESTUDIANTE', 'HOGAR', 'ARTESANO', ''], n),
+        'ESCOLARIDAD': rng.choice(['Primaria', 'Secundaria', 'Universitaria', 'Ninguno'], n),
+        'INTEGRANTES': vieja.groupby('FAMILIA')['FAMILIA'].transform('size'),
+        'DIRECCION': [f"VEREDA {numero % 40 + 1}" for numero in vieja['FAMILIA']],
+        'TELEFONO': rng.integers(3_000_000_000, 3_299_999_999, n).astype(str),
+        'USUARIO': 'SINTETICO'
+    })
+
+def generar_vigencias(vieja, num_vigencias, semilla=0, tasa_salidas=0.03, tasa_llegadas=0.04, tasa_mudanzas=0.02, tasa_cambio_jefe=0.01):
+    """
+    Genera la base antigua de varias vigencias consecutivas a partir de la de la primera.
+
+    Cada vigencia parte de la anterior: salen algunas personas (nunca el jefe), llegan
+    personas nuevas a familias existentes, algunos miembros se mudan a otra familia y en
+    algunas familias otro miembro pasa a ser el jefe (el jefe anterior queda como miembro).
+
+    Args:
+        vieja (pandas.DataFrame): Resultado de generar_base_vieja (primera vigencia).
+        num_vigencias (int): Número total de vigencias, incluida la primera.
+        semilla (int): Semilla para que el resultado sea reproducible.
+        tasa_salidas, tasa_llegadas, tasa_mudanzas (float): Proporción de personas que salen,
+            llegan o se mudan de familia en cada vigencia.
+        tasa_cambio_jefe (float): Proporción de familias que cambian de jefe en cada vigencia.
+
+    Returns:
+        pandas.DataFrame: Todas las vigencias seguidas, con VIGENCIA creciente de a un año.
+    """
+    rng = np.random.default_rng(semilla)
+    primer_año = int(vieja['VIGENCIA'].iloc[0])
+    siguiente_doc = int(pd.to_numeric(vieja['NUMERO DOCUMENTO']).max()) + 1
+    actual = vieja.reset_index(drop=True)
+    vigencias = [actual]
+
+    for i in range(1, num_vigencias):
+        es_jefe = actual['PARENTESCO'].eq('Jefe').to_numpy()
+        sale = ~es_jefe & (rng.random(len(actual)) < tasa_salidas)
+        actual, es_jefe = actual[~sale].reset_index(drop=True), es_jefe[~sale]
+        familias = actual['FAMILIA'].unique()
+
+        muda = ~es_jefe & (rng.random(len(actual)) < tasa_mudanzas)
+        actual.loc[muda, 'FAMILIA'] = rng.choice(familias, int(muda.sum()))
+
+        # El primer miembro de cada familia elegida pasa a ser el jefe
+        cambian = familias[rng.random(len(familias)) < tasa_cambio_jefe]
+        nuevos_jefes = actual[actual['FAMILIA'].isin(cambian).to_numpy() & ~es_jefe].drop_duplicates('FAMILIA')
+        jefes_anteriores = es_jefe & actual['FAMILIA'].isin(nuevos_jefes['FAMILIA']).to_numpy()
+        actual.loc[jefes_anteriores, 'PARENTESCO'] = 'Esposo'
+        actual.loc[nuevos_jefes.index, 'PARENTESCO'] = 'Jefe'
+
+        llegadas = actual.sample(int(len(actual) * tasa_llegadas), random_state=semilla + i).reset_index(drop=True)
+        llegadas['FAMILIA'] = rng.choice(familias, len(llegadas))
+        llegadas['NUMERO DOCUMENTO'] = np.arange(siguiente_doc, siguiente_doc + len(llegadas))
+        llegadas['NOMBRE'] = rng.choice(PRIMEROS_NOMBRES, len(llegadas))
+        llegadas['PARENTESCO'] = 'Hijo'
+        siguiente_doc += len(llegadas)
+
+        actual = pd.concat([actual, llegadas], ignore_index=True).sort_values('FAMILIA', kind='stable', ignore_index=True)
+        actual['VIGENCIA'] = primer_año + i
+        actual['INTEGRANTES'] = actual.groupby('FAMILIA')['FAMILIA'].transform('size')
+        vigencias.append(actual)
+
+    return pd.concat(vigencias, ignore_index=True)[COLUMNAS_VIEJA]
+
+def generar_formato_censal(ruta_archivo, fila_encabezados=4, filas_ejemplo=50):
+    """
+    Crea una plantilla del Formato Censal del Ministerio: título combinado, encabezados de
+    TIPOS_ESPERADOS en `fila_encabezados` y algunas filas de ejemplo que el formateo reemplaza.
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws['A1'] = 'MINISTERIO DEL INTERIOR'
+    ws['A1'].font = Font(bold=True, size=14)
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(TIPOS_ESPERADOS))
+    for col, encabezado in enumerate(TIPOS_ESPERADOS, start=1):
+        ws.cell(row=fila_encabezados, column=col, value=encabezado).font = Font(bold=True)
+        ws.column_dimensions[ws.cell(row=fila_encabezados, column=col).column_letter].width = 18
+    for fila in range(fila_encabezados + 1, fila_encabezados + 1 + filas_ejemplo):
+        for col in range(1, len(TIPOS_ESPERADOS) + 1):
+            ws.cell(row=fila, column=col, value='EJEMPLO')
+    wb.save(ruta_archivo)
+    return ruta_archivo
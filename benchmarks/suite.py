@@ -0,0 +1,191 @@
+"""
+Suite de benchmarks de extremo a extremo sobre censos sintéticos.
+
+Para cada tamaño genera (una sola vez, de forma determinista) el cuestionario, la base de
+datos antigua y la plantilla del Formato Censal, y mide procesar_datos,
+comparar_bases_de_datos, ejecutar_formateo y cada generador de reportes. Cada medición se
+ejecuta en un proceso nuevo para que la memoria de una no afecte a la siguiente; se
+registran el tiempo de reloj y la memoria residente máxima durante la llamada (el pico y
+el incremento sobre la memoria que ya usaba el proceso antes de llamar).
+
+Los resultados se agregan como filas a un archivo CSV. Por defecto se desactiva la caché
+de lectura (ANALISIS_SIN_CACHE=1) para medir también la lectura de los libros.
+
+Uso:
+    python -m benchmarks.suite --personas 1000 10000 100000 1000000
+    python -m benchmarks.suite --personas 10000 --casos procesar_datos reportes_pdf --resultados resultados.csv
+"""
+import argparse
+import contextlib
+import csv
+import multiprocessing
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+COLUMNAS_RESULTADOS = ['fecha', 'caso', 'personas', 'segundos', 'pico_mb', 'incremento_mb', 'cache', 'python', 'pandas']
+
+def memoria_residente_mb():
+    """Memoria residente actual del proceso en MB (Linux); None si no se puede medir."""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class MedidorMemoria:
+    """Muestrea la memoria residente en un hilo mientras dura el bloque `with` y guarda el máximo."""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.inicial = None
+        self.pico = None
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+
+    def _muestrear(self):
+        while not self._detener.is_set():
+            actual = memoria_residente_mb()
+            if actual is not None:
+                self.pico = max(self.pico or 0, actual)
+            self._detener.wait(self.intervalo)
+
+    def __enter__(self):
+        self.inicial = memoria_residente_mb()
+        self.pico = self.inicial
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._detener.set()
+        self._hilo.join()
+        final = memoria_residente_mb()
+        if final is not None:
+            self.pico = max(self.pico or 0, final)
+
+def generar_datos(num_personas, directorio):
+    """Genera (o reutiliza) los tres libros sintéticos de un tamaño; devuelve sus rutas."""
+    from .sintetico import generar_base_vieja, generar_cuestionario, generar_formato_censal, guardar_excel
+
+    os.makedirs(directorio, exist_ok=True)
+    rutas = {
+        'cuestionario': os.path.join(directorio, f'cuestionario_{num_personas}.xlsx'),
+        'vieja': os.path.join(directorio, f'basededatosvieja_{num_personas}.xlsx'),
+        'formato_censal': os.path.join(directorio, 'formato_censal.xlsx')
+    }
+    if not (os.path.exists(rutas['cuestionario']) and os.path.exists(rutas['vieja'])):
+        print(f"-> Generando censo sintético de {num_personas} personas en '{directorio}'...")
+        cuestionario = generar_cuestionario(num_personas)
+        guardar_excel(cuestionario, rutas['cuestionario'])
+        guardar_excel(generar_base_vieja(cuestionario), rutas['vieja'])
+    if not os.path.exists(rutas['formato_censal']):
+        generar_formato_censal(rutas['formato_censal'])
+    return rutas
+
+# Cada caso prepara lo que necesita (sin medir) y devuelve la llamada que se mide
+
+def preparar_procesar_datos(rutas, salida):
+    from src.procesamiento import procesar_datos
+    return lambda: procesar_datos(rutas['cuestionario'])
+
+def preparar_comparar_bases_de_datos(rutas, salida):
+    from src.reporte_avanzado import comparar_bases_de_datos
+    return lambda: comparar_bases_de_datos(rutas['vieja'], rutas['cuestionario'])
+
+def preparar_ejecutar_formateo(rutas, salida):
+    from src.formateador import ejecutar_formateo
+    return lambda: ejecutar_formateo(rutas['vieja'], os.path.join(salida, 'formato_censal_resultado.xlsx'), rutas['formato_censal'])
+
+def _preparar_reportes(formato):
+    def preparar(rutas, salida):
+        from src.procesamiento import procesar_datos
+        from src.reportes.generar_todos import GENERADORES
+        resultado_analisis = procesar_datos(rutas['cuestionario'])
+        return lambda: GENERADORES[formato](*resultado_analisis, os.path.join(salida, f'reportes_{formato}'))
+    return preparar
+
+def preparar_reporte_avanzado(rutas, salida):
+    from src.reporte_avanzado import generar_reporte_avanzado
+    return lambda: generar_reporte_avanzado(rutas['vieja'], rutas['cuestionario'], os.path.join(salida, 'reportes_avanzados'))
+
+CASOS = {
+    'procesar_datos': preparar_procesar_datos,
+    'comparar_bases_de_datos': preparar_comparar_bases_de_datos,
+    'ejecutar_formateo': preparar_ejecutar_formateo,
+    'reportes_pdf': _preparar_reportes('pdf'),
+    'reportes_txt': _preparar_reportes('txt'),
+    'reportes_json': _preparar_reportes('json'),
+    'reporte_avanzado': preparar_reporte_avanzado
+}
+
+def medir_caso(caso, rutas, salida):
+    """Se ejecuta en un proceso nuevo: prepara el caso, mide la llamada y devuelve (segundos, pico_mb, incremento_mb)."""
+    os.makedirs(salida, exist_ok=True)
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+        llamada = CASOS[caso](rutas, salida)
+        with MedidorMemoria() as memoria:
+            inicio = time.perf_counter()
+            llamada()
+            segundos = time.perf_counter() - inicio
+    if memoria.pico is None:
+        return segundos, None, None
+    return segundos, memoria.pico, memoria.pico - memoria.inicial
+
+def guardar_resultado(ruta_resultados, fila):
+    """Agrega una fila al CSV de resultados (con encabezados si el archivo es nuevo)."""
+    nuevo = not os.path.exists(ruta_resultados)
+    os.makedirs(os.path.dirname(ruta_resultados) or '.', exist_ok=True)
+    with open(ruta_resultados, 'a', newline='', encoding='utf-8') as archivo:
+        escritor = csv.DictWriter(archivo, fieldnames=COLUMNAS_RESULTADOS)
+        if nuevo:
+            escritor.writeheader()
+        escritor.writerow(fila)
+
+def _mb(valor):
+    return '' if valor is None else round(valor, 1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--personas', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000], help='Tamaños de censo a medir.')
+    parser.add_argument('--casos', nargs='+', choices=list(CASOS), default=list(CASOS), help='Casos a medir.')
+    parser.add_argument('--datos', default=os.path.join('.cache', 'benchmarks'), help='Carpeta de los libros sintéticos (se reutilizan entre ejecuciones).')
+    parser.add_argument('--resultados', default=os.path.join('benchmarks', 'resultados.csv'), help='Archivo CSV al que se agregan los resultados.')
+    parser.add_argument('--con-cache', action='store_true', help='Usar la caché de lectura de XLSX (por defecto se desactiva).')
+    args = parser.parse_args()
+
+    # Los procesos de cada medición heredan el entorno y leen estas variables al importar src
+    if not args.con_cache:
+        os.environ['ANALISIS_SIN_CACHE'] = '1'
+
+    import pandas as pd
+
+    print(f"{'Caso':<24} | {'Personas':>9} | {'Segundos':>9} | {'Pico MB':>8} | {'Incremento MB':>13}")
+    contexto = multiprocessing.get_context('spawn')
+    for num_personas in args.personas:
+        rutas = generar_datos(num_personas, args.datos)
+        salida = os.path.join(args.datos, f'salida_{num_personas}')
+        for caso in args.casos:
+            with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                try:
+                    segundos, pico, incremento = pool.submit(medir_caso, caso, rutas, salida).result()
+                except Exception as e:
+                    print(f"{caso:<24} | {num_personas:>9} | error: {e}")
+                    continue
+
+            guardar_resultado(args.resultados, {
+                'fecha': datetime.now().isoformat(timespec='seconds'),
+                'caso': caso,
+                'personas': num_personas,
+                'segundos': round(segundos, 3),
+                'pico_mb': _mb(pico),
+                'incremento_mb': _mb(incremento),
+                'cache': 'si' if args.con_cache else 'no',
+                'python': platform.python_version(),
+                'pandas': pd.__version__
+            })
+            print(f"{caso:<24} | {num_personas:>9} | {segundos:>9.2f} | {_mb(pico):>8} | {_mb(incremento):>13}")
+
+    print(f"\nResultados agregados a '{args.resultados}'.")
@@ -0,0 +1,380 @@
+"""
+Almacén SQLite del censo procesado.
+
+Cada reporte empieza leyendo el libro XLSX, que es el paso más lento. El almacén guarda
+en un archivo SQLite local el cuestionario ya procesado y la base de datos antigua, y los
+reportes se generan después con consultas sobre él, sin volver a leer los libros:
+
+* personas: una fila por registro del cuestionario con el documento y la cédula del jefe
+  en su texto canónico, los nombres, el parentesco, el nombre completo y el nombre
+  normalizado (sin tildes, en mayúsculas).
+* familias: una fila por cédula de jefe con la fila de su primera aparición, el número de
+  personas y el número de jefes (personas cuyo documento es la cédula).
+* base_vieja: las columnas de la base de datos antigua que usa el reporte avanzado.
+* meta: la versión del almacén y, por cada libro, su ruta, su huella y el tipo de cada
+  columna, para devolver las columnas con los mismos tipos con que se leyeron.
+
+Hay índices sobre el documento, la cédula del jefe y el nombre normalizado. Un libro se
+vuelve a cargar solo si su huella (tamaño, fecha de modificación y hash) cambió.
+
+Uso:
+    python -m src.almacen_censo --archivo "Archivo/Cuestionario.xlsx" --vieja Archivo/basededatosvieja.xlsx
+    python -m src.almacen_censo --documento 1234567
+    python -m src.almacen_censo --nombre "maria perez"
+"""
+import argparse
+import json
+import os
+import sqlite3
+import pandas as pd
+from tabulate import tabulate
+from .cache_excel import huella_archivo, leer_excel
+from .duplicados_aproximados import normalizar_nombres
+from .esquema import aplicar_esquema, claves_documento, textos_de_claves
+from .metricas import Fase
+from .procesamiento import claves_familia, detectar_personas_repetidas, leer_registros
+from .reporte_avanzado import COLUMNAS_NUEVA, COLUMNAS_VIEJA, comparar_tablas, guardar_reporte_avanzado
+
+# Archivo del almacén y versión de su formato (si cambia, los libros se vuelven a cargar)
+RUTA_ALMACEN = os.environ.get('ANALISIS_ALMACEN', os.path.join('Archivo', 'censo.sqlite'))
+VERSION_ALMACEN = 1
+
+# Columna del libro -> columna de la tabla
+COLUMNAS_PERSONAS = {
+    'Cedula de jefe(a) de Familia': 'cedula_jefe',
+    'Documento': 'documento',
+    'Primer Nombre': 'primer_nombre',
+    'Segundo Nombre': 'segundo_nombre',
+    'Primer Apellido': 'primer_apellido',
+    'Segundo Apellido': 'segundo_apellido',
+    'Parentesco': 'parentesco'
+}
+COLUMNAS_BASE_VIEJA = {'FAMILIA': 'familia', 'NUMERO DOCUMENTO': 'documento', 'NOMBRE': 'nombre', 'APELLIDOS': 'apellidos'}
+
+ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+INDICES_PERSONAS = """
+CREATE INDEX idx_personas_documento ON personas (documento);
+CREATE INDEX idx_personas_cedula_jefe ON personas (cedula_jefe);
+CREATE INDEX idx_personas_nombre_normalizado ON personas (nombre_normalizado);
+CREATE TABLE familias AS
+    SELECT cedula_jefe, MIN(fila) AS primera_fila, COUNT(*) AS personas, SUM(documento IS cedula_jefe) AS jefes
+    FROM personas WHERE cedula_jefe IS NOT NULL GROUP BY cedula_jefe;
+CREATE UNIQUE INDEX idx_familias_cedula_jefe ON familias (cedula_jefe);
+"""
+
+INDICES_BASE_VIEJA = """
+CREATE INDEX idx_base_vieja_documento ON base_vieja (documento);
+CREATE INDEX idx_base_vieja_nombre_normalizado ON base_vieja (nombre_normalizado);
+"""
+
+# Miembros de las familias con un solo jefe, en orden de primera aparición de la cédula
+CONSULTA_MIEMBROS = """
+    SELECT p.cedula_jefe, p.fila, p.documento, p.nombre_completo, p.parentesco, p.documento IS p.cedula_jefe AS es_jefe
+    FROM familias f JOIN personas p ON p.cedula_jefe = f.cedula_jefe
+    WHERE f.jefes = 1
+    ORDER BY f.primera_fila, p.fila
+"""
+
+# Jefes de las cédulas con más de un jefe
+CONSULTA_JEFES_MULTIPLES = """
+    SELECT p.cedula_jefe, p.primer_nombre, p.primer_apellido
+    FROM familias f JOIN personas p ON p.cedula_jefe = f.cedula_jefe AND p.documento = f.cedula_jefe
+    WHERE f.jefes > 1
+    ORDER BY f.primera_fila, p.fila
+"""
+
+# Personas cuya cédula de jefe no es el documento de ningún jefe registrado
+CONSULTA_SIN_JEFE = """
+    SELECT p.cedula_jefe, p.nombre_completo, p.documento
+    FROM personas p
+    WHERE p.cedula_jefe IS NOT NULL AND p.documento IS NOT p.cedula_jefe
+      AND NOT EXISTS (SELECT 1 FROM familias f WHERE f.cedula_jefe = p.cedula_jefe AND f.jefes > 0)
+    ORDER BY p.fila
+"""
+
+# Una fila por nombre completo y documento con la cédula de jefe de su primera aparición
+# (en SQLite las columnas sin agregar toman el valor de la fila de MIN(fila))
+CONSULTA_RESUMEN_PERSONAS = """
+    SELECT cedula_jefe, nombre_completo, documento, COUNT(*) AS cantidad, MIN(fila) AS primera_fila
+    FROM personas GROUP BY nombre_completo, documento ORDER BY primera_fila
+"""
+
+def conectar(ruta_almacen=RUTA_ALMACEN):
+    """Abre (o crea) el almacén y devuelve la conexión."""
+    directorio = os.path.dirname(ruta_almacen)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    conexion = sqlite3.connect(ruta_almacen)
+    conexion.executescript(ESQUEMA_SQL)
+    return conexion
+
+def _leer_meta(conexion, libro):
+    """Ruta, huella, versión y tipos con que se cargó el libro; None si no está en el almacén."""
+    fila = conexion.execute("SELECT valor FROM meta WHERE clave = ?", (libro,)).fetchone()
+    return json.loads(fila[0]) if fila else None
+
+def _escribir_meta(conexion, libro, ruta_archivo, huella, tipos, filas):
+    meta = {'version': VERSION_ALMACEN, 'ruta': os.path.abspath(ruta_archivo), 'huella': huella, 'tipos': tipos, 'filas': filas,
+            'cargado': pd.Timestamp.now().isoformat(timespec='seconds')}
+    conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)", (libro, json.dumps(meta, ensure_ascii=False)))
+
+def esta_actualizado(conexion, libro, ruta_archivo):
+    """Indica si el almacén tiene cargada la versión actual del archivo."""
+    meta = _leer_meta(conexion, libro)
+    return (meta is not None and meta['version'] == VERSION_ALMACEN and meta['ruta'] == os.path.abspath(ruta_archivo)
+            and meta['huella'] == huella_archivo(ruta_archivo))
+
+def _restaurar_tipos(df, tipos):
+    """Devuelve a cada columna el tipo que tenía al cargarla (los documentos se guardan como texto canónico)."""
+    for columna, tipo in tipos.items():
+        if columna in df.columns:
+            df[columna] = df[columna].astype(tipo)
+    return df
+
+def _tipos(df, columnas):
+    return {columnas[columna]: str(df[columna].dtype) for columna in columnas}
+
+def cargar_cuestionario(conexion, ruta_archivo):
+    """
+    Carga el cuestionario procesado en las tablas personas y familias (reemplaza las anteriores).
+
+    Returns:
+        int: Número de personas cargadas.
+    """
+    huella = huella_archivo(ruta_archivo)
+    df = leer_registros(ruta_archivo)
+    with Fase('almacen_carga_cuestionario', len(df), os.path.basename(ruta_archivo)):
+        claves_jefe, claves_persona, textos = claves_familia(df)
+        personas = df[list(COLUMNAS_PERSONAS)].rename(columns=COLUMNAS_PERSONAS)
+        personas['cedula_jefe'] = textos_de_claves(claves_jefe, textos)
+        personas['documento'] = textos_de_claves(claves_persona, textos)
+        personas['nombre_completo'] = df['Nombre Completo Persona']
+        personas['nombre_normalizado'] = normalizar_nombres(df['Nombre Completo Persona'])
+        personas.index = pd.RangeIndex(len(personas), name='fila')
+
+        with conexion:
+            conexion.execute("DROP TABLE IF EXISTS familias")
+            conexion.execute("DROP TABLE IF EXISTS personas")
+            conexion.execute(f"CREATE TABLE personas (fila INTEGER PRIMARY KEY, {', '.join(f'{columna} TEXT' for columna in personas.columns)})")
+            personas.astype(object).where(personas.notna(), None).to_sql('personas', conexion, if_exists='append')
+            conexion.executescript(INDICES_PERSONAS)
+            _escribir_meta(conexion, 'cuestionario', ruta_archivo, huella, _tipos(df, COLUMNAS_PERSONAS), len(df))
+    return len(df)
+
+def cargar_base_vieja(conexion, ruta_archivo):
+    """
+    Carga las columnas de la base de datos antigua que usa el reporte avanzado (reemplaza la anterior).
+
+    Returns:
+        int: Número de personas cargadas.
+    """
+    huella = huella_archivo(ruta_archivo)
+    df = aplicar_esquema(leer_excel(ruta_archivo)[COLUMNAS_VIEJA].copy())
+    with Fase('almacen_carga_base_vieja', len(df), os.path.basename(ruta_archivo)):
+        (claves,), textos = claves_documento(df['NUMERO DOCUMENTO'])
+        vieja = df.rename(columns=COLUMNAS_BASE_VIEJA)
+        vieja['documento'] = textos_de_claves(claves, textos)
+        vieja['nombre_normalizado'] = normalizar_nombres(vieja['nombre'].astype(str) + ' ' + vieja['apellidos'].astype(str))
+        vieja.index = pd.RangeIndex(len(vieja), name='fila')
+
+        with conexion:
+            conexion.execute("DROP TABLE IF EXISTS base_vieja")
+            # La familia se guarda sin tipo declarado para conservar números o textos tal como se leyeron
+            conexion.execute("CREATE TABLE base_vieja (fila INTEGER PRIMARY KEY, familia, documento TEXT, nombre TEXT, apellidos TEXT, nombre_normalizado TEXT)")
+            vieja.astype(object).where(vieja.notna(), None).to_sql('base_vieja', conexion, if_exists='append')
+            conexion.executescript(INDICES_BASE_VIEJA)
+            _escribir_meta(conexion, 'base_vieja', ruta_archivo, huella, _tipos(df, COLUMNAS_BASE_VIEJA), len(df))
+    return len(df)
+
+def actualizar_almacen(ruta_archivo, ruta_vieja=None, ruta_almacen=RUTA_ALMACEN, forzar=False):
+    """
+    Carga en el almacén los libros que no estén cargados o que hayan cambiado.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX del cuestionario; None para omitirlo.
+        ruta_vieja (str): La ruta a la base de datos antigua; None para omitirla.
+        ruta_almacen (str): Archivo SQLite del almacén.
+        forzar (bool): Si es True los libros se cargan aunque no hayan cambiado.
+
+    Returns:
+        list: Libros cargados en esta llamada ('cuestionario' y/o 'base_vieja').
+    """
+    cargados = []
+    conexion = conectar(ruta_almacen)
+    try:
+        for libro, ruta, cargar in [('cuestionario', ruta_archivo, cargar_cuestionario), ('base_vieja', ruta_vieja, cargar_base_vieja)]:
+            if ruta and (forzar or not esta_actualizado(conexion, libro, ruta)):
+                filas = cargar(conexion, ruta)
+                print(f"-> '{ruta}' cargado en el almacén '{ruta_almacen}' ({filas} personas).")
+                cargados.append(libro)
+    finally:
+        conexion.close()
+    return cargados
+
+def consultar_familias(conexion):
+    """
+    Arma las familias con consultas sobre el almacén.
+
+    Returns:
+        tuple: Familias con múltiples miembros, familias con un solo miembro y advertencias
+        de cédulas con múltiples jefes, con la misma forma que construir_indice_familias.
+    """
+    tipos = _leer_meta(conexion, 'cuestionario')['tipos']
+    miembros = pd.read_sql_query(CONSULTA_MIEMBROS, conexion, index_col='fila')
+    miembros['parentesco'] = miembros['parentesco'].astype(tipos['parentesco'])
+    miembros.index.name = None
+    nombres_jefes = miembros.loc[miembros['es_jefe'] == 1].set_index('cedula_jefe')['nombre_completo'].to_dict()
+
+    miembros_tabla = miembros[['nombre_completo', 'parentesco']].set_axis(['Nombre Completo Persona', 'Parentesco'], axis=1)
+    miembros_tabla.insert(0, 'Documento', miembros['documento'].to_numpy(dtype=object))
+
+    familias_multiples = {}
+    familias_uno = {}
+    for jefe_cedula, tabla in miembros_tabla.groupby(miembros['cedula_jefe'].to_numpy(), sort=False):
+        destino = familias_multiples if len(tabla) > 1 else familias_uno
+        destino[jefe_cedula] = {"jefe": [jefe_cedula, nombres_jefes[jefe_cedula]], "miembros": tabla}
+
+    jefes = _restaurar_tipos(pd.read_sql_query(CONSULTA_JEFES_MULTIPLES, conexion), {columna: tipos[columna] for columna in ['primer_nombre', 'primer_apellido']})
+    nombres_cortos = jefes['primer_nombre'].astype(str).str.strip() + " " + jefes['primer_apellido'].astype(str).str.strip()
+    advertencias = [[cedula, nombres, "Múltiples jefes de familia identificados con la misma cédula."]
+                    for cedula, nombres in nombres_cortos.groupby(jefes['cedula_jefe'], sort=False).agg(", ".join).items()]
+
+    return familias_multiples, familias_uno, advertencias
+
+def consultar_miembros_sin_jefe(conexion):
+    """Advertencias únicas [cédula del jefe, nombre completo, documento] de las personas sin jefe registrado."""
+    huerfanos = pd.read_sql_query(CONSULTA_SIN_JEFE, conexion).astype(object)
+    huerfanos['documento'] = huerfanos['documento'].fillna('nan')
+    return huerfanos.drop_duplicates().values.tolist()
+
+def consultar_personas_repetidas(conexion):
+    """Personas repetidas con la misma forma que detectar_personas_repetidas, a partir del resumen agrupado en SQL."""
+    tipos = _leer_meta(conexion, 'cuestionario')['tipos']
+    resumen = _restaurar_tipos(pd.read_sql_query(CONSULTA_RESUMEN_PERSONAS, conexion), tipos)
+    resumen = resumen.rename(columns={'cedula_jefe': 'Cedula de jefe(a) de Familia', 'nombre_completo': 'Nombre Completo Persona',
+                                      'documento': 'Documento', 'cantidad': 'Cantidad'}).drop(columns='primera_fila')
+    return detectar_personas_repetidas(resumen)
+
+def procesar_datos_almacen(ruta_archivo, ruta_almacen=RUTA_ALMACEN):
+    """
+    Equivalente a procesar_datos con consultas sobre el almacén.
+
+    El cuestionario se carga en el almacén solo si no está o si cambió desde la última
+    carga; en otro caso no se lee el libro.
+
+    Returns:
+        tuple: Los mismos cinco resultados que procesar_datos.
+    """
+    try:
+        actualizar_almacen(ruta_archivo, ruta_almacen=ruta_almacen)
+    except FileNotFoundError:
+        return f"Error: El archivo '{ruta_archivo}' no fue encontrado.", {}, {}, 0, pd.DataFrame()
+    except Exception as e:
+        return f"Error al leer el archivo '{ruta_archivo}': {e}", {}, {}, 0, pd.DataFrame()
+
+    conexion = conectar(ruta_almacen)
+    try:
+        total_personas = _leer_meta(conexion, 'cuestionario')['filas']
+        with Fase('almacen_familias', total_personas):
+            familias_multiples, familias_uno, advertencias = consultar_familias(conexion)
+        with Fase('almacen_advertencias', total_personas):
+            advertencias_jefes = {tuple(adv) for adv in advertencias}
+            advertencias_unicas = advertencias + [adv for adv in consultar_miembros_sin_jefe(conexion) if tuple(adv) not in advertencias_jefes]
+        with Fase('almacen_personas_repetidas', total_personas):
+            personas_repetidas_df = consultar_personas_repetidas(conexion)
+    finally:
+        conexion.close()
+
+    return familias_multiples, familias_uno, advertencias_unicas, total_personas, personas_repetidas_df
+
+def _leer_tabla(conexion, tabla, columnas, tipos):
+    """Lee una tabla del almacén con los nombres y tipos de columna del libro original."""
+    consulta = f"SELECT {', '.join(columnas.values())} FROM {tabla} ORDER BY fila"
+    df = _restaurar_tipos(pd.read_sql_query(consulta, conexion), tipos)
+    return df.rename(columns={columna: original for original, columna in columnas.items()})
+
+def comparar_bases_almacen(ruta_vieja, ruta_nueva, ruta_almacen=RUTA_ALMACEN):
+    """
+    Equivalente a comparar_bases_de_datos leyendo las dos bases desde el almacén.
+
+    Returns:
+        dict: El resultado de comparar_tablas; {'error': ...} si falla.
+    """
+    try:
+        actualizar_almacen(ruta_nueva, ruta_vieja, ruta_almacen)
+        conexion = conectar(ruta_almacen)
+        try:
+            df_vieja = _leer_tabla(conexion, 'base_vieja', COLUMNAS_BASE_VIEJA, _leer_meta(conexion, 'base_vieja')['tipos'])
+            df_nueva = _leer_tabla(conexion, 'personas', COLUMNAS_PERSONAS, _leer_meta(conexion, 'cuestionario')['tipos'])
+        finally:
+            conexion.close()
+        with Fase('comparacion_bases', len(df_vieja)):
+            return comparar_tablas(df_vieja[COLUMNAS_VIEJA], df_nueva[COLUMNAS_NUEVA])
+    except FileNotFoundError as e:
+        return {'error': f"Error: Archivo no encontrado: {e}"}
+    except Exception as e:
+        return {'error': f"Error al procesar los archivos: {e}"}
+
+def generar_reporte_avanzado_almacen(ruta_archivo_viejo, ruta_archivo_nuevo, ruta_reporte_pdf='reportes/reportes_avanzados', ruta_almacen=RUTA_ALMACEN):
+    """Compara las dos bases de datos desde el almacén y guarda el reporte avanzado en PDF."""
+    guardar_reporte_avanzado(comparar_bases_almacen(ruta_archivo_viejo, ruta_archivo_nuevo, ruta_almacen), ruta_reporte_pdf)
+
+def buscar_personas(ruta_almacen=RUTA_ALMACEN, documento=None, nombre=None):
+    """
+    Busca personas del cuestionario por documento o por nombre usando los índices del almacén.
+
+    Args:
+        documento (str): Documento exacto (se normaliza igual que al cargar).
+        nombre (str): Nombre completo o su comienzo; se compara sin tildes ni mayúsculas.
+
+    Returns:
+        pandas.DataFrame: Registros encontrados con su cédula de jefe y parentesco.
+    """
+    condiciones, parametros = [], []
+    if documento is not None:
+        (claves,), textos = claves_documento(pd.Series([documento]))
+        condiciones.append("documento = ?")
+        parametros.append(textos_de_claves(claves, textos)[0])
+    if nombre is not None:
+        # Búsqueda por prefijo sobre el índice del nombre normalizado
+        prefijo = normalizar_nombres(pd.Series([nombre])).iat[0]
+        condiciones.append("nombre_normalizado >= ? AND nombre_normalizado < ?")
+        parametros.extend([prefijo, prefijo + '\uffff'])
+    consulta = ("SELECT fila + 2 AS fila_excel, documento, nombre_completo, cedula_jefe, parentesco FROM personas"
+                f" WHERE {' AND '.join(condiciones) or '1'} ORDER BY fila")
+    conexion = conectar(ruta_almacen)
+    try:
+        if _leer_meta(conexion, 'cuestionario') is None:
+            raise ValueError(f"El almacén '{ruta_almacen}' no tiene un cuestionario cargado (use --archivo).")
+        return pd.read_sql_query(consulta, conexion, params=parametros)
+    finally:
+        conexion.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archivo', default=None, help='Archivo XLSX del cuestionario a cargar.')
+    parser.add_argument('--vieja', default=None, help='Base de datos antigua a cargar.')
+    parser.add_argument('--almacen', default=RUTA_ALMACEN, help='Archivo SQLite del almacén.')
+    parser.add_argument('--forzar', action='store_true', help='Volver a cargar los libros aunque no hayan cambiado.')
+    parser.add_argument('--documento', default=None, help='Buscar personas por documento.')
+    parser.add_argument('--nombre', default=None, help='Buscar personas por nombre (o su comienzo), sin importar tildes ni mayúsculas.')
+    args = parser.parse_args()
+
+    if args.archivo or args.vieja:
+        cargados = actualizar_almacen(args.archivo, args.vieja, args.almacen, args.forzar)
+        if not cargados:
+            print(f"-> El almacén '{args.almacen}' ya tiene la versión actual de los libros indicados.")
+
+    if args.documento is not None or args.nombre is not None:
+        try:
+            encontrados = buscar_personas(args.almacen, args.documento, args.nombre)
+        except ValueError as e:
+            print(e)
+        else:
+            if encontrados.empty:
+                print("No se encontraron personas con ese documento o nombre.")
+            else:
+                print(tabulate(encontrados.to_dict('list'), headers='keys', tablefmt='grid'))
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pandas as pd
+from .metricas import Fase
+
+# Directorio de la caché de libros ya leídos y tamaño máximo que puede ocupar en disco
+DIRECTORIO_CACHE = os.environ.get('ANALISIS_CACHE_DIR', os.path.join('.cache', 'excel'))
+TAMANO_MAXIMO_CACHE = int(os.environ.get('ANALISIS_CACHE_MAX_MB', '512')) * 1024 * 1024
+CACHE_ACTIVA = os.environ.get('ANALISIS_SIN_CACHE', '') == ''
+
+def _hash_contenido(ruta_archivo):
+    """Calcula el hash SHA-256 del contenido del archivo leyéndolo por bloques."""
+    with open(ruta_archivo, 'rb') as archivo:
+        return hashlib.file_digest(archivo, 'sha256').hexdigest()
+
+def huella_archivo(ruta_archivo):
+    """Identifica la versión actual del archivo por su tamaño, fecha de modificación y hash del contenido."""
+    info = os.stat(ruta_archivo)
+    return hashlib.sha1(f"{info.st_size}|{info.st_mtime_ns}|{_hash_contenido(ruta_archivo)}".encode('utf-8')).hexdigest()[:16]
+
+def _nombres_cache(ruta_archivo, opciones):
+    """
+    Devuelve el prefijo que identifica a la ruta (con sus opciones de lectura) y el
+    nombre completo de la entrada para la versión actual del archivo.
+    """
+    ruta_absoluta = os.path.abspath(ruta_archivo)
+    prefijo = hashlib.sha1(f"{ruta_absoluta}|{sorted(opciones.items())!r}".encode('utf-8')).hexdigest()[:16]
+    return prefijo, f"{prefijo}-{huella_archivo(ruta_archivo)}.pkl"
+
+def _aplicar_limite(directorio, conservar):
+    """Elimina las entradas menos usadas recientemente hasta respetar el tamaño máximo."""
+    entradas = []
+    for nombre in os.listdir(directorio):
+        if nombre.endswith('.pkl'):
+            info = os.stat(os.path.join(directorio, nombre))
+            entradas.append((info.st_mtime, info.st_size, nombre))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, nombre in sorted(entradas):
+        if total <= TAMANO_MAXIMO_CACHE:
+            break
+        if nombre != conservar:
+            os.remove(os.path.join(directorio, nombre))
+            total -= tamano
+
+def leer_con_cache(ruta_archivo, opciones, lector):
+    """
+    Devuelve el resultado de `lector()` para el archivo, consultando antes la caché local en disco.
+
+    Cada resultado se guarda como un archivo auxiliar identificado por la ruta, las
+    opciones de lectura, el tamaño, la fecha de modificación y el hash del contenido.
+    Si el archivo cambia se descartan las versiones anteriores de esa ruta, y el
+    directorio de caché se mantiene por debajo de TAMANO_MAXIMO_CACHE eliminando
+    las entradas usadas hace más tiempo.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX.
+        opciones (dict): Opciones que distinguen esta lectura de otras del mismo archivo.
+        lector (callable): Función sin argumentos que lee el archivo cuando no hay caché.
+
+    Returns:
+        object: El resultado de `lector()` (normalmente un DataFrame).
+    """
+    if not CACHE_ACTIVA:
+        return lector()
+
+    prefijo, nombre = _nombres_cache(ruta_archivo, opciones)
+    ruta_cache = os.path.join(DIRECTORIO_CACHE, nombre)
+
+    if os.path.exists(ruta_cache):
+        try:
+            resultado = pd.read_pickle(ruta_cache)
+            os.utime(ruta_cache)  # Marca la entrada como usada recientemente
+            return resultado
+        except Exception:
+            os.remove(ruta_cache)
+
+    resultado = lector()
+
+    try:
+        os.makedirs(DIRECTORIO_CACHE, exist_ok=True)
+        for anterior in os.listdir(DIRECTORIO_CACHE):
+            if anterior.startswith(prefijo + '-') and anterior != nombre:
+                os.remove(os.path.join(DIRECTORIO_CACHE, anterior))
+        ruta_temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+        pd.to_pickle(resultado, ruta_temporal)
+        os.replace(ruta_temporal, ruta_cache)
+        _aplicar_limite(DIRECTORIO_CACHE, nombre)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar la caché de '{ruta_archivo}': {e}")
+
+    return resultado
+
+def leer_excel(ruta_archivo, **opciones):
+    """
+    Lee un archivo XLSX con pandas.read_excel consultando antes la caché local en disco.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX.
+        **opciones: Argumentos adicionales para pandas.read_excel.
+
+    Returns:
+        pandas.DataFrame: El contenido de la hoja leída.
+    """
+    with Fase('lectura_excel', detalle=os.path.basename(ruta_archivo)) as fase:
+        df = leer_con_cache(ruta_archivo, opciones, lambda: pd.read_excel(ruta_archivo, **opciones))
+        fase.filas = len(df)
+    return df
+
+def limpiar_cache():
+    """Elimina todas las entradas de la caché de libros."""
+    if os.path.isdir(DIRECTORIO_CACHE):
+        for nombre in os.listdir(DIRECTORIO_CACHE):
+            os.remove(os.path.join(DIRECTORIO_CACHE, nombre))
@@ -0,0 +1,339 @@
+"""
+Detección de personas casi duplicadas mediante claves de bloqueo.
+
+detectar_personas_repetidas solo encuentra coincidencias exactas de nombre completo y
+documento, por lo que las tildes, los espacios dobles, los nombres en otro orden y los
+errores de digitación en el documento pasan desapercibidos. Comparar todos los pares de
+personas no es viable con censos grandes, así que cada persona se agrupa en bloques por
+varias claves y solo se comparan los candidatos que comparten algún bloque:
+
+* nombre: nombre completo sin tildes, en mayúsculas y con los espacios normalizados.
+* tokens: las palabras del nombre ordenadas alfabéticamente (nombres y apellidos intercambiados).
+* fonetica: las palabras ordenadas después de aplicar reglas fonéticas del español (V/B, Z/S, H muda...).
+* documento: el documento normalizado (mismo documento con nombres distintos).
+* documento_aproximado: el documento con un carácter eliminado junto a las iniciales fonéticas
+  del nombre; dos documentos a distancia de edición 1 comparten al menos una de estas claves.
+
+Dentro de cada bloque cada persona se compara solo con sus vecinas más cercanas por documento,
+de modo que los nombres muy frecuentes no generan un número cuadrático de pares. Cada par
+candidato recibe un puntaje entre 0 y 1 a partir de la similitud del nombre y del documento,
+y el reporte conserva los pares con puntaje mayor o igual al umbral.
+"""
+import argparse
+import json
+import os
+from difflib import SequenceMatcher
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .cache_excel import leer_excel
+from .esquema import aplicar_esquema
+from .lectura_por_lotes import leer_columnas_por_lotes
+from .metricas import medir_fase
+from .procesamiento import agregar_nombre_completo, resumir_personas
+
+COLUMNAS_NOMBRE = ['Cedula de jefe(a) de Familia', 'Documento', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido']
+
+COLUMNAS_REPORTE = ['Nombre Completo Persona A', 'Cedula Persona A', 'Nombre Completo Persona B', 'Cedula Persona B',
+                    'Similitud Nombre', 'Similitud Documento', 'Puntaje', 'Criterios']
+
+# Reglas fonéticas (expresión regular, reemplazo), aplicadas en orden sobre texto sin tildes
+REGLAS_FONETICAS = [
+    (r'CH', 'X'),
+    (r'LL', 'Y'),
+    (r'QU', 'K'),
+    (r'G(?=[EI])', 'J'),
+    (r'GU(?=[EI])', 'G'),
+    (r'C(?=[EI])', 'S'),
+    (r'C', 'K'),
+    (r'Z', 'S'),
+    (r'[VW]', 'B'),
+    (r'H', ''),
+    (r'Y\b', 'I'),
+    (r'([A-Z])\1+', r'\1')
+]
+
+PESO_NOMBRE = 0.6
+PESO_DOCUMENTO = 0.4
+
+def normalizar_nombres(nombres):
+    """Quita tildes y signos, pasa a mayúsculas y deja un solo espacio entre palabras ('nan' y 'None' se descartan)."""
+    normalizados = nombres.fillna('').astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.upper()
+    normalizados = normalizados.str.replace(r'\b(?:NAN|NONE)\b', ' ', regex=True).str.replace(r'[^A-Z]+', ' ', regex=True)
+    return normalizados.str.strip()
+
+def normalizar_documentos(documentos):
+    """Deja solo letras y dígitos del documento, sin el '.0' que agrega Excel a los números."""
+    normalizados = documentos.astype(object).fillna('').astype(str).str.upper().str.replace(r'\.0$', '', regex=True).str.replace(r'[^0-9A-Z]', '', regex=True)
+    return normalizados.where(~normalizados.isin(['NAN', 'NONE']), '')
+
+def ordenar_tokens(nombres):
+    """Ordena alfabéticamente las palabras de cada nombre."""
+    return pd.Series([' '.join(sorted(nombre.split())) for nombre in nombres], index=nombres.index, dtype=object)
+
+def clave_fonetica(nombres):
+    """
+    Aplica REGLAS_FONETICAS a nombres ya normalizados y ordena las palabras resultantes.
+
+    Las reglas se aplican una vez por palabra distinta, no por nombre: los censos repiten
+    pocas palabras muchas veces.
+    """
+    palabras = pd.Series(sorted({palabra for nombre in nombres for palabra in nombre.split()}), dtype=object)
+    foneticas = palabras
+    for patron, reemplazo in REGLAS_FONETICAS:
+        foneticas = foneticas.str.replace(patron, reemplazo, regex=True)
+    equivalencias = dict(zip(palabras, foneticas))
+    return pd.Series([' '.join(sorted(equivalencias[palabra] for palabra in nombre.split())) for nombre in nombres], index=nombres.index, dtype=object)
+
+def variantes_documento(documento):
+    """El documento y todas sus versiones con un carácter eliminado (vecindario de borrado)."""
+    return {documento} | {documento[:i] + documento[i + 1:] for i in range(len(documento))}
+
+def distancias_edicion(textos_a, textos_b):
+    """
+    Distancia de Damerau-Levenshtein restringida (inserción, borrado, sustitución y
+    transposición adyacente) entre cada par de textos.
+
+    La tabla de programación dinámica se recorre una vez para todos los pares a la vez,
+    con una columna por par, en lugar de un bucle de Python por cada comparación.
+
+    Args:
+        textos_a (list): Primeros textos de cada par.
+        textos_b (list): Segundos textos de cada par.
+
+    Returns:
+        numpy.ndarray: Distancia de cada par.
+    """
+    largos_a = np.array([len(texto) for texto in textos_a], dtype=np.int64)
+    largos_b = np.array([len(texto) for texto in textos_b], dtype=np.int64)
+    largo = int(max(largos_a.max(initial=0), largos_b.max(initial=0)))
+    if largo == 0:
+        return np.zeros(len(largos_a), dtype=np.int64)
+
+    # Cada texto como fila de códigos de carácter (rellena con ceros hasta el largo máximo)
+    a = np.array(textos_a, dtype=f'U{largo}').view(np.uint32).reshape(-1, largo).T
+    b = np.array(textos_b, dtype=f'U{largo}').view(np.uint32).reshape(-1, largo).T
+    columnas = np.arange(len(largos_a))
+
+    distancias = largos_b.copy()
+    anterior_previa, anterior = None, np.repeat(np.arange(largo + 1), len(largos_a)).reshape(largo + 1, -1)
+    for i in range(1, largo + 1):
+        actual = np.empty_like(anterior)
+        actual[0] = i
+        for j in range(1, largo + 1):
+            actual[j] = np.minimum(np.minimum(anterior[j], actual[j - 1]) + 1, anterior[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1:
+                transpuestos = (a[i - 1] == b[j - 2]) & (a[i - 2] == b[j - 1])
+                actual[j] = np.where(transpuestos, np.minimum(actual[j], anterior_previa[j - 2] + 1), actual[j])
+        terminan = largos_a == i
+        distancias[terminan] = actual[largos_b[terminan], columnas[terminan]]
+        anterior_previa, anterior = anterior, actual
+    return distancias
+
+def similitud_documentos(documentos_a, documentos_b):
+    """1 si los documentos son iguales, decreciente con la distancia de edición; 0 si falta alguno."""
+    distancias = distancias_edicion(documentos_a, documentos_b)
+    largos = np.array([max(len(a), len(b)) for a, b in zip(documentos_a, documentos_b)], dtype=np.float64)
+    vacios = np.array([not a or not b for a, b in zip(documentos_a, documentos_b)], dtype=bool)
+    similitudes = np.maximum(0.0, 1 - distancias / np.maximum(largos, 1))
+    similitudes[vacios] = 0.0
+    return similitudes
+
+def pares_por_bloque(ids, claves, orden, ventana):
+    """
+    Devuelve los pares (a, b) con a < b de los ids que comparten clave.
+
+    Dentro de cada bloque las personas se ordenan por `orden` (el documento normalizado) y
+    cada una se compara solo con las `ventana` siguientes (vecindario ordenado). En bloques
+    pequeños se obtienen todos los pares; en bloques grandes (nombres muy frecuentes) el
+    número de pares crece de forma lineal con el tamaño del bloque y no cuadrática.
+
+    Returns:
+        tuple: Arreglos de ids a y b.
+    """
+    bloques = pd.factorize(claves)[0]
+    posiciones = np.lexsort((ids, orden, bloques))
+    bloques, ids = bloques[posiciones], ids[posiciones]
+
+    pares_a, pares_b = [], []
+    for desplazamiento in range(1, ventana + 1):
+        mismo_bloque = (bloques[desplazamiento:] == bloques[:-desplazamiento]) & (ids[desplazamiento:] != ids[:-desplazamiento])
+        if not mismo_bloque.any():
+            break
+        a, b = ids[:-desplazamiento][mismo_bloque], ids[desplazamiento:][mismo_bloque]
+        pares_a.append(np.minimum(a, b))
+        pares_b.append(np.maximum(a, b))
+    if not pares_a:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    return np.concatenate(pares_a), np.concatenate(pares_b)
+
+def claves_de_bloqueo(personas):
+    """
+    Calcula las claves de bloqueo de cada persona.
+
+    Args:
+        personas (pandas.DataFrame): Una fila por persona con 'Nombre Completo Persona' y 'Documento'.
+
+    Returns:
+        tuple: DataFrame con las columnas normalizadas por persona y diccionario
+        criterio -> (ids, claves) con las claves de cada criterio.
+    """
+    ids = np.arange(len(personas))
+    documentos = normalizar_documentos(personas['Documento'].reset_index(drop=True))
+
+    # Las claves de nombre se calculan una vez por nombre distinto y se reparten con sus códigos
+    codigos, nombres_distintos = pd.factorize(personas['Nombre Completo Persona'].fillna('').astype(str))
+    nombres_distintos = normalizar_nombres(pd.Series(nombres_distintos, dtype=object))
+    foneticos_distintos = clave_fonetica(nombres_distintos)
+    iniciales_distintas = np.array([''.join(sorted(palabra[0] for palabra in fonetico.split())) for fonetico in foneticos_distintos], dtype=object)
+    nombres = pd.Series(nombres_distintos.to_numpy(dtype=object)[codigos], dtype=object)
+    tokens = pd.Series(ordenar_tokens(nombres_distintos).to_numpy()[codigos], dtype=object)
+    foneticos = pd.Series(foneticos_distintos.to_numpy()[codigos], dtype=object)
+    iniciales = iniciales_distintas[codigos]
+
+    con_nombre = (nombres != '').to_numpy()
+    con_documento = (documentos != '').to_numpy()
+
+    variantes = [(i, f"{variante}|{inicial}") for i, documento, inicial in zip(ids[con_documento], documentos[con_documento], iniciales[con_documento])
+                 for variante in variantes_documento(documento)]
+    ids_variantes, claves_variantes = zip(*variantes) if variantes else ((), ())
+
+    criterios = {
+        'nombre': (ids[con_nombre], nombres[con_nombre].to_numpy()),
+        'tokens': (ids[con_nombre], tokens[con_nombre].to_numpy()),
+        'fonetica': (ids[con_nombre], foneticos[con_nombre].to_numpy()),
+        'documento': (ids[con_documento], documentos[con_documento].to_numpy()),
+        'documento_aproximado': (np.array(ids_variantes, dtype=np.int64), np.array(claves_variantes, dtype=object))
+    }
+    normalizadas = pd.DataFrame({'tokens': tokens, 'fonetica': foneticos, 'documento': documentos})
+    return normalizadas, criterios
+
+def generar_pares_candidatos(personas, ventana=5):
+    """
+    Genera los pares candidatos a comparar a partir de las claves de bloqueo.
+
+    Returns:
+        tuple: DataFrame con las columnas 'id_a', 'id_b' y 'criterios' (claves compartidas)
+        y DataFrame de columnas normalizadas por persona.
+    """
+    normalizadas, criterios = claves_de_bloqueo(personas)
+    orden_documento = pd.factorize(normalizadas['documento'], sort=True)[0]
+    pares = []
+    for bit, (criterio, (ids, claves)) in enumerate(criterios.items()):
+        id_a, id_b = pares_por_bloque(ids, claves, orden_documento[ids], ventana)
+        pares.append(pd.DataFrame({'id_a': id_a, 'id_b': id_b, 'criterio': 1 << bit}))
+
+    # Cada criterio es un bit; la suma por par (sin repetidos) indica qué claves comparte
+    pares = pd.concat(pares, ignore_index=True).drop_duplicates()
+    candidatos = pares.groupby(['id_a', 'id_b'], sort=False)['criterio'].sum().reset_index(name='criterios')
+    nombres_criterios = list(criterios)
+    mascaras = candidatos['criterios'].unique().tolist()
+    textos = {mascara: ', '.join(nombre for bit, nombre in enumerate(nombres_criterios) if mascara & (1 << bit)) for mascara in mascaras}
+    candidatos['criterios'] = candidatos['criterios'].map(textos)
+    return candidatos, normalizadas
+
+@medir_fase('duplicados_aproximados', filas=len)
+def detectar_duplicados_aproximados(personas, umbral=0.85, ventana=5):
+    """
+    Detecta personas casi duplicadas comparando solo los candidatos de cada bloque.
+
+    Args:
+        personas (pandas.DataFrame): Resultado de resumir_personas (una fila por combinación
+            de nombre completo y documento).
+        umbral (float): Puntaje mínimo (0 a 1) para incluir un par en el reporte.
+        ventana (int): Vecinos con los que se compara cada persona dentro de un bloque (ver pares_por_bloque).
+
+    Returns:
+        pandas.DataFrame: Pares con COLUMNAS_REPORTE, ordenados de mayor a menor puntaje.
+    """
+    if personas.empty:
+        return pd.DataFrame(columns=COLUMNAS_REPORTE)
+
+    candidatos, normalizadas = generar_pares_candidatos(personas, ventana)
+    tokens = normalizadas['tokens'].tolist()
+    foneticos = normalizadas['fonetica'].tolist()
+    documentos = normalizadas['documento'].tolist()
+    pares = list(zip(candidatos['id_a'].tolist(), candidatos['id_b'].tolist()))
+
+    similitud_documento = similitud_documentos([documentos[a] for a, _ in pares], [documentos[b] for _, b in pares])
+
+    # La similitud del nombre promedia la escritura y la pronunciación (palabras ordenadas en
+    # ambos casos); solo se calcula para los pares que aún pueden alcanzar el umbral
+    alcanzables = PESO_NOMBRE + PESO_DOCUMENTO * similitud_documento >= umbral
+    similitud_nombre = np.zeros(len(pares))
+    similitud_nombre[alcanzables] = [(SequenceMatcher(None, tokens[a], tokens[b]).ratio() + SequenceMatcher(None, foneticos[a], foneticos[b]).ratio()) / 2
+                                     for (a, b), alcanzable in zip(pares, alcanzables) if alcanzable]
+    puntaje = PESO_NOMBRE * similitud_nombre + PESO_DOCUMENTO * similitud_documento
+
+    seleccion = puntaje >= umbral
+    candidatos = candidatos[seleccion]
+    nombres = personas['Nombre Completo Persona'].to_numpy()
+    cedulas = personas['Documento'].astype(str).str.replace(r'\.0$', '', regex=True).to_numpy()
+
+    duplicados = pd.DataFrame({
+        'Nombre Completo Persona A': nombres[candidatos['id_a'].to_numpy()],
+        'Cedula Persona A': cedulas[candidatos['id_a'].to_numpy()],
+        'Nombre Completo Persona B': nombres[candidatos['id_b'].to_numpy()],
+        'Cedula Persona B': cedulas[candidatos['id_b'].to_numpy()],
+        'Similitud Nombre': similitud_nombre[seleccion].round(3),
+        'Similitud Documento': similitud_documento[seleccion].round(3),
+        'Puntaje': puntaje[seleccion].round(3),
+        'Criterios': candidatos['criterios'].to_numpy()
+    })
+    return duplicados.sort_values('Puntaje', ascending=False, kind='stable', ignore_index=True)
+
+def leer_personas(ruta_archivo, tamano_lote=None):
+    """Lee el cuestionario y lo reduce a una fila por combinación de nombre completo y documento."""
+    if tamano_lote:
+        df = leer_columnas_por_lotes(ruta_archivo, COLUMNAS_NOMBRE, tamano_lote)
+    else:
+        df = leer_excel(ruta_archivo)
+        df.columns = df.columns.str.strip()
+    return resumir_personas(agregar_nombre_completo(aplicar_esquema(df))).reset_index(drop=True)
+
+def generar_reporte_duplicados_aproximados(ruta_archivo_xlsx, ruta_base='reportes/reportes_duplicados', tamano_lote=None, umbral=0.85):
+    """
+    Genera el reporte de personas casi duplicadas en TXT y JSON.
+
+    Returns:
+        pandas.DataFrame: Los pares incluidos en el reporte.
+    """
+    personas = leer_personas(ruta_archivo_xlsx, tamano_lote)
+    duplicados = detectar_duplicados_aproximados(personas, umbral)
+
+    os.makedirs(ruta_base, exist_ok=True)
+    nombre_archivo_txt = os.path.join(ruta_base, 'reporte_duplicados_aproximados.txt')
+    with open(nombre_archivo_txt, 'w', encoding='utf-8') as archivo:
+        archivo.write("=" * 20 + " REPORTE DE PERSONAS CASI DUPLICADAS " + "=" * 20 + "\n\n")
+        archivo.write("Este reporte muestra pares de personas con nombre y documento muy parecidos (tildes, espacios, orden de los nombres o errores de digitación), ordenados de mayor a menor puntaje.\n\n")
+        archivo.write(f"Se encontraron {len(duplicados)} pares con puntaje mayor o igual a {umbral} entre {len(personas)} personas distintas.\n\n")
+        if not duplicados.empty:
+            archivo.write(tabulate(duplicados, headers='keys', tablefmt='grid', showindex=False))
+        else:
+            archivo.write("No se encontraron personas casi duplicadas en el registro.\n")
+
+    nombre_archivo_json = os.path.join(ruta_base, 'reporte_duplicados_aproximados.json')
+    reporte = {
+        "titulo": "REPORTE DE PERSONAS CASI DUPLICADAS",
+        "umbral": umbral,
+        "total_pares": len(duplicados),
+        "total_personas_distintas": len(personas),
+        "pares": duplicados.set_axis(
+            ["nombre_completo_persona_a", "cedula_persona_a", "nombre_completo_persona_b", "cedula_persona_b",
+             "similitud_nombre", "similitud_documento", "puntaje", "criterios"], axis=1
+        ).to_dict(orient='records')
+    }
+    with open(nombre_archivo_json, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+
+    print(f"El reporte de personas casi duplicadas ha sido guardado en '{nombre_archivo_txt}' y '{nombre_archivo_json}'.")
+    return duplicados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archivo', default='Archivo/Cuestionario Cabildo TATACHIO MIRABEL (Respuestas).xlsx', help='Archivo XLSX del cuestionario.')
+    parser.add_argument('--umbral', type=float, default=0.85, help='Puntaje mínimo (0 a 1) para incluir un par.')
+    parser.add_argument('--lote', type=int, default=None, help='Leer el archivo por lotes de este número de filas.')
+    args = parser.parse_args()
+
+    generar_reporte_duplicados_aproximados(args.archivo, tamano_lote=args.lote, umbral=args.umbral)
@@ -0,0 +1,131 @@
+"""
+Tipos compactos para el censo en memoria.
+
+Al cargar una hoja se aplica una sola vez un esquema por columna:
+
+* Documentos (documento de la persona y cédula del jefe): enteros (Int64, con faltantes)
+  cuando todos los valores son números de documento, o texto canónico en otro caso. Así
+  astype(str) da siempre el mismo texto ('1234', nunca '1234.0' ni ' 1234') venga el
+  libro de donde venga, y una columna de enteros ocupa 9 bytes por fila en lugar de un
+  objeto de texto.
+* Campos con pocos valores distintos (parentesco, sexo, estado civil, escolaridad, tipo de
+  identificación): categóricos, un código entero por fila y cada texto guardado una vez.
+* Nombres y apellidos: texto respaldado por Arrow si pyarrow está instalado; si no, las
+  filas con el mismo nombre comparten un único objeto de texto.
+
+Las columnas que no aparecen en el esquema se dejan como se leyeron.
+
+Para las búsquedas y cruces por documento, claves_documento interna los documentos de una
+o varias columnas (incluso de libros distintos) en un mismo espacio de claves enteras
+densas: cada documento se normaliza una sola vez y los jefes, las familias y los cruces
+entre bases se calculan comparando y agrupando arreglos de enteros.
+"""
+import unicodedata
+import numpy as np
+import pandas as pd
+
+COLUMNAS_DOCUMENTO = {'DOCUMENTO', 'CEDULA DE JEFE(A) DE FAMILIA', 'NUMERO DOCUMENTO'}
+COLUMNAS_CATEGORICAS = {'PARENTESCO', 'SEXO', 'GENERO', 'ESTADO CIVIL', 'ESCOLARIDAD', 'TIPO IDENTIFICACION', 'TIPO DE DOCUMENTO'}
+COLUMNAS_NOMBRE = {'PRIMER NOMBRE', 'SEGUNDO NOMBRE', 'PRIMER APELLIDO', 'SEGUNDO APELLIDO', 'NOMBRE', 'NOMBRES', 'APELLIDOS'}
+
+def _clave_columna(nombre):
+    """Nombre de columna en mayúsculas, sin tildes ni espacios sobrantes, para buscarlo en el esquema."""
+    sin_tildes = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_tildes.upper().split())
+
+def normalizar_documento(serie):
+    """
+    Convierte una columna de documentos a su forma canónica.
+
+    Los enteros se dejan como están, los decimales enteros (1234.0) y los textos numéricos
+    (' 1.234.567', '1234-5') pasan a Int64 sin separadores, y si algún valor no es un número
+    de documento (letras, ceros a la izquierda) la columna queda como texto sin separadores
+    ni '.0' final. Las celdas vacías (y los textos 'nan' o 'None') quedan como faltantes.
+    """
+    if pd.api.types.is_integer_dtype(serie):
+        return serie
+    if pd.api.types.is_float_dtype(serie):
+        if (serie.dropna() % 1 == 0).all():
+            return serie.astype('Int64')
+        return serie.astype(str).mask(serie.isna())
+    texto = serie.astype(str).str.strip().str.replace(r'\.0$', '', regex=True).str.replace(r'[.\s-]', '', regex=True)
+    texto = texto.mask(texto.str.upper().isin(['', 'NAN', 'NONE']))
+    numericos = texto.dropna()
+    if numericos.str.fullmatch(r'[1-9]\d{0,17}').all():
+        return pd.to_numeric(texto).astype('Int64')
+    return texto
+
+def claves_documento(*columnas):
+    """
+    Interna los documentos de una o varias columnas en un mismo espacio de claves enteras.
+
+    Args:
+        *columnas (pandas.Series): Columnas de documentos (de uno o varios libros).
+
+    Returns:
+        tuple: Una lista con un arreglo de claves (numpy int32, -1 para documentos vacíos) por
+        cada columna, en el mismo orden, y un pandas.Index con el texto canónico de cada clave.
+        Las claves se asignan en orden de primera aparición recorriendo las columnas en orden.
+    """
+    normalizadas = [normalizar_documento(columna) for columna in columnas]
+    if all(pd.api.types.is_integer_dtype(columna) for columna in normalizadas):
+        # Todos los documentos son números: se internan los enteros sin pasarlos a texto
+        codigos, unicos = pd.factorize(pd.concat([columna.astype('Int64') for columna in normalizadas], ignore_index=True))
+        textos = pd.Index(unicos.astype(str), dtype=object)
+    else:
+        codigos, unicos = pd.factorize(pd.concat([columna.astype(str).mask(columna.isna()) for columna in normalizadas], ignore_index=True))
+        textos = pd.Index(unicos, dtype=object)
+    codigos = codigos.astype(np.int32 if len(textos) < 2**31 else np.int64)
+    limites = np.cumsum([len(columna) for columna in columnas])[:-1]
+    return np.split(codigos, limites), textos
+
+def texto_documento(serie):
+    """
+    Devuelve el texto canónico de cada documento (el mismo que asigna claves_documento).
+
+    Las celdas vacías quedan como NaN con cualquier versión de pandas (pandas 2 convierte
+    los faltantes de Int64 en el texto '<NA>' con astype(str)).
+    """
+    normalizada = normalizar_documento(serie)
+    return normalizada.astype(str).mask(normalizada.isna()).astype(object)
+
+def textos_de_claves(claves, textos):
+    """Devuelve el texto canónico de cada clave como arreglo de objetos (NaN para las claves -1)."""
+    valores = textos.to_numpy(dtype=object)[claves] if len(textos) else np.full(len(claves), np.nan, dtype=object)
+    valores[claves < 0] = np.nan
+    return valores
+
+def texto_compartido(serie):
+    """
+    Devuelve la columna de texto con un solo objeto por valor distinto.
+
+    Con pyarrow (dtype 'str' respaldado por Arrow) los textos ya se guardan en un búfer
+    contiguo y la columna se devuelve sin cambios.
+    """
+    if getattr(serie.dtype, 'storage', None) == 'pyarrow':
+        return serie
+    codigos, unicos = pd.factorize(serie)
+    # Las celdas vacías (código -1) toman el NaN agregado al final, también si toda la columna está vacía
+    valores = np.append(np.asarray(unicos, dtype=object), np.nan)[codigos]
+    return pd.Series(valores, index=serie.index, dtype=serie.dtype, name=serie.name)
+
+def aplicar_esquema(df):
+    """
+    Asigna los tipos compactos a las columnas conocidas del DataFrame (lo modifica y lo devuelve).
+
+    Args:
+        df (pandas.DataFrame): Hoja recién leída (cuestionario o base de datos antigua).
+
+    Returns:
+        pandas.DataFrame: El mismo DataFrame con documentos normalizados, campos categóricos
+        y nombres compartidos.
+    """
+    for columna in df.columns:
+        clave = _clave_columna(columna)
+        if clave in COLUMNAS_DOCUMENTO:
+            df[columna] = normalizar_documento(df[columna])
+        elif clave in COLUMNAS_CATEGORICAS:
+            df[columna] = df[columna].astype('category')
+        elif clave in COLUMNAS_NOMBRE:
+            df[columna] = texto_compartido(df[columna])
+    return df
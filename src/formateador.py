@@ -1,9 +1,13 @@
 import os
+import time
 import pandas as pd
-from openpyxl import load_workbook
+from copy import copy
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment
 from datetime import datetime
-import shutil
+from .cache_excel import leer_con_cache
+from .metricas import Fase, medir_fase
 
 # Tipos de datos y mapeos oficiales del Ministerio del Interior
 TIPOS_ESPERADOS = {
@@ -55,22 +59,71 @@ TIPOS_ESPERADOS = {
     'USUARIO': {'tipo': 'mayusculas', 'mapeo': None}
 }
 
+PALABRAS_CLAVE_ENCABEZADOS = ['VIGENCIA', 'RESGUARDO', 'COMUNIDAD', 'FAMILIA', 'IDENTIFICACION', 'DOCUMENTO']
+
+def detectar_fila_encabezados(filas):
+    """Devuelve la fila (empezando en 1) con al menos 3 palabras clave del Ministerio, o -1."""
+    for i, fila in enumerate(filas):
+        cols = [str(c).upper() for c in fila if c is not None]
+        coincidencias = sum(1 for kw in PALABRAS_CLAVE_ENCABEZADOS if any(kw in c for c in cols))
+        if coincidencias >= 3:
+            return i + 1
+    return -1
+
+def _leer_hoja_con_encabezados(ruta_archivo, filas_busqueda, solo_encabezados):
+    """Abre el libro una sola vez, detecta los encabezados en memoria y lee la hoja desde esa fila."""
+    with pd.ExcelFile(ruta_archivo, engine='openpyxl') as libro:
+        hoja = libro.book.worksheets[0]
+        fila = detectar_fila_encabezados(hoja.iter_rows(max_row=filas_busqueda, values_only=True))
+        if fila == -1:
+            return -1, None
+        df = libro.parse(header=fila - 1, nrows=0 if solo_encabezados else None)
+    df.columns = df.columns.astype(str).str.strip()
+    return fila, df
+
+def leer_con_encabezados(ruta_archivo, solo_encabezados=False, filas_busqueda=15):
+    """
+    Detecta la fila de encabezados y lee la primera hoja abriendo el archivo una sola vez.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX.
+        solo_encabezados (bool): Si es True solo se leen los encabezados (DataFrame sin filas).
+        filas_busqueda (int): Número de filas iniciales donde se buscan los encabezados.
+
+    Returns:
+        tuple: (fila de encabezados empezando en 1, DataFrame con los nombres de columna sin
+        espacios sobrantes); (-1, None) si no se detectan encabezados o el archivo no se puede leer.
+    """
+    opciones = {'solo_encabezados': solo_encabezados, 'filas_busqueda': filas_busqueda}
+    try:
+        with Fase('lectura_excel', detalle=os.path.basename(ruta_archivo)) as fase:
+            fila, df = leer_con_cache(ruta_archivo, opciones,
+                                      lambda: _leer_hoja_con_encabezados(ruta_archivo, filas_busqueda, solo_encabezados))
+            fase.filas = 0 if df is None else len(df)
+        return fila, df
+    except Exception:
+        return -1, None
+
 def encontrar_fila_encabezados(ruta_archivo):
     """Escanea las primeras filas para encontrar los encabezados del Ministerio."""
-    keywords = ['VIGENCIA', 'RESGUARDO', 'COMUNIDAD', 'FAMILIA', 'IDENTIFICACION', 'DOCUMENTO']
-    try:
-        for i in range(15):
-            try:
-                df_temp = pd.read_excel(ruta_archivo, header=i, nrows=1)
-                cols = [str(c).upper() for c in df_temp.columns]
-                coincidencias = sum(1 for kw in keywords if any(kw in c for c in cols))
-                if coincidencias >= 3:
-                    return i + 1
-            except:
-                continue
-    except:
-        pass
-    return -1
+    return leer_con_encabezados(ruta_archivo, solo_encabezados=True)[0]
+
+_TABLAS_CODIGO = {}
+
+def tabla_codigo(mapeo):
+    """Devuelve (y guarda) las claves del mapeo en mayúsculas junto a su código, en el orden del mapeo."""
+    tabla = _TABLAS_CODIGO.get(id(mapeo))
+    if tabla is None:
+        tabla = _TABLAS_CODIGO[id(mapeo)] = [(k.upper(), v) for k, v in mapeo.items()]
+    return tabla
+
+def codificar(valor_str, tabla):
+    """Devuelve el código de la primera clave contenida en el valor, o el valor original si ninguna coincide."""
+    val_upper = valor_str.upper()
+    for clave, codigo in tabla:
+        if clave in val_upper:
+            return codigo
+    return valor_str
 
 def limpiar_valor(valor, tipo_info):
     """Limpia y formatea un valor según el tipo esperado."""
@@ -96,6 +149,9 @@ def limpiar_valor(valor, tipo_info):
             return valor_str.upper()
         
         if tipo == 'texto_limpio':
+            # El '.0' de un documento leído como decimal se quita antes que los puntos (1234.0 -> 1234, no 12340)
+            if valor_str.endswith('.0'):
+                valor_str = valor_str[:-2]
             return valor_str.replace('.', '').replace(' ', '').replace('-', '')
         
         if tipo == 'telefono':
@@ -109,12 +165,7 @@ def limpiar_valor(valor, tipo_info):
         
         if tipo == 'codigo':
             if mapeo:
-                val_upper = valor_str.upper()
-                for k, v in mapeo.items():
-                    if k.upper() == val_upper or k.upper() in val_upper.upper():
-                        return v
-                if valor_str in mapeo.values():
-                    return valor_str
+                return codificar(valor_str, tabla_codigo(mapeo))
             return valor_str
         
         if tipo == 'fecha':
@@ -134,12 +185,45 @@ def limpiar_valor(valor, tipo_info):
     except:
         return valor_str
 
-def obtener_headers(ruta_archivo, fila_header):
-    """Obtiene los encabezados de un archivo excel."""
-    df = pd.read_excel(ruta_archivo, header=fila_header-1)
-    df.columns = df.columns.astype(str).str.strip().str.upper()
-    return df
+def transformar_columna(serie, tipo_info):
+    """
+    Equivalente vectorizado de aplicar limpiar_valor a cada celda de la columna.
+
+    Los tipos de texto usan operaciones del accesor .str, las fechas una sola llamada
+    a pd.to_datetime, y los códigos y números se calculan una vez por valor distinto
+    (tabla de búsqueda) y se asignan a toda la columna.
+    """
+    tipo = tipo_info['tipo']
+    mapeo = tipo_info.get('mapeo')
+
+    vacios = serie.isna()
+    texto = serie.astype(object).where(~vacios, '').map(str).str.strip()
+    vacios |= texto.str.upper().isin(['NAN', 'NONE', ''])
+    valores = texto[~vacios]
+
+    if tipo == 'mayusculas':
+        valores = valores.str.upper()
+    elif tipo == 'texto_limpio':
+        valores = valores.str.replace(r'\.0$', '', regex=True).str.replace('.', '', regex=False).str.replace(' ', '', regex=False).str.replace('-', '', regex=False)
+    elif tipo == 'telefono':
+        valores = valores.str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+    elif tipo == 'codigo' and mapeo:
+        tabla = tabla_codigo(mapeo)
+        valores = valores.map({valor: codificar(valor, tabla) for valor in valores.unique()})
+    elif tipo in ('año', 'numero'):
+        valores = valores.map({valor: limpiar_valor(valor, tipo_info) for valor in valores.unique()})
+    elif tipo == 'fecha':
+        try:
+            fechas = pd.to_datetime(serie[~vacios], dayfirst=True, format='mixed', errors='coerce')
+            valores = fechas.dt.strftime('%d/%m/%Y').where(fechas.notna(), valores)
+        except Exception:
+            valores = serie[~vacios].map(lambda x: limpiar_valor(x, tipo_info))
 
+    resultado = pd.Series('', index=serie.index, dtype=object)
+    resultado[~vacios] = valores.astype(object)
+    return resultado
+
+@medir_fase('formateo_validacion')
 def validar_archivo(ruta_origen, ruta_referencia):
     """Valida que el archivo origen sea compatible con el formato de referencia."""
     print("=" * 60)
@@ -147,29 +231,27 @@ def validar_archivo(ruta_origen, ruta_referencia):
     print("=" * 60)
     
     if not os.path.exists(ruta_origen):
-        return False, f"Error: El archivo origen '{ruta_origen}' no fue encontrado.", None, None
+        return False, f"Error: El archivo origen '{ruta_origen}' no fue encontrado.", None, None, None
     
     if not os.path.exists(ruta_referencia):
-        return False, f"Error: El archivo de referencia '{ruta_referencia}' no fue encontrado.", None, None
+        return False, f"Error: El archivo de referencia '{ruta_referencia}' no fue encontrado.", None, None, None
     
-    # Detectar fila de encabezados
-    fila_origen = encontrar_fila_encabezados(ruta_origen)
-    fila_ref = encontrar_fila_encabezados(ruta_referencia)
+    # Detectar fila de encabezados y leer cada archivo en la misma apertura
+    fila_origen, df_datos = leer_con_encabezados(ruta_origen)
+    fila_ref, df_ref = leer_con_encabezados(ruta_referencia, solo_encabezados=True)
     
     if fila_origen == -1:
-        return False, "Error: No se detectaron encabezados validos en el archivo origen.", None, None
+        return False, "Error: No se detectaron encabezados validos en el archivo origen.", None, None, None
     
     if fila_ref == -1:
-        return False, "Error: No se detectaron encabezados validos en el archivo de referencia.", None, None
+        return False, "Error: No se detectaron encabezados validos en el archivo de referencia.", None, None, None
     
     print(f"-> Encabezados detectados en origen: Fila {fila_origen}")
     print(f"-> Encabezados detectados en referencia: Fila {fila_ref}")
     
-    # Leer encabezados
-    df_origen = obtener_headers(ruta_origen, fila_origen)
-    df_ref = obtener_headers(ruta_referencia, fila_ref)
-    
-    headers_ref = df_ref.columns.tolist()
+    # Encabezados en mayúsculas para la comparación
+    headers_origen = df_datos.columns.str.upper().tolist()
+    headers_ref = df_ref.columns.str.upper().tolist()
     
     print(f"\n-> Headers del archivo de referencia ({len(headers_ref)}):")
     for h in headers_ref:
@@ -182,7 +264,7 @@ def validar_archivo(ruta_origen, ruta_referencia):
         encontrado = False
         header_ref_upper = header_ref.upper()
         
-        for col_origen in df_origen.columns:
+        for col_origen in headers_origen:
             col_origen_upper = col_origen.upper()
             if header_ref_upper == col_origen_upper or \
                header_ref_upper in col_origen_upper or \
@@ -197,15 +279,10 @@ def validar_archivo(ruta_origen, ruta_referencia):
             print(f"   [OK] '{header_ref}'")
     
     if faltantes:
-        return False, f"Error: El archivo origen no es compatible. Faltan columnas: {', '.join(faltantes)}", None, None
-    
-    # Leer datos
-    df_datos = pd.read_excel(ruta_origen, header=fila_origen-1)
-    df_datos.columns = df_datos.columns.astype(str).str.strip()
+        return False, f"Error: El archivo origen no es compatible. Faltan columnas: {', '.join(faltantes)}", None, None, None
     
     # Limpiar filas vacías
     df_datos = df_datos.dropna(how='all')
-    df_datos = df_datos[df_datos.apply(lambda row: row.notna().any(), axis=1)]
     
     print(f"\n-> Registros detectados: {len(df_datos)}")
     
@@ -221,12 +298,129 @@ def validar_archivo(ruta_origen, ruta_referencia):
                 mapeo_columnas[header_ref] = col_origen
                 break
     
-    return True, "OK", df_datos, mapeo_columnas
+    return True, "OK", df_datos, mapeo_columnas, fila_ref
+
+def _estilos_datos(ws, fila, num_columnas, alineacion):
+    """Estilo de cada columna de datos: el de la primera fila de datos de la plantilla con la alineación indicada."""
+    estilos = []
+    for col in range(1, num_columnas + 1):
+        celda = ws.cell(row=fila, column=col)
+        celda.alignment = alineacion
+        estilos.append(celda._style)
+    return estilos
+
+@medir_fase('inyeccion_plantilla', filas=len)
+def inyectar_en_plantilla(df_formateado, ruta_referencia, ruta_destino, fila_ref):
+    """
+    Escribe los datos en una copia de la plantilla cargada en memoria.
+
+    Solo se limpian las filas sobrantes de la plantilla (las que quedan por debajo de los
+    datos nuevos), y el estilo de cada columna se calcula una vez y se copia a sus celdas.
+
+    Args:
+        df_formateado (pandas.DataFrame): Datos ya transformados, en el orden de TIPOS_ESPERADOS.
+        ruta_referencia (str): La ruta a la plantilla del Ministerio.
+        ruta_destino (str): La ruta del archivo de salida.
+        fila_ref (int): Fila (empezando en 1) de los encabezados de la plantilla.
+    """
+    fila_inicio_datos = fila_ref + 1
+    num_filas, num_columnas = df_formateado.shape
+
+    wb = load_workbook(ruta_referencia)
+    ws = wb.active
 
-def ejecutar_formateo(ruta_origen, ruta_destino, ruta_referencia):
-    """Ejecuta el proceso completo de formateo."""
+    # Limpiar solo las filas de la plantilla que no se van a sobrescribir
+    for fila in ws.iter_rows(min_row=fila_inicio_datos + num_filas, max_row=ws.max_row, max_col=num_columnas):
+        for celda in fila:
+            if celda.value is not None:
+                celda.value = None
+
+    estilos = _estilos_datos(ws, fila_inicio_datos, num_columnas, Alignment(horizontal='left', vertical='center'))
+    for r_idx, row_data in enumerate(df_formateado.itertuples(index=False), start=fila_inicio_datos):
+        for c_idx, value in enumerate(row_data, start=1):
+            celda = ws.cell(row=r_idx, column=c_idx, value=value)
+            celda._style = copy(estilos[c_idx - 1])
+
+    wb.save(ruta_destino)
+    wb.close()
+
+def _copiar_estilo(origen, destino):
+    """Copia el formato de una celda de la plantilla a una celda de otro libro."""
+    destino.font = copy(origen.font)
+    destino.fill = copy(origen.fill)
+    destino.border = copy(origen.border)
+    destino.alignment = copy(origen.alignment)
+    destino.protection = copy(origen.protection)
+    destino.number_format = origen.number_format
+
+@medir_fase('inyeccion_plantilla_streaming', filas=len)
+def inyectar_en_plantilla_streaming(df_formateado, ruta_referencia, ruta_destino, fila_ref):
+    """
+    Escribe la salida en modo de solo escritura de openpyxl, fila a fila.
+
+    La plantilla se abre una sola vez: de ella se copian las filas de encabezado (valores,
+    estilos, celdas combinadas, alturas de fila y anchos de columna) y el estilo de cada
+    columna de datos (el de su primera fila de datos, como en inyectar_en_plantilla), y a
+    continuación se agregan los datos sin mantener la hoja completa en memoria. Las filas
+    de la plantilla posteriores a los encabezados no se conservan.
+
+    Args:
+        df_formateado (pandas.DataFrame): Datos ya transformados, en el orden de TIPOS_ESPERADOS.
+        ruta_referencia (str): La ruta a la plantilla del Ministerio.
+        ruta_destino (str): La ruta del archivo de salida.
+        fila_ref (int): Fila (empezando en 1) de los encabezados de la plantilla.
+    """
+    plantilla = load_workbook(ruta_referencia)
+    ws_plantilla = plantilla.active
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(ws_plantilla.title)
+
+    for letra, dimension in ws_plantilla.column_dimensions.items():
+        if dimension.width:
+            ws.column_dimensions[letra].width = dimension.width
+    for rango in ws_plantilla.merged_cells.ranges:
+        if rango.max_row <= fila_ref:
+            ws.merged_cells.add(rango.coord)
+    ws.freeze_panes = ws_plantilla.freeze_panes
+
+    # Filas de encabezado de la plantilla con su formato
+    for fila in ws_plantilla.iter_rows(min_row=1, max_row=fila_ref):
+        celdas = []
+        for origen in fila:
+            celda = WriteOnlyCell(ws, value=origen.value)
+            if origen.has_style:
+                _copiar_estilo(origen, celda)
+            celdas.append(celda)
+        altura = ws_plantilla.row_dimensions[fila[0].row].height
+        if altura:
+            ws.row_dimensions[fila[0].row].height = altura
+        ws.append(celdas)
+
+    # Estilo de cada columna de datos, compartido por todas sus celdas
+    estilos = []
+    for col in range(1, df_formateado.shape[1] + 1):
+        estilo = WriteOnlyCell(ws)
+        _copiar_estilo(ws_plantilla.cell(row=fila_ref + 1, column=col), estilo)
+        estilo.alignment = Alignment(horizontal='left', vertical='center')
+        estilos.append(estilo._style)
+    plantilla.close()
+
+    for row_data in df_formateado.itertuples(index=False):
+        celdas = []
+        for value, estilo in zip(row_data, estilos):
+            celda = WriteOnlyCell(ws, value=value)
+            celda._style = estilo
+            celdas.append(celda)
+        ws.append(celdas)
+
+    wb.save(ruta_destino)
+
+@medir_fase('formateo')
+def ejecutar_formateo(ruta_origen, ruta_destino, ruta_referencia, streaming=False):
+    """Ejecuta el proceso completo de formateo (streaming=True escribe la salida en modo de solo escritura)."""
     # 1. Validar
-    es_compatible, mensaje, df_datos, mapeo_col = validar_archivo(ruta_origen, ruta_referencia)
+    es_compatible, mensaje, df_datos, mapeo_col, fila_ref = validar_archivo(ruta_origen, ruta_referencia)
     
     if not es_compatible:
         print(f"\n[MENSAJE] {mensaje}")
@@ -246,7 +440,8 @@ def ejecutar_formateo(ruta_origen, ruta_destino, ruta_referencia):
         
         if col_origen and col_origen in df_datos.columns:
             print(f"-> Transformando '{col_ref}' desde '{col_origen}'...")
-            valores = df_datos[col_origen].apply(lambda x: limpiar_valor(x, tipo_info))
+            with Fase('transformacion_columna', num_filas, col_ref):
+                valores = transformar_columna(df_datos[col_origen], tipo_info)
             df_formateado[col_ref] = valores.values  # Usar .values para obtener el array
         else:
             print(f"-> Valor por defecto para '{col_ref}'...")
@@ -274,37 +469,16 @@ def ejecutar_formateo(ruta_origen, ruta_destino, ruta_referencia):
     print("FASE 3: INYECCION EN PLANTILLA")
     print("=" * 60)
     
-    # Usar shutil para copiar la referencia como base
-    shutil.copy2(ruta_referencia, ruta_destino)
-    print(f"-> Creada copia de referencia: {os.path.basename(ruta_destino)}")
-    
-    # Encontrar fila de datos en referencia
-    fila_ref = encontrar_fila_encabezados(ruta_referencia)
+    # La fila de encabezados de la referencia ya se detectó en la fase 1
     # La fila de datos empieza en la siguiente fila después de los encabezados
-    fila_inicio_datos = fila_ref + 1
-    
-    print(f"-> Encabezados en fila {fila_ref}, datos comienzan en fila {fila_inicio_datos + 1}")
-    
-    # Cargar el workbook con openpyxl para escribir datos
-    wb = load_workbook(ruta_destino)
-    ws = wb.active
-    
-    # Primero, limpiar SOLO las filas de datos (desde fila_inicio_datos hasta el final)
-    # NO tocar las filas de encabezados
-    filas_totales = ws.max_row if ws.max_row else 1000
-    for row in range(fila_inicio_datos, filas_totales + 1):
-        for col in range(1, 19):
-            ws.cell(row=row, column=col, value=None)
-    
-    # Escribir los nuevos datos
-    for r_idx, row_data in enumerate(df_formateado.values, start=fila_inicio_datos):
-        for c_idx, value in enumerate(row_data, start=1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            # Aplicar alineación izquierda por defecto para mantener consistencia
-            cell.alignment = Alignment(horizontal='left', vertical='center')
-    
-    wb.save(ruta_destino)
-    wb.close()
+    print(f"-> Encabezados en fila {fila_ref}, datos comienzan en fila {fila_ref + 1}")
+
+    inicio = time.perf_counter()
+    if streaming:
+        inyectar_en_plantilla_streaming(df_formateado, ruta_referencia, ruta_destino, fila_ref)
+    else:
+        inyectar_en_plantilla(df_formateado, ruta_referencia, ruta_destino, fila_ref)
+    print(f"-> Plantilla escrita en {time.perf_counter() - inicio:.2f} s ({'streaming' if streaming else 'en memoria'})")
     
     print(f"\n" + "=" * 60)
     print("[OK] PROCESO COMPLETADO CON EXITO")
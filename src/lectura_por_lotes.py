@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+from openpyxl import load_workbook
+from .metricas import Fase
+
+def leer_excel_por_lotes(ruta_archivo, tamano_lote=5000, fila_encabezado=1, columnas=None):
+    """
+    Lee un archivo XLSX fila a fila con el modo de solo lectura de openpyxl y
+    entrega DataFrames de como máximo `tamano_lote` filas.
+
+    A diferencia de pandas.read_excel, nunca se carga la hoja completa en memoria:
+    el consumo máximo depende del tamaño del lote. Los valores se entregan tal como
+    los guarda Excel (columnas de tipo object), sin convertir enteros a float.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX.
+        tamano_lote (int): Número máximo de filas por lote.
+        fila_encabezado (int): Fila (empezando en 1) donde están los encabezados.
+        columnas (list): Encabezados a conservar; None conserva todos.
+
+    Yields:
+        pandas.DataFrame: Lotes consecutivos de la hoja activa, con índice global de fila.
+    """
+    wb = load_workbook(ruta_archivo, read_only=True, data_only=True)
+    try:
+        filas = wb.active.iter_rows(min_row=fila_encabezado, values_only=True)
+        encabezado = next(filas, None)
+        if encabezado is None:
+            return
+        nombres = [str(c).strip() if c is not None else f"Unnamed: {i}" for i, c in enumerate(encabezado)]
+        ancho = len(nombres)
+        posiciones = list(range(ancho)) if columnas is None else [nombres.index(c) for c in columnas]
+        nombres_lote = [nombres[i] for i in posiciones]
+
+        lote = []
+        inicio = 0
+        for fila in filas:
+            if fila is None or all(valor is None for valor in fila):
+                continue
+            if len(fila) < ancho:
+                fila = tuple(fila) + (None,) * (ancho - len(fila))
+            lote.append([fila[i] for i in posiciones])
+            if len(lote) >= tamano_lote:
+                yield pd.DataFrame(lote, columns=nombres_lote, index=range(inicio, inicio + len(lote)), dtype=object)
+                inicio += len(lote)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=nombres_lote, index=range(inicio, inicio + len(lote)), dtype=object)
+    finally:
+        wb.close()
+
+def leer_columnas_por_lotes(ruta_archivo, columnas, tamano_lote=5000, fila_encabezado=1):
+    """
+    Lee solo las columnas indicadas de un archivo XLSX recorriéndolo por lotes.
+
+    La memoria usada es la de las columnas pedidas más un lote, no la de la hoja completa.
+    """
+    with Fase('lectura_excel_por_lotes', detalle=os.path.basename(ruta_archivo)) as fase:
+        lotes = list(leer_excel_por_lotes(ruta_archivo, tamano_lote, fila_encabezado, columnas))
+        fase.filas = sum(len(lote) for lote in lotes)
+    if not lotes:
+        return pd.DataFrame(columns=columnas)
+    return pd.concat(lotes)
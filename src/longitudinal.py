@@ -0,0 +1,415 @@
+"""
+Comparación longitudinal de los censos de varias vigencias.
+
+Cada censo anual (un año de VIGENCIA) se agrega una sola vez a una línea de tiempo
+guardada en disco:
+
+* censo_<año>.pkl: una fila por persona con su documento canónico, nombre, hogar y si es
+  el jefe. El hogar se identifica por el documento de su jefe, de modo que el mismo hogar
+  tiene la misma clave en todos los años mientras no cambie de jefe.
+* cambios_<año>_<año>.pkl: llegadas, salidas, cambios de hogar y cambios de jefe entre
+  cada par de años consecutivos, calculados al agregar el año.
+* personas.pkl: la línea de tiempo de cada persona (hogar en cada año, indexada por documento).
+* indice.pkl: los años agregados y el resumen de cada par consecutivo.
+
+Agregar un año solo compara ese censo con el año anterior y el siguiente ya guardados.
+El resumen por año sale del índice, y comparar dos años cualesquiera solo lee esos dos
+censos (o los cambios ya calculados si son consecutivos).
+
+Uso:
+    python -m src.longitudinal --agregar Archivo/basededatosvieja.xlsx
+    python -m src.longitudinal --agregar "Archivo/Cuestionario.xlsx" --vigencia 2025
+    python -m src.longitudinal --comparar 2021 2025
+    python -m src.longitudinal --persona 1234567
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+from .cache_excel import leer_excel
+from .esquema import aplicar_esquema, texto_documento, textos_de_claves
+from .formateador import TIPOS_ESPERADOS, codificar, tabla_codigo
+from .metricas import Fase, medir_fase
+
+# Directorio de la línea de tiempo y versión de su formato (si cambia, se empieza una nueva)
+DIRECTORIO_LONGITUDINAL = os.environ.get('ANALISIS_LONGITUDINAL_DIR', os.path.join('Archivo', 'longitudinal'))
+VERSION_LINEA_DE_TIEMPO = 1
+
+COLUMNAS_CENSO = ['documento', 'nombre', 'hogar', 'es_jefe']
+TIPOS_CAMBIO = ['llegadas', 'salidas', 'cambios_hogar', 'cambios_jefe']
+
+def _es_cabeza_de_familia(parentescos):
+    """Marca las filas cuyo parentesco corresponde al código CF (Cabeza de Familia, Jefe...)."""
+    tabla = tabla_codigo(TIPOS_ESPERADOS['PARENTESCO']['mapeo'])
+    texto = parentescos.astype(object).where(parentescos.notna(), '').astype(str).str.strip()
+    return texto.map({valor: codificar(valor, tabla) == 'CF' for valor in texto.unique()}).to_numpy(dtype=bool)
+
+def censo_anual(df):
+    """
+    Reduce una hoja (cuestionario o base de datos del Ministerio) a las columnas de la línea de tiempo.
+
+    En el cuestionario el hogar es la cédula del jefe de cada fila. En la base del Ministerio
+    el hogar de cada FAMILIA es el documento de su primer miembro con parentesco Cabeza de
+    Familia; las familias sin jefe quedan como 'FAMILIA <número>'. Las personas sin documento
+    se descartan y un documento repetido conserva su primera fila.
+
+    Args:
+        df (pandas.DataFrame): Hoja ya leída, con los nombres de columna sin espacios sobrantes.
+
+    Returns:
+        pandas.DataFrame: Columnas documento, nombre, hogar (texto) y es_jefe.
+    """
+    if 'Documento' in df.columns and 'Cedula de jefe(a) de Familia' in df.columns:
+        documentos = texto_documento(df['Documento'])
+        hogares = texto_documento(df['Cedula de jefe(a) de Familia'])
+        nombres = (df['Primer Nombre'].fillna('').astype(str).str.strip() + ' ' + df['Segundo Nombre'].fillna('').astype(str).str.strip() + ' ' +
+                   df['Primer Apellido'].fillna('').astype(str).str.strip() + ' ' + df['Segundo Apellido'].fillna('').astype(str).str.strip())
+        es_jefe = (documentos == hogares).to_numpy()
+    elif 'NUMERO DOCUMENTO' in df.columns and 'FAMILIA' in df.columns:
+        documentos = texto_documento(df['NUMERO DOCUMENTO'])
+        columna_nombre = 'NOMBRES' if 'NOMBRES' in df.columns else 'NOMBRE'
+        nombres = df[columna_nombre].fillna('').astype(str).str.strip() + ' ' + df['APELLIDOS'].fillna('').astype(str).str.strip()
+        es_jefe = _es_cabeza_de_familia(df['PARENTESCO']) & documentos.notna().to_numpy()
+        familias = df['FAMILIA'].astype(str).str.replace(r'\.0$', '', regex=True)
+        jefe_por_familia = pd.Series(documentos[es_jefe].to_numpy(), index=familias[es_jefe].to_numpy())
+        jefe_por_familia = jefe_por_familia[~jefe_por_familia.index.duplicated()]
+        hogares = familias.map(jefe_por_familia).fillna('FAMILIA ' + familias)
+        es_jefe = es_jefe & (documentos == hogares).to_numpy()
+    else:
+        raise ValueError("la hoja no tiene las columnas del cuestionario ni las de la base de datos del Ministerio")
+
+    censo = pd.DataFrame({
+        'documento': documentos.to_numpy(dtype=object),
+        'nombre': nombres.str.split().str.join(' ').to_numpy(dtype=object),
+        'hogar': hogares.to_numpy(dtype=object),
+        'es_jefe': es_jefe
+    })
+    return censo[censo['documento'].notna()].drop_duplicates('documento', ignore_index=True)
+
+def leer_censos(ruta_archivo, vigencia=None):
+    """
+    Lee un libro y lo separa en censos anuales.
+
+    Args:
+        ruta_archivo (str): Cuestionario o base de datos del Ministerio (puede traer varias vigencias).
+        vigencia (int): Año de todo el libro; None usa la columna VIGENCIA de cada fila.
+
+    Returns:
+        dict: Año -> censo anual (ver censo_anual).
+    """
+    df = leer_excel(ruta_archivo)
+    df.columns = df.columns.str.strip()
+    aplicar_esquema(df)
+    if vigencia is not None:
+        return {int(vigencia): censo_anual(df)}
+    if 'VIGENCIA' not in df.columns:
+        raise ValueError(f"'{ruta_archivo}' no tiene columna VIGENCIA; indique el año con --vigencia")
+    años = pd.to_numeric(df['VIGENCIA'], errors='coerce')
+    if años.isna().any():
+        raise ValueError(f"'{ruta_archivo}' tiene {int(años.isna().sum())} filas sin VIGENCIA válida")
+    return {int(año): censo_anual(filas) for año, filas in df.groupby(años.astype(int), sort=True)}
+
+def _claves_compartidas(anterior, actual):
+    """Claves enteras (-1 si falta) de dos columnas de texto en un mismo espacio, y el texto de cada clave."""
+    codigos, unicos = pd.factorize(pd.concat([anterior, actual], ignore_index=True).astype(object))
+    return (codigos[:len(anterior)], codigos[len(anterior):]), pd.Index(unicos, dtype=object)
+
+@medir_fase('comparacion_censos')
+def comparar_censos(anterior, actual):
+    """
+    Compara dos censos anuales por columnas (joins sobre claves enteras de documento y hogar).
+
+    Los hogares de los dos años se asocian uno a uno: primero los que conservan la misma
+    clave (el mismo jefe) y luego, de mayor a menor, los pares que comparten más miembros.
+    Una persona cambia de hogar si su hogar anterior no es el asociado a su hogar actual, y
+    un hogar asociado cambia de jefe si su jefe no es el del hogar anterior.
+
+    Args:
+        anterior (pandas.DataFrame): Censo del año anterior (ver censo_anual).
+        actual (pandas.DataFrame): Censo del año actual.
+
+    Returns:
+        dict: DataFrames 'llegadas', 'salidas', 'cambios_hogar' y 'cambios_jefe'.
+    """
+    # Los censos guardan el documento ya canónico: basta con internarlo en claves enteras compartidas
+    (doc_ant, doc_act), textos = _claves_compartidas(anterior['documento'], actual['documento'])
+    (hogar_ant, hogar_act), textos_hogar = _claves_compartidas(anterior['hogar'], actual['hogar'])
+    ant = pd.DataFrame({'clave': doc_ant, 'hogar': hogar_ant, 'nombre': anterior['nombre'].to_numpy()})
+    act = pd.DataFrame({'clave': doc_act, 'hogar': hogar_act, 'nombre': actual['nombre'].to_numpy()})
+
+    llegadas = act[~np.isin(doc_act, doc_ant)]
+    salidas = ant[~np.isin(doc_ant, doc_act)]
+    comunes = ant.merge(act, on='clave', suffixes=('_anterior', '_actual'))
+
+    # Asociación uno a uno de hogares: misma clave primero, luego los que comparten más miembros
+    aportes = comunes.groupby(['hogar_actual', 'hogar_anterior']).size().rename('miembros').reset_index()
+    aportes['misma_clave'] = aportes['hogar_actual'] == aportes['hogar_anterior']
+    asociado = aportes.sort_values(['misma_clave', 'miembros'], ascending=False, kind='stable') \
+                      .drop_duplicates('hogar_actual').drop_duplicates('hogar_anterior').set_index('hogar_actual')['hogar_anterior']
+    movidos = comunes[comunes['hogar_anterior'].to_numpy() != asociado.reindex(comunes['hogar_actual']).to_numpy()]
+
+    # Jefe de cada hogar en cada año (-1 si el hogar no tiene jefe)
+    jefe_ant = pd.Series(doc_ant[anterior['es_jefe'].to_numpy()], index=hogar_ant[anterior['es_jefe'].to_numpy()])
+    jefe_act = pd.Series(doc_act[actual['es_jefe'].to_numpy()], index=hogar_act[actual['es_jefe'].to_numpy()])
+    hogares = asociado.reset_index()
+    hogares['jefe_anterior'] = jefe_ant[~jefe_ant.index.duplicated()].reindex(hogares['hogar_anterior']).fillna(-1).astype(np.int64).to_numpy()
+    hogares['jefe_actual'] = jefe_act[~jefe_act.index.duplicated()].reindex(hogares['hogar_actual']).fillna(-1).astype(np.int64).to_numpy()
+    cambios_jefe = hogares[hogares['jefe_anterior'] != hogares['jefe_actual']]
+
+    def documento(claves):
+        return textos_de_claves(np.asarray(claves, dtype=np.int64), textos)
+
+    def hogar(claves):
+        return textos_de_claves(np.asarray(claves, dtype=np.int64), textos_hogar)
+
+    return {
+        'llegadas': pd.DataFrame({'Documento': documento(llegadas['clave']), 'Nombre': llegadas['nombre'].to_numpy(), 'Hogar': hogar(llegadas['hogar'])}),
+        'salidas': pd.DataFrame({'Documento': documento(salidas['clave']), 'Nombre': salidas['nombre'].to_numpy(), 'Hogar': hogar(salidas['hogar'])}),
+        'cambios_hogar': pd.DataFrame({'Documento': documento(movidos['clave']), 'Nombre': movidos['nombre_actual'].to_numpy(),
+                                       'Hogar Anterior': hogar(movidos['hogar_anterior']), 'Hogar Actual': hogar(movidos['hogar_actual'])}),
+        'cambios_jefe': pd.DataFrame({'Hogar Anterior': hogar(cambios_jefe['hogar_anterior']), 'Jefe Anterior': documento(cambios_jefe['jefe_anterior']),
+                                      'Hogar Actual': hogar(cambios_jefe['hogar_actual']), 'Jefe Actual': documento(cambios_jefe['jefe_actual'])})
+    }
+
+def resumir_cambios(año_anterior, año_actual, anterior, actual, cambios):
+    """Fila de resumen de la comparación entre dos años."""
+    return {
+        'Año Anterior': año_anterior,
+        'Año Actual': año_actual,
+        'Personas Anterior': len(anterior),
+        'Personas Actual': len(actual),
+        'Hogares Actual': int(actual['hogar'].nunique()),
+        'Llegadas': len(cambios['llegadas']),
+        'Salidas': len(cambios['salidas']),
+        'Cambios de Hogar': len(cambios['cambios_hogar']),
+        'Cambios de Jefe': len(cambios['cambios_jefe'])
+    }
+
+class LineaDeTiempo:
+    """
+    Línea de tiempo de personas y hogares guardada en un directorio.
+
+    Los censos y los cambios entre años consecutivos se guardan en archivos separados,
+    así que consultar un año o un par de años solo lee los archivos de esos años.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_LONGITUDINAL):
+        self.directorio = directorio
+        self.indice = self._leer('indice.pkl')
+        if not isinstance(self.indice, dict) or self.indice.get('version') != VERSION_LINEA_DE_TIEMPO:
+            self.indice = {'version': VERSION_LINEA_DE_TIEMPO, 'censos': {}, 'cambios': {}}
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, nombre)
+
+    def _leer(self, nombre):
+        """Lee un archivo de la línea de tiempo; None si no existe."""
+        ruta = self._ruta(nombre)
+        return pd.read_pickle(ruta) if os.path.exists(ruta) else None
+
+    def _guardar(self, objeto, nombre):
+        """Guarda un archivo de forma atómica (archivo temporal y reemplazo)."""
+        os.makedirs(self.directorio, exist_ok=True)
+        ruta_temporal = f"{self._ruta(nombre)}.{os.getpid()}.tmp"
+        pd.to_pickle(objeto, ruta_temporal)
+        os.replace(ruta_temporal, self._ruta(nombre))
+
+    def años(self):
+        """Años agregados, en orden."""
+        return sorted(self.indice['censos'])
+
+    def censo(self, año):
+        """Censo guardado de un año."""
+        if año not in self.indice['censos']:
+            raise KeyError(f"El año {año} no está en la línea de tiempo (años: {self.años()}).")
+        return self._leer(f"censo_{año}.pkl")
+
+    def agregar(self, año, censo, fuente=None):
+        """
+        Agrega (o reemplaza) el censo de un año.
+
+        Solo se calculan los cambios con el año anterior y el siguiente ya guardados; los
+        cambios entre esos dos vecinos, si existían, se descartan porque dejan de ser consecutivos.
+
+        Returns:
+            list: Resúmenes de los pares de años recalculados.
+        """
+        año = int(año)
+        with Fase('linea_de_tiempo_agregar', len(censo), str(año)):
+            self._guardar(censo[COLUMNAS_CENSO].reset_index(drop=True), f"censo_{año}.pkl")
+            self._actualizar_personas(año, censo)
+            self.indice['censos'][año] = {
+                'personas': len(censo),
+                'hogares': int(censo['hogar'].nunique()),
+                'fuente': fuente,
+                'agregado': datetime.now().isoformat(timespec='seconds')
+            }
+
+            años = self.años()
+            posicion = años.index(año)
+            anterior = años[posicion - 1] if posicion > 0 else None
+            siguiente = años[posicion + 1] if posicion + 1 < len(años) else None
+            if anterior is not None and siguiente is not None:
+                self._descartar_cambios(anterior, siguiente)
+
+            resumenes = []
+            if anterior is not None:
+                resumenes.append(self._calcular_cambios(anterior, año, self.censo(anterior), censo))
+            if siguiente is not None:
+                resumenes.append(self._calcular_cambios(año, siguiente, censo, self.censo(siguiente)))
+            self._guardar(self.indice, 'indice.pkl')
+        return resumenes
+
+    def _actualizar_personas(self, año, censo):
+        """Escribe la columna del año (hogar de cada persona) en la línea de tiempo por persona."""
+        personas = self._leer('personas.pkl')
+        if personas is None:
+            personas = pd.DataFrame({'Nombre': pd.Series(dtype=object)}, index=pd.Index([], dtype=object, name='Documento'))
+        nuevas = censo.set_index('documento')
+        personas = personas.reindex(personas.index.union(nuevas.index, sort=False))
+        personas.index.name = 'Documento'
+        personas[año] = nuevas['hogar'].reindex(personas.index).astype('category')
+        # El nombre que se muestra es el del año más reciente en que aparece la persona
+        if not self.indice['censos'] or año >= max(self.indice['censos']):
+            personas['Nombre'] = nuevas['nombre'].reindex(personas.index).fillna(personas['Nombre'])
+        else:
+            personas['Nombre'] = personas['Nombre'].fillna(nuevas['nombre'].reindex(personas.index))
+        años = sorted(columna for columna in personas.columns if columna != 'Nombre')
+        self._guardar(personas[['Nombre'] + años], 'personas.pkl')
+
+    def _descartar_cambios(self, año_anterior, año_actual):
+        self.indice['cambios'].pop((año_anterior, año_actual), None)
+        ruta = self._ruta(f"cambios_{año_anterior}_{año_actual}.pkl")
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    def _calcular_cambios(self, año_anterior, año_actual, anterior, actual):
+        cambios = comparar_censos(anterior, actual)
+        self._guardar(cambios, f"cambios_{año_anterior}_{año_actual}.pkl")
+        resumen = resumir_cambios(año_anterior, año_actual, anterior, actual, cambios)
+        self.indice['cambios'][(año_anterior, año_actual)] = resumen
+        return resumen
+
+    def cambios(self, año_anterior, año_actual):
+        """
+        Cambios entre dos años cualesquiera.
+
+        Si son consecutivos se leen los cambios ya calculados; si no, se comparan solo los
+        censos de esos dos años.
+
+        Returns:
+            tuple: Resumen (dict) y DataFrames de cambios (ver comparar_censos).
+        """
+        año_anterior, año_actual = int(año_anterior), int(año_actual)
+        if (año_anterior, año_actual) in self.indice['cambios']:
+            return self.indice['cambios'][(año_anterior, año_actual)], self._leer(f"cambios_{año_anterior}_{año_actual}.pkl")
+        anterior, actual = self.censo(año_anterior), self.censo(año_actual)
+        cambios = comparar_censos(anterior, actual)
+        return resumir_cambios(año_anterior, año_actual, anterior, actual, cambios), cambios
+
+    def resumen(self):
+        """Resumen de cada par de años consecutivos (sin leer los censos)."""
+        return pd.DataFrame([self.indice['cambios'][par] for par in sorted(self.indice['cambios'])])
+
+    def historial(self, documento):
+        """Hogar de la persona en cada año (NaN en los años en que no aparece); None si no está."""
+        personas = self._leer('personas.pkl')
+        clave = texto_documento(pd.Series([documento])).iloc[0]
+        if personas is None or clave not in personas.index:
+            return None
+        return personas.loc[clave]
+
+def agregar_archivo(ruta_archivo, vigencia=None, directorio=DIRECTORIO_LONGITUDINAL):
+    """
+    Agrega a la línea de tiempo los censos anuales de un libro.
+
+    Returns:
+        list: Resúmenes de los pares de años recalculados; un texto de error si falla la lectura.
+    """
+    try:
+        censos = leer_censos(ruta_archivo, vigencia)
+    except FileNotFoundError:
+        return f"Error: El archivo '{ruta_archivo}' no fue encontrado."
+    except Exception as e:
+        return f"Error al leer el archivo '{ruta_archivo}': {e}"
+
+    linea = LineaDeTiempo(directorio)
+    resumenes = []
+    for año, censo in censos.items():
+        resumenes.extend(linea.agregar(año, censo, os.path.basename(ruta_archivo)))
+        print(f"-> Vigencia {año}: {len(censo)} personas agregadas a la línea de tiempo.")
+    return resumenes
+
+def generar_reporte_longitudinal(linea, ruta_reportes='reportes/reportes_longitudinales', año_anterior=None, año_actual=None):
+    """
+    Escribe el resumen por año y, si se indican dos años, el detalle de sus cambios en TXT y JSON.
+
+    Args:
+        linea (LineaDeTiempo): Línea de tiempo con los censos agregados.
+        ruta_reportes (str): Carpeta de los reportes.
+        año_anterior (int): Primer año a comparar en detalle; None para solo el resumen.
+        año_actual (int): Segundo año a comparar en detalle.
+    """
+    os.makedirs(ruta_reportes, exist_ok=True)
+    resumen = linea.resumen()
+    detalle = None
+    if año_anterior is not None and año_actual is not None:
+        resumen_par, cambios = linea.cambios(año_anterior, año_actual)
+        detalle = (resumen_par, cambios)
+
+    nombre_txt = os.path.join(ruta_reportes, 'reporte_longitudinal.txt')
+    with open(nombre_txt, 'w', encoding='utf-8') as archivo:
+        archivo.write("=" * 20 + " REPORTE LONGITUDINAL DE LOS CENSOS POR VIGENCIA " + "=" * 20 + "\n\n")
+        archivo.write(f"Vigencias en la línea de tiempo: {', '.join(str(año) for año in linea.años()) or 'ninguna'}\n\n")
+        if resumen.empty:
+            archivo.write("Se necesitan al menos dos vigencias para comparar.\n")
+        else:
+            archivo.write("Cambios entre vigencias consecutivas:\n")
+            archivo.write(tabulate(resumen, headers='keys', tablefmt='grid', showindex=False) + "\n")
+        if detalle:
+            resumen_par, cambios = detalle
+            archivo.write(f"\n{'=' * 30} Comparación {resumen_par['Año Anterior']} -> {resumen_par['Año Actual']} {'=' * 30}\n")
+            for tipo, titulo in zip(TIPOS_CAMBIO, ['Llegadas', 'Salidas', 'Cambios de hogar', 'Cambios de jefe']):
+                archivo.write(f"\n{titulo} ({len(cambios[tipo])}):\n")
+                if cambios[tipo].empty:
+                    archivo.write("Ninguno.\n")
+                else:
+                    archivo.write(tabulate(cambios[tipo], headers='keys', tablefmt='grid', showindex=False) + "\n")
+    print(f"El reporte longitudinal ha sido guardado en '{nombre_txt}'.")
+
+    nombre_json = os.path.join(ruta_reportes, 'reporte_longitudinal.json')
+    datos = {'vigencias': linea.años(), 'resumen': resumen.to_dict('records')}
+    if detalle:
+        resumen_par, cambios = detalle
+        datos['comparacion'] = {'resumen': resumen_par, **{tipo: cambios[tipo].astype(object).where(cambios[tipo].notna(), None).to_dict('records') for tipo in TIPOS_CAMBIO}}
+    with open(nombre_json, 'w', encoding='utf-8') as archivo:
+        json.dump(datos, archivo, ensure_ascii=False, indent=4)
+    print(f"El reporte longitudinal JSON ha sido guardado en '{nombre_json}'.")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agregar', nargs='+', default=[], help='Libros a agregar a la línea de tiempo (cuestionario o base de datos del Ministerio).')
+    parser.add_argument('--vigencia', type=int, default=None, help='Año de los libros agregados; por defecto se usa su columna VIGENCIA.')
+    parser.add_argument('--comparar', type=int, nargs=2, metavar=('ANTERIOR', 'ACTUAL'), default=None, help='Detallar los cambios entre dos vigencias.')
+    parser.add_argument('--persona', default=None, help='Mostrar el hogar de una persona (documento) en cada vigencia.')
+    parser.add_argument('--directorio', default=DIRECTORIO_LONGITUDINAL, help='Carpeta de la línea de tiempo.')
+    parser.add_argument('--reportes', default='reportes/reportes_longitudinales', help='Carpeta de los reportes.')
+    args = parser.parse_args()
+
+    for ruta in args.agregar:
+        resultado = agregar_archivo(ruta, args.vigencia, args.directorio)
+        if isinstance(resultado, str):
+            print(resultado)
+
+    linea = LineaDeTiempo(args.directorio)
+    if args.persona:
+        historial = linea.historial(args.persona)
+        print(f"La persona {args.persona} no está en la línea de tiempo." if historial is None else historial.to_string())
+    else:
+        try:
+            generar_reporte_longitudinal(linea, args.reportes, *(args.comparar or (None, None)))
+        except KeyError as e:
+            print(e.args[0])
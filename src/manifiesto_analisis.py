@@ -0,0 +1,193 @@
+"""
+Reanálisis incremental del índice de familias a partir de huellas por fila.
+
+Cada ejecución guarda un manifiesto con la huella (hash) de cada fila relevante del
+cuestionario y el resultado de cada familia. En la siguiente ejecución solo se
+recalculan las familias tocadas por filas nuevas, modificadas o eliminadas; las
+demás se toman del manifiesto.
+
+Solo el índice de familias es incremental: la hoja se lee y se resume completa en cada
+ejecución (las huellas se calculan sobre todas las filas), y las advertencias de personas
+sin jefe y las personas repetidas se recalculan en procesar_datos sobre la hoja completa.
+"""
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from .esquema import texto_documento
+
+# Directorio de los manifiestos y versión de su formato (si cambia, se recalcula todo)
+DIRECTORIO_MANIFIESTOS = os.environ.get('ANALISIS_MANIFIESTO_DIR', os.path.join('.cache', 'manifiestos'))
+VERSION_MANIFIESTO = 2
+
+MENSAJE_MULTIPLES_JEFES = "Múltiples jefes de familia identificados con la misma cédula."
+
+class Familia(dict):
+    """
+    Entrada de familias_multiples / familias_uno: {'jefe': [documento, nombre], 'miembros': DataFrame}.
+
+    Los miembros se guardan como columnas y el DataFrame se construye la primera vez que
+    se consulta data['miembros'], para no crear una tabla por familia durante el análisis.
+    Las etiquetas de fila de la tabla son las de la ejecución en la que se calculó la familia.
+    """
+
+    def __init__(self, jefe, filas, documentos, nombres, parentescos):
+        super().__init__(jefe=jefe)
+        self.columnas_miembros = (filas, documentos, nombres, parentescos)
+
+    def __missing__(self, clave):
+        if clave != 'miembros':
+            raise KeyError(clave)
+        filas, documentos, nombres, parentescos = self.columnas_miembros
+        miembros = pd.DataFrame({'Documento': documentos, 'Nombre Completo Persona': nombres, 'Parentesco': parentescos}, index=list(filas))
+        self['miembros'] = miembros
+        return miembros
+
+def ruta_manifiesto_por_defecto(ruta_archivo):
+    """Devuelve la ruta del manifiesto asociado al archivo XLSX."""
+    clave = hashlib.sha1(os.path.abspath(ruta_archivo).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DIRECTORIO_MANIFIESTOS, f"{clave}.pkl")
+
+def huellas_filas(df, cedulas_jefe, documentos):
+    """
+    Calcula la huella de cada fila a partir de los campos que usa el análisis de familias.
+
+    La huella incluye la posición de la fila dentro de su familia, de modo que reordenar
+    los miembros de una familia también la marca como modificada.
+    """
+    campos = pd.DataFrame({
+        'cedula': cedulas_jefe,
+        'documento': documentos,
+        'nombre': df['Nombre Completo Persona'].astype(str),
+        'primer_nombre': df['Primer Nombre'].astype(str),
+        'primer_apellido': df['Primer Apellido'].astype(str),
+        'parentesco': df['Parentesco'].astype(str),
+        'orden': cedulas_jefe.groupby(cedulas_jefe, sort=False, dropna=False).cumcount()
+    })
+    return pd.util.hash_pandas_object(campos, index=False).to_numpy()
+
+def resultados_por_familia(df, cedulas_jefe, documentos):
+    """
+    Analiza cada familia de forma independiente (mismas reglas que construir_indice_familias).
+
+    Returns:
+        dict: Cédula de jefe -> ('familia', (documento, nombre), (filas, documentos, nombres, parentescos))
+        si hay exactamente un jefe, o ('advertencia', (cédula, nombres, mensaje)) si hay varios.
+        Las familias sin jefe no aparecen.
+    """
+    es_jefe = cedulas_jefe == documentos
+    jefes = pd.DataFrame({
+        'cedula': cedulas_jefe[es_jefe],
+        'documento': documentos[es_jefe],
+        'nombre_completo': df.loc[es_jefe, 'Nombre Completo Persona'],
+        'nombre_corto': df.loc[es_jefe, 'Primer Nombre'].astype(str).str.strip() + " " + df.loc[es_jefe, 'Primer Apellido'].astype(str).str.strip()
+    })
+    jefes_por_cedula = jefes.groupby('cedula', sort=False)
+    cantidad_jefes = jefes_por_cedula.size().to_dict()
+    primer_jefe = jefes_por_cedula[['documento', 'nombre_completo']].first()
+    documento_jefe = primer_jefe['documento'].to_dict()
+    nombre_jefe = primer_jefe['nombre_completo'].to_dict()
+    nombres_jefes = jefes_por_cedula['nombre_corto'].agg(", ".join).to_dict()
+
+    # Filas agrupadas por familia (orden estable) para repartir las columnas con cortes.
+    # Se usan tuplas de valores simples porque el recolector de basura deja de recorrerlas,
+    # lo que abarata cargar y guardar manifiestos con decenas de miles de familias.
+    # Las filas sin cédula de jefe (código -1) no pertenecen a ninguna familia.
+    codigos, cedulas = pd.factorize(cedulas_jefe)
+    con_familia = np.flatnonzero(codigos >= 0)
+    orden = con_familia[np.argsort(codigos[con_familia], kind='stable')]
+    limites = np.concatenate([[0], np.cumsum(np.bincount(codigos[con_familia], minlength=len(cedulas)))]).tolist()
+    filas = tuple(df.index.to_numpy()[orden].tolist())
+    docs = tuple(documentos.to_numpy()[orden].tolist())
+    nombres = tuple(df['Nombre Completo Persona'].to_numpy()[orden].tolist())
+    parentescos = tuple(df['Parentesco'].to_numpy()[orden].tolist())
+
+    resultados = {}
+    for i, cedula in enumerate(cedulas):
+        cantidad = cantidad_jefes.get(cedula, 0)
+        if cantidad == 1:
+            inicio, fin = limites[i], limites[i + 1]
+            resultados[cedula] = ('familia', (documento_jefe[cedula], nombre_jefe[cedula]),
+                                  (filas[inicio:fin], docs[inicio:fin], nombres[inicio:fin], parentescos[inicio:fin]))
+        elif cantidad > 1:
+            resultados[cedula] = ('advertencia', (cedula, nombres_jefes[cedula], MENSAJE_MULTIPLES_JEFES))
+    return resultados
+
+def _cargar_manifiesto(ruta_manifiesto):
+    """Lee el manifiesto anterior; None si no existe, está dañado o es de otra versión."""
+    if not os.path.exists(ruta_manifiesto):
+        return None
+    try:
+        manifiesto = pd.read_pickle(ruta_manifiesto)
+    except Exception:
+        return None
+    return manifiesto if manifiesto.get('version') == VERSION_MANIFIESTO else None
+
+def _guardar_manifiesto(manifiesto, ruta_manifiesto):
+    """Guarda el manifiesto de forma atómica (archivo temporal y reemplazo)."""
+    try:
+        os.makedirs(os.path.dirname(ruta_manifiesto) or '.', exist_ok=True)
+        ruta_temporal = f"{ruta_manifiesto}.{os.getpid()}.tmp"
+        pd.to_pickle(manifiesto, ruta_temporal)
+        os.replace(ruta_temporal, ruta_manifiesto)
+    except OSError as e:
+        print(f"Advertencia: no se pudo guardar el manifiesto '{ruta_manifiesto}': {e}")
+
+def actualizar_indice_familias(df, ruta_manifiesto):
+    """
+    Equivalente incremental de construir_indice_familias.
+
+    Compara las huellas de las filas con las del manifiesto anterior, recalcula solo las
+    familias cuyas filas se agregaron, modificaron o eliminaron, y guarda el manifiesto
+    actualizado para la siguiente ejecución.
+
+    Args:
+        df (pandas.DataFrame): Registros con la columna 'Nombre Completo Persona' ya calculada.
+        ruta_manifiesto (str): Ruta del manifiesto de la ejecución anterior (se crea si no existe).
+
+    Returns:
+        tuple: Una tupla conteniendo:
+            - dict: Familias con múltiples miembros (entradas Familia).
+            - dict: Familias con un solo miembro (entradas Familia).
+            - list: Advertencias de cédulas con múltiples jefes de familia.
+            - set: Documentos (como texto) de los jefes de familia identificados.
+            - dict: Filas nuevas o modificadas, filas eliminadas y familias recalculadas.
+    """
+    cedulas_jefe = texto_documento(df['Cedula de jefe(a) de Familia'])
+    documentos = texto_documento(df['Documento'])
+    huellas = huellas_filas(df, cedulas_jefe, documentos)
+    cedulas = cedulas_jefe.to_numpy(dtype=object)
+
+    anterior = _cargar_manifiesto(ruta_manifiesto)
+    if anterior is None:
+        familias = resultados_por_familia(df, cedulas_jefe, documentos)
+        cambios = {'filas_nuevas': len(df), 'filas_eliminadas': 0, 'familias_recalculadas': len(familias)}
+    else:
+        nuevas = ~np.isin(huellas, anterior['huellas'])
+        eliminadas = ~np.isin(anterior['huellas'], huellas)
+        tocadas = set(cedulas[nuevas].tolist()) | set(anterior['cedulas'][eliminadas].tolist())
+
+        familias = {cedula: resultado for cedula, resultado in anterior['familias'].items() if cedula not in tocadas}
+        afectadas = cedulas_jefe.isin(tocadas)
+        familias.update(resultados_por_familia(df[afectadas], cedulas_jefe[afectadas], documentos[afectadas]))
+        cambios = {'filas_nuevas': int(nuevas.sum()), 'filas_eliminadas': int(eliminadas.sum()), 'familias_recalculadas': len(tocadas)}
+
+    _guardar_manifiesto({'version': VERSION_MANIFIESTO, 'huellas': huellas, 'cedulas': cedulas, 'familias': familias}, ruta_manifiesto)
+
+    familias_multiples = {}
+    familias_uno = {}
+    advertencias = []
+    for jefe_cedula in pd.unique(cedulas):
+        resultado = familias.get(jefe_cedula)
+        if resultado is None:
+            continue
+        if resultado[0] == 'advertencia':
+            advertencias.append(list(resultado[1]))
+        else:
+            _, jefe, columnas = resultado
+            destino = familias_multiples if len(columnas[0]) > 1 else familias_uno
+            destino[jefe_cedula] = Familia(list(jefe), *columnas)
+
+    jefes_de_familia_documentos = set(documentos[cedulas_jefe == documentos].tolist())
+
+    return familias_multiples, familias_uno, advertencias, jefes_de_familia_documentos, cambios
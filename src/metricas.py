@@ -0,0 +1,180 @@
+"""
+Métricas por fase: tiempo de reloj, tiempo de CPU, memoria máxima trazada y filas procesadas.
+
+Las métricas se activan con la variable de entorno ANALISIS_METRICAS (directorio donde se
+escriben) o llamando a activar_metricas(). Cada ejecución escribe un archivo JSON Lines
+con una línea por fase terminada; los procesos hijos heredan la ruta del archivo por el
+entorno y agregan sus fases al mismo archivo. Desactivadas, cada fase solo consulta
+METRICAS_ACTIVAS y llama directamente a la función medida.
+
+La memoria se mide con tracemalloc (solo las asignaciones de Python y numpy), que hace
+más lento el proceso mientras está activo. Las fases de hilos distintos se anidan por
+separado, pero el pico de memoria y el tiempo de CPU son del proceso: si varias fases
+corren a la vez en hilos, cada una incluye lo que usaron las demás.
+
+Uso:
+    ANALISIS_METRICAS=reportes/metricas python -m src.reportes.generar_todos
+    python -m src.metricas reportes/metricas/metricas_20260101_120000_1234.jsonl
+"""
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+import pandas as pd
+from tabulate import tabulate
+
+DIRECTORIO_METRICAS_POR_DEFECTO = os.path.join('reportes', 'metricas')
+
+METRICAS_ACTIVAS = False
+ARCHIVO_METRICAS = None
+
+# Fases abiertas de cada hilo; el pico de memoria de una fase incluye el de sus fases internas
+_estado_hilo = threading.local()
+
+def _fases_abiertas():
+    """Pila de fases abiertas del hilo actual."""
+    if not hasattr(_estado_hilo, 'fases'):
+        _estado_hilo.fases = []
+    return _estado_hilo.fases
+
+def activar_metricas(directorio=DIRECTORIO_METRICAS_POR_DEFECTO, archivo=None):
+    """
+    Activa las métricas para esta ejecución y los procesos que lance.
+
+    Args:
+        directorio (str): Carpeta donde se crea el archivo de métricas de la ejecución.
+        archivo (str): Archivo JSON Lines a usar; None crea 'metricas_<fecha>_<pid>.jsonl'.
+
+    Returns:
+        str: Ruta del archivo de métricas.
+    """
+    global METRICAS_ACTIVAS, ARCHIVO_METRICAS
+    if archivo is None:
+        archivo = os.path.join(directorio, f"metricas_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.jsonl")
+    os.makedirs(os.path.dirname(archivo) or '.', exist_ok=True)
+    os.environ['ANALISIS_METRICAS'] = directorio
+    os.environ['ANALISIS_METRICAS_ARCHIVO'] = archivo
+    ARCHIVO_METRICAS = archivo
+    METRICAS_ACTIVAS = True
+    return archivo
+
+class Fase:
+    """
+    Bloque `with` que mide una fase y escribe su línea en el archivo de métricas.
+
+    El número de filas puede indicarse al crear la fase o asignarse dentro del bloque
+    (fase.filas = len(df)) cuando solo se conoce al terminar.
+    """
+
+    def __init__(self, nombre, filas=None, detalle=None):
+        self.nombre = nombre
+        self.filas = filas
+        self.detalle = detalle
+        self._activa = False
+
+    def __enter__(self):
+        if not METRICAS_ACTIVAS:
+            return self
+        self._activa = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        actual, pico = tracemalloc.get_traced_memory()
+        fases = _fases_abiertas()
+        if fases:
+            fases[-1]['pico'] = max(fases[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+        fases.append({'memoria_inicial': actual, 'pico': actual})
+        self._inicio_fecha = datetime.now()
+        self._inicio_cpu = time.process_time()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo_error, error, traza):
+        if not self._activa:
+            return False
+        segundos = time.perf_counter() - self._inicio
+        cpu_segundos = time.process_time() - self._inicio_cpu
+        fases = _fases_abiertas()
+        memoria = fases.pop()
+        pico = max(memoria['pico'], tracemalloc.get_traced_memory()[1])
+        if fases:
+            fases[-1]['pico'] = max(fases[-1]['pico'], pico)
+        tracemalloc.reset_peak()
+
+        registro = {
+            'fase': self.nombre,
+            'inicio': self._inicio_fecha.isoformat(timespec='milliseconds'),
+            'segundos': round(segundos, 6),
+            'cpu_segundos': round(cpu_segundos, 6),
+            'pico_memoria_mb': round(pico / 2**20, 3),
+            'incremento_memoria_mb': round((pico - memoria['memoria_inicial']) / 2**20, 3),
+            'filas': None if self.filas is None else int(self.filas),
+            'detalle': self.detalle,
+            'nivel': len(fases),
+            'pid': os.getpid(),
+            'hilo': threading.current_thread().name,
+            'error': None if tipo_error is None else tipo_error.__name__
+        }
+        try:
+            with open(ARCHIVO_METRICAS, 'a', encoding='utf-8') as archivo:
+                archivo.write(json.dumps(registro, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Advertencia: no se pudo escribir la métrica de '{self.nombre}' en '{ARCHIVO_METRICAS}': {e}")
+        return False
+
+def medir_fase(nombre, filas=None):
+    """
+    Decorador que mide cada llamada a la función como una fase.
+
+    Args:
+        nombre (str): Nombre de la fase en el archivo de métricas.
+        filas (callable): Recibe el primer argumento de la función y devuelve el número de
+            filas que procesa (por ejemplo len); None para no registrar filas.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def medida(*args, **kwargs):
+            if not METRICAS_ACTIVAS:
+                return funcion(*args, **kwargs)
+            with Fase(nombre, filas(args[0]) if filas and args else None):
+                return funcion(*args, **kwargs)
+        return medida
+    return decorador
+
+def leer_metricas(ruta_archivo):
+    """Lee un archivo de métricas como DataFrame (una fila por fase, en orden de término)."""
+    with open(ruta_archivo, encoding='utf-8') as archivo:
+        return pd.DataFrame([json.loads(linea) for linea in archivo if linea.strip()])
+
+def resumir_metricas(metricas):
+    """
+    Agrupa las fases por nombre.
+
+    Returns:
+        pandas.DataFrame: Llamadas, segundos y CPU totales, pico de memoria máximo y filas
+        totales de cada fase, ordenado por segundos totales.
+    """
+    resumen = metricas.groupby('fase').agg(
+        llamadas=('fase', 'size'),
+        segundos=('segundos', 'sum'),
+        cpu_segundos=('cpu_segundos', 'sum'),
+        pico_memoria_mb=('pico_memoria_mb', 'max'),
+        filas=('filas', lambda filas: filas.sum(min_count=1))
+    )
+    resumen['filas'] = resumen['filas'].astype('Int64')
+    return resumen.sort_values('segundos', ascending=False).reset_index()
+
+_archivo_heredado = os.environ.get('ANALISIS_METRICAS_ARCHIVO')
+if os.environ.get('ANALISIS_METRICAS', ''):
+    activar_metricas(os.environ['ANALISIS_METRICAS'], _archivo_heredado or None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivo', help='Archivo de métricas (.jsonl) de una ejecución.')
+    args = parser.parse_args()
+
+    print(tabulate(resumir_metricas(leer_metricas(args.archivo)), headers='keys', tablefmt='grid', showindex=False, floatfmt='.3f'))
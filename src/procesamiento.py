@@ -1,93 +1,162 @@
+import os
+import numpy as np
 import pandas as pd
+from .cache_excel import leer_excel
+from .esquema import aplicar_esquema, claves_documento, normalizar_documento, texto_documento, textos_de_claves
+from .lectura_por_lotes import leer_excel_por_lotes
+from .manifiesto_analisis import actualizar_indice_familias, ruta_manifiesto_por_defecto
+from .metricas import Fase, medir_fase
 
-def procesar_datos(ruta_archivo):
+COLUMNAS_RESUMEN_PERSONAS = ['Cedula de jefe(a) de Familia', 'Nombre Completo Persona', 'Documento', 'Cantidad']
+
+def claves_familia(df):
     """
-    Procesa un archivo XLSX para analizar familias, generar advertencias
-    y detectar personas repetidas (basado en 'Documento' y 'Nombre Completo'),
-    omitiendo personas con cédula '99'.
+    Interna la cédula del jefe y el documento de cada fila en un mismo espacio de claves enteras.
+
+    Returns:
+        tuple: Claves de la cédula del jefe, claves del documento (arreglos numpy, -1 si está
+        vacío) y el texto canónico de cada clave.
+    """
+    (claves_jefe, claves_persona), textos = claves_documento(df['Cedula de jefe(a) de Familia'], df['Documento'])
+    return claves_jefe, claves_persona, textos
+
+def construir_indice_familias(df, claves=None):
+    """
+    Construye el índice de familias en una sola pasada agrupada sobre el DataFrame.
+
+    Cada cédula de jefe y cada documento se internan una sola vez como claves enteras;
+    los jefes (filas donde la cédula coincide con el documento) se identifican y las
+    filas se agrupan comparando esas claves. El orden de las familias es el de la
+    primera aparición de la cédula.
 
     Args:
-        ruta_archivo (str): La ruta al archivo XLSX.
+        df (pandas.DataFrame): Registros con la columna 'Nombre Completo Persona' ya calculada.
+        claves (tuple): Resultado de claves_familia(df) si ya se calculó; None para calcularlo.
 
     Returns:
         tuple: Una tupla conteniendo:
             - dict: Familias con múltiples miembros.
             - dict: Familias con un solo miembro (jefe de familia solo).
-            - list: Lista de advertencias encontradas (sin duplicados).
-            - int: Total de personas procesadas (después de omitir '99').
-            - pandas.DataFrame: DataFrame con información de personas repetidas (basado en 'Documento' y 'Nombre Completo').
+            - list: Advertencias de cédulas con múltiples jefes de familia.
+            - set: Documentos (como texto) de los jefes de familia identificados.
     """
-    try:
-        df = pd.read_excel(ruta_archivo)
-        df.columns = df.columns.str.strip()
-    except FileNotFoundError:
-        return "Error: El archivo '{ruta_archivo}' no fue encontrado.", {}, {}, 0, pd.DataFrame()
-    except Exception as e:
-        return f"Error al leer el archivo '{ruta_archivo}': {e}", {}, {}, 0, pd.DataFrame()
+    claves_jefe, claves_persona, textos = claves if claves is not None else claves_familia(df)
+    es_jefe = (claves_jefe == claves_persona) & (claves_jefe >= 0)
+
+    # Jefes por clave: cuántos hay y el primero de cada cédula (en orden de registro)
+    claves_jefes = claves_jefe[es_jefe]
+    cantidad_jefes = np.bincount(claves_jefes, minlength=len(textos))
+    filas_jefes = np.flatnonzero(es_jefe)
+    claves_con_jefe, primera_aparicion = np.unique(claves_jefes, return_index=True)
+    fila_primer_jefe = dict(zip(claves_con_jefe.tolist(), filas_jefes[primera_aparicion].tolist()))
+    nombres_completos = df['Nombre Completo Persona'].to_numpy(dtype=object)
+
+    multiples = es_jefe & (cantidad_jefes[claves_jefe] > 1)
+    nombres_cortos = df.loc[multiples, 'Primer Nombre'].astype(str).str.strip() + " " + df.loc[multiples, 'Primer Apellido'].astype(str).str.strip()
+    nombres_jefes_multiples = nombres_cortos.groupby(claves_jefe[multiples], sort=False).agg(", ".join).to_dict()
+    jefes_de_familia_documentos = set(textos[np.unique(claves_jefes)].tolist())
+
+    miembros_tabla = df[['Documento', 'Nombre Completo Persona', 'Parentesco']].copy()
+    miembros_tabla['Documento'] = textos_de_claves(claves_persona, textos)
 
     familias_multiples = {}
     familias_uno = {}
     advertencias = []
-    total_personas = len(df)
-    jefes_de_familia_documentos = set(df[df['Cedula de jefe(a) de Familia'].astype(str) == df['Documento'].astype(str)]['Documento'].astype(str).tolist())
+
+    # Solo las familias con exactamente un jefe generan tabla de miembros
+    con_jefe_unico = (claves_jefe >= 0) & (cantidad_jefes[claves_jefe] == 1)
+    familias_por_clave = dict(iter(miembros_tabla[con_jefe_unico].groupby(claves_jefe[con_jefe_unico], sort=False)))
+
+    for clave in pd.unique(claves_jefe[claves_jefe >= 0]).tolist():
+        jefe_cedula = textos[clave]
+        miembros = familias_por_clave.get(clave)
+        if miembros is not None:
+            destino = familias_multiples if len(miembros) > 1 else familias_uno
+            destino[jefe_cedula] = {"jefe": [jefe_cedula, nombres_completos[fila_primer_jefe[clave]]], "miembros": miembros}
+        elif clave in nombres_jefes_multiples:
+            advertencias.append([jefe_cedula, nombres_jefes_multiples[clave], "Múltiples jefes de familia identificados con la misma cédula."])
+
+    return familias_multiples, familias_uno, advertencias, jefes_de_familia_documentos
+
+def detectar_miembros_sin_jefe(df, jefes_de_familia_documentos, claves=None):
+    """
+    Detecta las personas cuya cédula de jefe no corresponde a ningún jefe registrado.
+
+    La validación es un anti-join sobre las claves enteras de los documentos: cada clave
+    distinta se busca una sola vez en el conjunto de jefes y las filas solo consultan un
+    arreglo booleano. Los duplicados se eliminan sobre el resultado columnar conservando
+    el orden de aparición en el registro.
+
+    Args:
+        df (pandas.DataFrame): Registros con la columna 'Nombre Completo Persona' ya calculada.
+        jefes_de_familia_documentos (set): Documentos (como texto) de los jefes de familia.
+        claves (tuple): Resultado de claves_familia(df) si ya se calculó; None para calcularlo.
+
+    Returns:
+        list: Advertencias únicas con la forma [cédula del jefe, nombre completo, documento].
+    """
+    claves_jefe, claves_persona, textos = claves if claves is not None else claves_familia(df)
+    jefe_registrado = np.append(textos.isin(jefes_de_familia_documentos), False)
+
+    # La clave -1 (cédula vacía) cae en la última posición, que nunca es un jefe registrado
+    sin_jefe = (claves_jefe >= 0) & ~jefe_registrado[claves_jefe] & (claves_jefe != claves_persona)
+
+    # Un documento vacío se muestra como 'nan', igual que con str()
+    huerfanos = pd.DataFrame({
+        'cedula': textos_de_claves(claves_jefe[sin_jefe], textos),
+        'nombre': df.loc[sin_jefe, 'Nombre Completo Persona'].to_numpy(),
+        'documento': pd.Series(textos_de_claves(claves_persona[sin_jefe], textos), dtype=object).fillna('nan').to_numpy()
+    }).drop_duplicates()
+
+    return huerfanos.values.tolist()
+
+def agregar_nombre_completo(df):
+    """Agrega la columna 'Nombre Completo Persona' a partir de los nombres y apellidos."""
     df['Nombre Completo Persona'] = df['Primer Nombre'].astype(str).str.strip() + ' ' + \
                                       df['Segundo Nombre'].fillna('').astype(str).str.strip() + ' ' + \
                                       df['Primer Apellido'].astype(str).str.strip() + ' ' + \
                                       df['Segundo Apellido'].fillna('').astype(str).str.strip()
-    df['Parentesco'].astype(str).str.strip()
-
-    for jefe_cedula_num in df['Cedula de jefe(a) de Familia'].unique():
-        jefe_cedula = str(jefe_cedula_num)
-        familia = df[df['Cedula de jefe(a) de Familia'].astype(str) == jefe_cedula].copy()
-
-        if not familia.empty:
-            familia['Cedula de jefe(a) de Familia'] = familia['Cedula de jefe(a) de Familia'].astype(str)
-            familia['Documento'] = familia['Documento'].astype(str)
-            jefe_df = familia[familia['Cedula de jefe(a) de Familia'] == familia['Documento']].copy()
-
-            if not jefe_df.empty:
-                jefe_df['Nombre Completo Jefe'] = jefe_df['Primer Nombre'].astype(str).str.strip() + ' ' + \
-                                                  jefe_df['Segundo Nombre'].fillna('').astype(str).str.strip() + ' ' + \
-                                                  jefe_df['Primer Apellido'].astype(str).str.strip() + ' ' + \
-                                                  jefe_df['Segundo Apellido'].fillna('').astype(str).str.strip()
-
-                if len(jefe_df) == 1:
-                    nombre_jefe = jefe_df.iloc[0]['Nombre Completo Jefe']
-                    miembros_tabla = familia[['Documento', 'Nombre Completo Persona', 'Parentesco']]
-                    if len(miembros_tabla) > 1:
-                        familias_multiples[jefe_cedula] = {"jefe": [jefe_df.iloc[0]['Documento'], nombre_jefe], "miembros": miembros_tabla}
-                    else:
-                        familias_uno[jefe_cedula] = {"jefe": [jefe_df.iloc[0]['Documento'], nombre_jefe], "miembros": miembros_tabla}
-
-                elif len(jefe_df) > 1:
-                    nombres_multiples_jefes = ", ".join(jefe_df['Primer Nombre'].astype(str).str.strip() + " " + jefe_df['Primer Apellido'].astype(str).str.strip())
-                    advertencias.append([jefe_cedula, nombres_multiples_jefes, "Múltiples jefes de familia identificados con la misma cédula."])
+    return df
 
-    # Validar personas sin jefe de familia referenciado correctamente
-    for index, row in df.iterrows():
-        cedula_jefe = str(row['Cedula de jefe(a) de Familia'])
-        documento_persona = str(row['Documento'])
-        nombre_completo_persona = row['Nombre Completo Persona']
-
-        if cedula_jefe and cedula_jefe not in ['nan', 'None', ''] and cedula_jefe not in jefes_de_familia_documentos and cedula_jefe != documento_persona:
-            advertencias.append([cedula_jefe, nombre_completo_persona, documento_persona])
-
-    # Eliminar duplicados en las advertencias
-    advertencias_unicas = []
-    seen_warnings = set()
-    for adv in advertencias:
-        warning_tuple = tuple(adv)
-        if warning_tuple not in seen_warnings:
-            advertencias_unicas.append(adv)
-            seen_warnings.add(warning_tuple)
-
-    # Detectar personas repetidas (basado en 'Documento' Y 'Nombre Completo Persona')
-    conteo_repetidos = df.groupby(['Nombre Completo Persona', 'Documento']).size().reset_index(name='Cantidad')
-    personas_repetidas_con_mismo_doc = conteo_repetidos[conteo_repetidos['Cantidad'] > 1]
-
-    conteo_nombre_repetido_diff_doc = df.groupby('Nombre Completo Persona')['Documento'].nunique().reset_index(name='Cantidad_Docs')
-    nombres_repetidos_diff_doc = conteo_nombre_repetido_diff_doc[conteo_nombre_repetido_diff_doc['Cantidad_Docs'] > 1]['Nombre Completo Persona'].tolist()
-    personas_mismo_nombre_diff_doc_df = df[df['Nombre Completo Persona'].isin(nombres_repetidos_diff_doc)].copy()
+def leer_registros(ruta_archivo):
+    """Lee el cuestionario completo con tipos compactos y la columna 'Nombre Completo Persona'."""
+    df = leer_excel(ruta_archivo)
+    df.columns = df.columns.str.strip()
+    aplicar_esquema(df)
+    return agregar_nombre_completo(df)
+
+def resumir_personas(df):
+    """
+    Reduce los registros a una fila por combinación de nombre completo y documento.
+
+    Returns:
+        pandas.DataFrame: Primera aparición de cada combinación (con su cédula de jefe)
+        y la columna 'Cantidad' con el número de veces que aparece.
+    """
+    claves = ['Nombre Completo Persona', 'Documento']
+    grupos = df.groupby(claves, sort=False, dropna=False)
+    resumen = grupos.head(1)[['Cedula de jefe(a) de Familia'] + claves].copy()
+    resumen['Cantidad'] = grupos['Cedula de jefe(a) de Familia'].transform('size')[resumen.index]
+    return resumen
+
+def detectar_personas_repetidas(resumen):
+    """
+    Detecta personas repetidas (basado en 'Documento' Y 'Nombre Completo Persona') y
+    nombres registrados con documentos distintos.
+
+    Args:
+        resumen (pandas.DataFrame): Resultado de resumir_personas, en orden de primera aparición.
+
+    Returns:
+        pandas.DataFrame: DataFrame con información de personas repetidas.
+    """
+    con_nombre_y_doc = resumen['Nombre Completo Persona'].notna() & resumen['Documento'].notna()
+    personas_repetidas_con_mismo_doc = resumen[con_nombre_y_doc & (resumen['Cantidad'] > 1)] \
+        .sort_values(['Nombre Completo Persona', 'Documento'])[['Nombre Completo Persona', 'Documento', 'Cantidad']]
+
+    conteo_nombre_repetido_diff_doc = resumen[con_nombre_y_doc].groupby('Nombre Completo Persona')['Documento'].nunique()
+    nombres_repetidos_diff_doc = conteo_nombre_repetido_diff_doc[conteo_nombre_repetido_diff_doc > 1].index
+    personas_mismo_nombre_diff_doc_df = resumen[resumen['Nombre Completo Persona'].isin(nombres_repetidos_diff_doc)]
 
     personas_repetidas_df = pd.concat([
         personas_repetidas_con_mismo_doc.rename(columns={'Documento': 'Cedula Persona'}),
@@ -98,11 +167,194 @@ def procesar_datos(ruta_archivo):
         # Agrupar para mostrar la cantidad de repeticiones por nombre completo (con diferentes documentos)
         nombre_repetido_counts = personas_repetidas_df.groupby('Nombre Completo Persona')['Cedula Persona'].nunique().reset_index(name='Cantidad_Docs_Repetido')
         personas_repetidas_df = pd.merge(personas_repetidas_df, nombre_repetido_counts, on='Nombre Completo Persona', how='left')
-        personas_repetidas_df.rename(columns={'Cedula Persona': 'Cedula Persona'}, inplace=True)
         personas_repetidas_df = personas_repetidas_df[['Cedula de jefe(a) de Familia', 'Nombre Completo Persona', 'Cedula Persona', 'Cantidad_Docs_Repetido']].drop_duplicates(subset=['Nombre Completo Persona', 'Cedula Persona'])
-        
+
         # Formatear las columnas de cédula para evitar notación científica y manejar NaN
-        personas_repetidas_df['Cedula de jefe(a) de Familia'] = personas_repetidas_df['Cedula de jefe(a) de Familia'].fillna('No se encontro').astype(str).str.replace(r'\.0$', '', regex=True)
+        personas_repetidas_df['Cedula de jefe(a) de Familia'] = personas_repetidas_df['Cedula de jefe(a) de Familia'].astype(object).fillna('No se encontro').astype(str).str.replace(r'\.0$', '', regex=True)
         personas_repetidas_df['Cedula Persona'] = personas_repetidas_df['Cedula Persona'].astype(str).str.replace(r'\.0$', '', regex=True)
 
-    return familias_multiples, familias_uno, advertencias_unicas, total_personas, personas_repetidas_df
\ No newline at end of file
+    return personas_repetidas_df
+
+class AnalisisIncremental:
+    """
+    Análisis de familias, advertencias y repetidos que consume el registro por lotes.
+
+    Cada lote se resume al agregarlo y luego puede descartarse: solo se conservan los
+    campos necesarios para las tablas de miembros, los jefes por cédula y el conteo de
+    cada combinación de nombre y documento. Así la memoria depende del tamaño del lote
+    más esos índices, y no de todas las columnas del cuestionario.
+    """
+
+    def __init__(self):
+        self.total_personas = 0
+        self._miembros = {}   # cédula de jefe -> [(fila, documento, nombre completo, parentesco)]
+        self._jefes = {}      # cédula de jefe -> [(documento, nombre completo, primer nombre y apellido)]
+        self._personas = {}   # (nombre completo, texto del documento) -> [cédula de jefe, cantidad]
+
+    def agregar_lote(self, lote):
+        """Incorpora un lote de registros (DataFrame con las columnas del cuestionario)."""
+        lote = lote.copy()
+        lote.columns = lote.columns.str.strip()
+        aplicar_esquema(lote)
+        agregar_nombre_completo(lote)
+        self.total_personas += len(lote)
+
+        cedulas_jefe = texto_documento(lote['Cedula de jefe(a) de Familia'])
+        documentos = texto_documento(lote['Documento'])
+        es_jefe = cedulas_jefe == documentos
+
+        nombres_cortos = lote.loc[es_jefe, 'Primer Nombre'].astype(str).str.strip() + " " + lote.loc[es_jefe, 'Primer Apellido'].astype(str).str.strip()
+        for cedula, documento, nombre, nombre_corto in zip(cedulas_jefe[es_jefe], documentos[es_jefe], lote.loc[es_jefe, 'Nombre Completo Persona'], nombres_cortos):
+            self._jefes.setdefault(cedula, []).append((documento, nombre, nombre_corto))
+
+        # Las filas sin cédula de jefe no pertenecen a ninguna familia
+        con_cedula = cedulas_jefe.notna()
+        for cedula, fila, documento, nombre, parentesco in zip(cedulas_jefe[con_cedula], lote.index[con_cedula], documentos[con_cedula], lote.loc[con_cedula, 'Nombre Completo Persona'], lote.loc[con_cedula, 'Parentesco']):
+            self._miembros.setdefault(cedula, []).append((fila, documento, nombre, parentesco))
+
+        # Cada lote puede tener los documentos como Int64 o como texto (según sus valores), así
+        # que las personas se agrupan por el texto canónico del documento, igual en todos los lotes
+        resumen = resumir_personas(lote.assign(**{'Cedula de jefe(a) de Familia': cedulas_jefe, 'Documento': documentos})).astype(object)
+        resumen = resumen.where(resumen.notna(), None)
+        for cedula, nombre, documento, cantidad in resumen.itertuples(index=False):
+            persona = self._personas.get((nombre, documento))
+            if persona is None:
+                self._personas[(nombre, documento)] = [cedula, cantidad]
+            else:
+                persona[1] += cantidad
+
+    def resumen_personas(self):
+        """Equivalente de resumir_personas para todos los lotes agregados."""
+        resumen = pd.DataFrame(
+            [(cedula, nombre, documento, cantidad) for (nombre, documento), (cedula, cantidad) in self._personas.items()],
+            columns=COLUMNAS_RESUMEN_PERSONAS
+        )
+        # Los documentos vuelven al tipo que tendrían en la hoja completa (Int64 si todos son números)
+        for columna in ['Cedula de jefe(a) de Familia', 'Documento']:
+            resumen[columna] = normalizar_documento(resumen[columna])
+        return resumen
+
+    def resultados(self):
+        """Devuelve los mismos cinco resultados que procesar_datos."""
+        familias_multiples = {}
+        familias_uno = {}
+        advertencias = []
+        jefes_de_familia_documentos = {documento for jefes in self._jefes.values() for documento, _, _ in jefes}
+
+        for jefe_cedula, filas in self._miembros.items():
+            jefes = self._jefes.get(jefe_cedula)
+            if not jefes:
+                continue
+            if len(jefes) == 1:
+                indice, documento, nombre, parentesco = zip(*filas)
+                miembros = pd.DataFrame({'Documento': documento, 'Nombre Completo Persona': nombre, 'Parentesco': parentesco}, index=list(indice))
+                destino = familias_multiples if len(miembros) > 1 else familias_uno
+                destino[jefe_cedula] = {"jefe": [jefes[0][0], jefes[0][1]], "miembros": miembros}
+            else:
+                advertencias.append([jefe_cedula, ", ".join(nombre_corto for _, _, nombre_corto in jefes), "Múltiples jefes de familia identificados con la misma cédula."])
+
+        # Validar personas sin jefe de familia referenciado correctamente
+        huerfanos = []
+        for jefe_cedula, filas in self._miembros.items():
+            if jefe_cedula in jefes_de_familia_documentos:
+                continue
+            # Un documento vacío se muestra como 'nan', igual que en detectar_miembros_sin_jefe
+            huerfanos.extend((fila, [jefe_cedula, nombre, documento if isinstance(documento, str) else 'nan']) for fila, documento, nombre, _ in filas if documento != jefe_cedula)
+        vistas = {tuple(adv) for adv in advertencias}
+        for _, adv in sorted(huerfanos, key=lambda h: h[0]):
+            if tuple(adv) not in vistas:
+                advertencias.append(adv)
+                vistas.add(tuple(adv))
+
+        personas_repetidas_df = detectar_personas_repetidas(self.resumen_personas())
+
+        return familias_multiples, familias_uno, advertencias, self.total_personas, personas_repetidas_df
+
+def _resultado_con_error(mensaje, con_personas):
+    """Resultado de procesar_datos cuando el análisis falla (el mensaje va en el primer elemento)."""
+    resultado = mensaje, {}, {}, 0, pd.DataFrame()
+    return (*resultado, pd.DataFrame(columns=COLUMNAS_RESUMEN_PERSONAS)) if con_personas else resultado
+
+@medir_fase('procesar_datos')
+def procesar_datos(ruta_archivo, tamano_lote=None, incremental=False, ruta_manifiesto=None, con_personas=False):
+    """
+    Procesa un archivo XLSX para analizar familias, generar advertencias
+    y detectar personas repetidas (basado en 'Documento' y 'Nombre Completo'),
+    omitiendo personas con cédula '99'.
+
+    Args:
+        ruta_archivo (str): La ruta al archivo XLSX.
+        tamano_lote (int): Si se indica, el archivo se lee por lotes de ese número de
+            filas con AnalisisIncremental en lugar de cargar la hoja completa No se
+            combina con incremental (el manifiesto necesita la hoja completa).
+        incremental (bool): Si es True el índice de familias solo recalcula las familias
+            tocadas desde la ejecución anterior, según el manifiesto de huellas por fila. Las
+            advertencias de personas sin jefe y las personas repetidas se calculan igual sobre
+            la hoja completa (son pasadas vectorizadas baratas frente al índice).
+        ruta_manifiesto (str): Manifiesto a usar en modo incremental; None usa uno por archivo
+            dentro de DIRECTORIO_MANIFIESTOS.
+        con_personas (bool): Si es True se agrega un sexto elemento con una fila por combinación
+            de nombre completo y documento (resumir_personas), tomada de la misma lectura.
+
+    Returns:
+        tuple: Una tupla conteniendo:
+            - dict: Familias con múltiples miembros.
+            - dict: Familias con un solo miembro (jefe de familia solo).
+            - list: Lista de advertencias encontradas (sin duplicados).
+            - int: Total de personas procesadas (después de omitir '99').
+            - pandas.DataFrame: DataFrame con información de personas repetidas (basado en 'Documento' y 'Nombre Completo').
+    """
+    if tamano_lote and incremental:
+        return _resultado_con_error("Error: la lectura por lotes (tamano_lote) no se puede combinar con el modo incremental.", con_personas)
+
+    if tamano_lote:
+        try:
+            analisis = AnalisisIncremental()
+            with Fase('analisis_por_lotes', detalle=os.path.basename(ruta_archivo)) as fase:
+                for lote in leer_excel_por_lotes(ruta_archivo, tamano_lote):
+                    analisis.agregar_lote(lote)
+                fase.filas = analisis.total_personas
+            with Fase('resultados_por_lotes', analisis.total_personas):
+                resultado = analisis.resultados()
+            return (*resultado, analisis.resumen_personas()) if con_personas else resultado
+        except FileNotFoundError:
+            return _resultado_con_error(f"Error: El archivo '{ruta_archivo}' no fue encontrado.", con_personas)
+        except Exception as e:
+            return _resultado_con_error(f"Error al leer el archivo '{ruta_archivo}': {e}", con_personas)
+
+    try:
+        df = leer_registros(ruta_archivo)
+    except FileNotFoundError:
+        return _resultado_con_error(f"Error: El archivo '{ruta_archivo}' no fue encontrado.", con_personas)
+    except Exception as e:
+        return _resultado_con_error(f"Error al leer el archivo '{ruta_archivo}': {e}", con_personas)
+
+    total_personas = len(df)
+
+    with Fase('claves_documento', total_personas):
+        claves = claves_familia(df)
+
+    if incremental:
+        try:
+            with Fase('indice_familias_incremental', total_personas):
+                familias_multiples, familias_uno, advertencias, jefes_de_familia_documentos, cambios = \
+                    actualizar_indice_familias(df, ruta_manifiesto or ruta_manifiesto_por_defecto(ruta_archivo))
+        except Exception as e:
+            return _resultado_con_error(f"Error en el análisis incremental de '{ruta_archivo}': {e}", con_personas)
+        print(f"-> Análisis incremental: {cambios['filas_nuevas']} filas nuevas o modificadas, "
+              f"{cambios['filas_eliminadas']} eliminadas, {cambios['familias_recalculadas']} familias recalculadas.")
+    else:
+        with Fase('indice_familias', total_personas):
+            familias_multiples, familias_uno, advertencias, jefes_de_familia_documentos = construir_indice_familias(df, claves)
+
+    # Validar personas sin jefe de familia referenciado correctamente
+    with Fase('advertencias', total_personas):
+        advertencias_jefes = {tuple(adv) for adv in advertencias}
+        advertencias_unicas = advertencias + [adv for adv in detectar_miembros_sin_jefe(df, jefes_de_familia_documentos, claves) if tuple(adv) not in advertencias_jefes]
+
+    with Fase('personas_repetidas', total_personas):
+        resumen = resumir_personas(df)
+        personas_repetidas_df = detectar_personas_repetidas(resumen)
+
+    resultado = familias_multiples, familias_uno, advertencias_unicas, total_personas, personas_repetidas_df
+    return (*resultado, resumen) if con_personas else resultado
\ No newline at end of file
@@ -1,13 +1,44 @@
+import numpy as np
 import pandas as pd
 from fpdf import FPDF, XPos, YPos
 import os
+from typing import NamedTuple
+from .cache_excel import leer_excel
+from .esquema import aplicar_esquema, claves_documento
+from .lectura_por_lotes import leer_columnas_por_lotes
+from .metricas import Fase, medir_fase
+from .reportes.fuentes_pdf import agregar_fuentes
+from .reportes.tablas_pdf import dibujar_tabla, formatear_filas
+
+class MiembroAntiguo(NamedTuple):
+    """Persona de la base de datos antigua."""
+    documento: str
+    nombre: str
+
+class MiembroNuevo(NamedTuple):
+    """Persona con su parentesco en la nueva base de datos ('No encontrado' si no está registrada)."""
+    documento: str
+    nombre: str
+    parentesco: str
+
+class AdvertenciaAntigua(NamedTuple):
+    """Persona de una familia antigua sin jefe de familia correspondiente en la nueva base de datos."""
+    familia: object
+    documento: str
+    nombre: str
+    parentesco: str
+
+ENCABEZADOS_MIEMBRO_ANTIGUO = ['Documento', 'Nombre Completo']
+ENCABEZADOS_MIEMBRO_NUEVO = ['Documento', 'Nombre Completo', 'Parentesco (Nueva DB)']
+
+COLUMNAS_VIEJA = ['FAMILIA', 'NUMERO DOCUMENTO', 'NOMBRE', 'APELLIDOS']
+COLUMNAS_NUEVA = ['Cedula de jefe(a) de Familia', 'Documento', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido', 'Parentesco']
 
 class PDFReportAvanzado(FPDF):
     def __init__(self, title):
         super().__init__(orientation='P', unit='mm', format='A4')
         self.title = title
-        self.add_font('DejaVu', '', 'fonts/DejaVuSans.ttf')
-        self.add_font('DejaVu', 'B', 'fonts/DejaVuSans-Bold.ttf')
+        agregar_fuentes(self)
         self.set_font('DejaVu', size=10)
 
     def header(self):
@@ -26,24 +57,17 @@ class PDFReportAvanzado(FPDF):
         self.ln(2)
 
     def create_table_from_dataframe(self, df: pd.DataFrame, col_widths=None):
-        if df.empty:
+        self.create_table(list(df.columns), df.itertuples(index=False), col_widths)
+
+    def create_table(self, headers, rows, col_widths=None):
+        """Crea una tabla a partir de encabezados y filas (secuencias de valores, por ejemplo registros)."""
+        rows = list(rows)
+        if not rows:
             self.cell(0, 10, "No hay datos para mostrar en esta tabla.", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
             return
 
-        self.set_font('DejaVu', 'B', 10)
-        cols = df.columns
-        if col_widths is None:
-            col_widths = [self.epw / len(cols)] * len(cols)
-
-        for i, col in enumerate(cols):
-            self.cell(col_widths[i], 7, col, border=1, align='C', fill=True)
-        self.ln()
         self.set_font('DejaVu', '', 10)
-
-        for index, row in df.iterrows():
-            for i, col in enumerate(cols):
-                self.cell(col_widths[i], 6, str(row[col]), border=1, align='L')
-            self.ln()
+        dibujar_tabla(self, headers, formatear_filas(rows), col_widths)
         self.ln(2)
 
     def print_resumen(self, resumen):
@@ -56,6 +80,7 @@ class PDFReportAvanzado(FPDF):
         self.chapter_body(f"Número total de personas en la base de datos antigua: {resumen['total_personas_vieja']}")
         self.chapter_body(f"Número total de personas en la nueva base de datos: {resumen['total_personas_nueva']}")
         self.chapter_body(f"Número total de personas faltantes de la base de datos antigua en la nueva: {resumen['total_personas_faltantes']}")
+        self.chapter_body(f"Familias antiguas con miembros faltantes en la nueva base de datos: {resumen['total_familias_con_faltantes']}")
         self.ln(5)
 
     def print_reporte_familias(self, reporte_familias):
@@ -76,35 +101,20 @@ class PDFReportAvanzado(FPDF):
             self.set_font('DejaVu', 'B', 10)
             self.cell(0, 6, "Miembros registrados en la base de datos antigua:", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
             self.set_font('DejaVu', '', 10)
-            df_miembros_vieja = pd.DataFrame([{'Documento': doc.split('(')[-1][:-1], 'Nombre Completo': doc.split('(')[0].strip()} for doc in detalles['miembros_vieja']])
-            self.create_table_from_dataframe(df_miembros_vieja, col_widths=[self.epw * 0.3, self.epw * 0.7])
+            self.create_table(ENCABEZADOS_MIEMBRO_ANTIGUO, detalles['miembros_vieja'], col_widths=[self.epw * 0.3, self.epw * 0.7])
 
             # Tabla de Miembros Encontrados en la Base de Datos Nueva
             self.set_font('DejaVu', 'B', 10)
             self.cell(0, 6, "Miembros encontrados en la nueva base de datos:", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
             self.set_font('DejaVu', '', 10)
-            miembros_nueva_data = []
-            for miembro in detalles['miembros_nueva']:
-                nombre, parentesco_info = miembro.split(' - Parentesco: ')
-                documento = nombre.split('(')[-1][:-1]
-                nombre_completo = nombre.split('(')[0].strip()
-                miembros_nueva_data.append({'Documento': documento, 'Nombre Completo': nombre_completo, 'Parentesco (Nueva DB)': parentesco_info})
-            df_miembros_nueva = pd.DataFrame(miembros_nueva_data)
-            self.create_table_from_dataframe(df_miembros_nueva, col_widths=[self.epw * 0.25, self.epw * 0.45, self.epw * 0.3])
+            self.create_table(ENCABEZADOS_MIEMBRO_NUEVO, detalles['miembros_nueva'], col_widths=[self.epw * 0.25, self.epw * 0.45, self.epw * 0.3])
 
             # Tabla de Miembros Faltantes
             if detalles['faltantes']:
                 self.set_font('DejaVu', 'B', 10)
                 self.cell(0, 6, "Miembros faltantes en la nueva base de datos:", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
                 self.set_font('DejaVu', '', 10)
-                faltantes_data = []
-                for faltante in detalles['faltantes']:
-                    nombre, parentesco_info = faltante.split(' - Parentesco (Nueva DB): ')
-                    documento = nombre.split('(')[-1][:-1]
-                    nombre_completo = nombre.split('(')[0].strip()
-                    faltantes_data.append({'Documento': documento, 'Nombre Completo': nombre_completo, 'Parentesco (Nueva DB)': parentesco_info})
-                df_faltantes = pd.DataFrame(faltantes_data)
-                self.create_table_from_dataframe(df_faltantes, col_widths=[self.epw * 0.25, self.epw * 0.45, self.epw * 0.3])
+                self.create_table(ENCABEZADOS_MIEMBRO_NUEVO, detalles['faltantes'], col_widths=[self.epw * 0.25, self.epw * 0.45, self.epw * 0.3])
             else:
                 self.set_font('DejaVu', 'B', 10)
                 self.cell(0, 6, "No hay miembros faltantes para esta familia.", new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C')
@@ -118,135 +128,191 @@ class PDFReportAvanzado(FPDF):
             # Agrupar advertencias por Familia Antigua (ID)
             familias = {}
             for adv in advertencias:
-                familia_id = adv['Familia Antigua (ID)']
-                if familia_id not in familias:
-                    familias[familia_id] = []
-                # Extraer documento y nombre completo
-                persona = adv['Persona (Antigua)']
-                doc = persona.split('(')[-1][:-1]  # Obtener documento entre paréntesis
-                nombre = persona.split('(')[0].strip()  # Obtener nombre antes del paréntesis
-                familias[familia_id].append({'Documento': doc, 'Nombre Completo': nombre})
-            
+                familias.setdefault(adv.familia, []).append((adv.documento, adv.nombre))
+
             # Crear una tabla por cada familia
             for familia_id, miembros in familias.items():
                 self.set_font('DejaVu', 'B', 10)
                 self.cell(0, 6, f"Familia Antigua (ID): {familia_id}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
                 self.set_font('DejaVu', '', 10)
-                
-                # Crear DataFrame para la tabla
-                df_miembros = pd.DataFrame(miembros)
-                self.create_table_from_dataframe(
-                    df_miembros, 
+                self.create_table(
+                    ENCABEZADOS_MIEMBRO_ANTIGUO,
+                    miembros,
                     col_widths=[self.epw * 0.3, self.epw * 0.7]
                 )
                 self.ln(2)  # Espacio entre tablas
-            
+
         elif 'error' in advertencias:
             self.chapter_body(advertencias['error'])
 
-def comparar_bases_de_datos(ruta_vieja, ruta_nueva):
+def _ultimo_por_clave(claves, valores):
+    """Tabla clave -> valor; con claves repetidas gana la última fila, igual que al construir un dict."""
+    tabla = pd.Series(np.asarray(valores, dtype=object), index=claves)
+    return tabla[~tabla.index.duplicated(keep='last')]
+
+def _buscar_por_clave(tabla, claves, por_defecto='No encontrado'):
+    """Valor de cada clave en una tabla de _ultimo_por_clave; por_defecto para las claves que no están."""
+    return np.append(tabla.to_numpy(dtype=object), por_defecto)[tabla.index.get_indexer(claves)]
+
+def comparar_tablas(df_vieja, df_nueva):
+    """
+    Compara cada familia de la base de datos antigua con la familia de su jefe en la nueva.
+
+    La comparación se hace con operaciones por columnas sobre las claves enteras de los
+    documentos: un join de los miembros antiguos con los jefes de la nueva base (el jefe de
+    cada familia antigua es su primer miembro que es jefe en la nueva), un anti-join con las
+    parejas (jefe, miembro) de la nueva base para los faltantes y conteos agrupados para los
+    totales. El resultado se arma en una sola pasada sobre los miembros antiguos ordenados
+    por familia.
+
+    Args:
+        df_vieja (pandas.DataFrame): Base de datos antigua con las columnas COLUMNAS_VIEJA.
+        df_nueva (pandas.DataFrame): Cuestionario con las columnas COLUMNAS_NUEVA.
+
+    Returns:
+        dict: Totales (como texto), 'reporte_por_familia' con el jefe, los miembros antiguos,
+        los nuevos y los faltantes de cada familia antigua con jefe en la nueva base, y
+        'advertencias_viejas' con los miembros de las familias sin jefe.
+    """
+    df_nueva = df_nueva.rename(columns=str.strip)
+
+    # Solo las columnas que usa la comparación, con documentos normalizados y tipos compactos
+    df_vieja = aplicar_esquema(df_vieja[COLUMNAS_VIEJA].copy())
+    df_vieja.columns = ['FAMILIA_VIEJA', 'DOCUMENTO_VIEJO', 'NOMBRE_VIEJA', 'APELLIDOS_VIEJA']
+    df_vieja['NOMBRE_COMPLETO_VIEJA'] = df_vieja['NOMBRE_VIEJA'].str.strip() + ' ' + df_vieja['APELLIDOS_VIEJA'].str.strip()
+
+    df_nueva = aplicar_esquema(df_nueva[COLUMNAS_NUEVA].copy())
+    df_nueva.columns = ['JEFE_FAMILIA_NUEVA', 'DOCUMENTO_NUEVO', 'NOMBRE_NUEVO_P', 'NOMBRE_NUEVO_S', 'APELLIDO_NUEVO_P', 'APELLIDO_NUEVO_S', 'PARENTESCO_NUEVO']
+    df_nueva['NOMBRE_COMPLETO_NUEVA'] = (df_nueva['NOMBRE_NUEVO_P'].map(str) + ' ' + df_nueva['NOMBRE_NUEVO_S'].fillna('').map(str) + ' ' +
+                                         df_nueva['APELLIDO_NUEVO_P'].map(str) + ' ' + df_nueva['APELLIDO_NUEVO_S'].fillna('').map(str)).str.strip()
+
+    # Los documentos de ambas bases y las cédulas de jefe nuevas comparten un espacio de claves enteras
+    (claves_vieja, claves_nueva, claves_jefe_nueva), textos = claves_documento(df_vieja['DOCUMENTO_VIEJO'], df_nueva['DOCUMENTO_NUEVO'], df_nueva['JEFE_FAMILIA_NUEVA'])
+    texto_clave = np.append(textos.to_numpy(dtype=object), np.nan) # La clave -1 (documento vacío) se muestra como nan
+    nombre_vieja = _ultimo_por_clave(claves_vieja, df_vieja['NOMBRE_COMPLETO_VIEJA'])
+    nombre_nueva = _ultimo_por_clave(claves_nueva, df_nueva['NOMBRE_COMPLETO_NUEVA'])
+    parentesco_nueva = _ultimo_por_clave(claves_nueva, df_nueva['PARENTESCO_NUEVO'])
+
+    # Miembros antiguos con familia, ordenados por familia y en orden de registro dentro de cada una
+    vieja = pd.DataFrame({'familia': df_vieja['FAMILIA_VIEJA'].to_numpy(), 'clave': claves_vieja})
+    vieja = vieja[vieja['familia'].notna()].sort_values('familia', kind='stable', ignore_index=True)
+
+    # Parejas (jefe, miembro) de la nueva base, sin repetir y en orden de registro
+    pares_nueva = pd.DataFrame({'clave_jefe': claves_jefe_nueva, 'clave': claves_nueva}).drop_duplicates(ignore_index=True)
+    jefes_nueva = pd.DataFrame({'clave': pares_nueva.loc[pares_nueva['clave_jefe'] >= 0, 'clave_jefe'].unique()})
+
+    # Join de los miembros antiguos con los jefes nuevos: el primero de cada familia es su jefe en la nueva base
+    jefe_por_familia = vieja.merge(jefes_nueva, on='clave').drop_duplicates('familia').rename(columns={'clave': 'clave_jefe'})
+    vieja = vieja.merge(jefe_por_familia, on='familia', how='left')
+    vieja['clave_jefe'] = vieja['clave_jefe'].fillna(-1).astype(np.int64)
+    con_jefe = vieja['clave_jefe'] >= 0
+
+    # Anti-join: miembros antiguos que no aparecen en la familia de su jefe en la nueva base
+    en_familia_nueva = vieja.merge(pares_nueva, on=['clave_jefe', 'clave'], how='left', indicator=True)['_merge'].to_numpy() == 'both'
+    vieja['faltante'] = con_jefe & ~en_familia_nueva
+
+    # Totales por conteos agrupados
+    faltantes_por_familia = vieja[con_jefe].groupby('familia')['faltante'].sum()
+    personas_vieja_total = len(df_vieja)
+    personas_nueva_total = len(df_nueva)
+
+    vieja['documento'] = texto_clave[vieja['clave'].to_numpy()]
+    vieja['nombre'] = _buscar_por_clave(nombre_vieja, vieja['clave'])
+    vieja['parentesco'] = _buscar_por_clave(parentesco_nueva, vieja['clave'])
+
+    # Miembros de la nueva base de cada jefe encontrado, en orden de registro
+    pares_jefes = pares_nueva[pares_nueva['clave_jefe'].isin(jefe_por_familia['clave_jefe'])]
+    miembros_por_jefe_nueva = {}
+    for clave_jefe, miembro in zip(pares_jefes['clave_jefe'].tolist(), map(MiembroNuevo._make, zip(
+            texto_clave[pares_jefes['clave'].to_numpy()], _buscar_por_clave(nombre_nueva, pares_jefes['clave']), _buscar_por_clave(parentesco_nueva, pares_jefes['clave'])))):
+        miembros_por_jefe_nueva.setdefault(clave_jefe, []).append(miembro)
+
+    # Resultado en una sola pasada sobre los miembros antiguos
+    reporte_por_familia = {}
+    advertencias_viejas = []
+    columnas = [vieja[columna].tolist() for columna in ['familia', 'clave_jefe', 'documento', 'nombre', 'parentesco', 'faltante']]
+    for familia_vieja, clave_jefe, documento, nombre, parentesco, faltante in zip(*columnas):
+        if clave_jefe < 0:
+            advertencias_viejas.append(AdvertenciaAntigua(familia_vieja, documento, nombre, parentesco))
+            continue
+        detalles = reporte_por_familia.get(familia_vieja)
+        if detalles is None:
+            detalles = reporte_por_familia[familia_vieja] = {
+                'jefe_nueva_info': {'documento': texto_clave[clave_jefe], 'nombre': nombre_nueva.get(clave_jefe, 'No encontrado')},
+                'miembros_vieja': [],
+                'miembros_nueva': list(miembros_por_jefe_nueva[clave_jefe]),
+                'faltantes': []
+            }
+        detalles['miembros_vieja'].append(MiembroAntiguo(documento, nombre))
+        if faltante:
+            detalles['faltantes'].append(MiembroNuevo(documento, nombre, parentesco))
+
+    return {
+        'total_familias_comparadas_vieja': str(vieja['familia'].nunique()),
+        'total_familias_comparadas': str(pares_nueva['clave_jefe'].nunique()), # Jefes únicos de la nueva DB
+        'total_personas_vieja': str(personas_vieja_total),
+        'total_personas_nueva': str(personas_nueva_total),
+        'total_personas_faltantes': str(int(faltantes_por_familia.sum())),
+        'total_familias_con_faltantes': str(int((faltantes_por_familia > 0).sum())),
+        'reporte_por_familia': reporte_por_familia,
+        'advertencias_viejas': advertencias_viejas
+    }
+
+@medir_fase('comparacion_bases')
+def comparar_bases_de_datos(ruta_vieja, ruta_nueva, tamano_lote=None):
+    """
+    Lee las dos bases de datos y compara cada familia antigua con la familia de su jefe en
+    la nueva (ver comparar_tablas).
+
+    Args:
+        ruta_vieja (str): La ruta a la base de datos antigua.
+        ruta_nueva (str): La ruta al archivo XLSX del cuestionario.
+        tamano_lote (int): Si se indica, los archivos se leen por lotes de ese número de filas.
+
+    Returns:
+        dict: Totales (como texto), 'reporte_por_familia' con el jefe, los miembros antiguos,
+        los nuevos y los faltantes de cada familia antigua con jefe en la nueva base, y
+        'advertencias_viejas' con los miembros de las familias sin jefe; {'error': ...} si falla.
+    """
     try:
-        df_vieja = pd.read_excel(ruta_vieja)
-        df_nueva = pd.read_excel(ruta_nueva)
-
-        df_nueva.columns = df_nueva.columns.str.strip()
-
-        df_vieja = df_vieja[['FAMILIA', 'NUMERO DOCUMENTO', 'NOMBRE', 'APELLIDOS']].copy()
-        df_vieja.columns = ['FAMILIA_VIEJA', 'DOCUMENTO_VIEJO', 'NOMBRE_VIEJA', 'APELLIDOS_VIEJA']
-        df_vieja['DOCUMENTO_VIEJO'] = df_vieja['DOCUMENTO_VIEJO'].astype(str).str.strip()
-        df_vieja['NOMBRE_COMPLETO_VIEJA'] = df_vieja['NOMBRE_VIEJA'].str.strip() + ' ' + df_vieja['APELLIDOS_VIEJA'].str.strip()
-        df_vieja_doc_nombre = df_vieja.set_index('DOCUMENTO_VIEJO')['NOMBRE_COMPLETO_VIEJA'].to_dict()
-
-        df_nueva = df_nueva[['Cedula de jefe(a) de Familia', 'Documento', 'Primer Nombre', 'Segundo Nombre', 'Primer Apellido', 'Segundo Apellido', 'Parentesco']].copy()
-        df_nueva.columns = ['JEFE_FAMILIA_NUEVA', 'DOCUMENTO_NUEVO', 'NOMBRE_NUEVO_P', 'NOMBRE_NUEVO_S', 'APELLIDO_NUEVO_P', 'APELLIDO_NUEVO_S', 'PARENTESCO_NUEVO']
-        df_nueva['DOCUMENTO_NUEVO'] = df_nueva['DOCUMENTO_NUEVO'].astype(str).str.strip()
-        df_nueva['NOMBRE_COMPLETO_NUEVA'] = df_nueva[['NOMBRE_NUEVO_P', 'NOMBRE_NUEVO_S', 'APELLIDO_NUEVO_P', 'APELLIDO_NUEVO_S']].apply(lambda row: f"{row['NOMBRE_NUEVO_P']} {row['NOMBRE_NUEVO_S'] if pd.notna(row['NOMBRE_NUEVO_S']) else ''} {row['APELLIDO_NUEVO_P']} {row['APELLIDO_NUEVO_S'] if pd.notna(row['APELLIDO_NUEVO_S']) else ''}".strip(), axis=1)
-        df_nueva_doc_nombre_completo = df_nueva.set_index('DOCUMENTO_NUEVO')['NOMBRE_COMPLETO_NUEVA'].to_dict()
-        df_nueva_doc_parentesco = df_nueva.set_index('DOCUMENTO_NUEVO')['PARENTESCO_NUEVO'].to_dict()
-        df_nueva_jefes_set = set(df_nueva['JEFE_FAMILIA_NUEVA'].astype(str).unique()) # Conjunto de cédulas de jefes de la nueva DB
-
-        df_vieja_grouped = df_vieja.groupby('FAMILIA_VIEJA')['DOCUMENTO_VIEJO'].apply(list).to_dict()
-        df_vieja_info = df_vieja.set_index('DOCUMENTO_VIEJO')['NOMBRE_COMPLETO_VIEJA'].to_dict()
-
-        familias_comparadas_vieja = set(df_vieja_grouped.keys())
-        familias_comparadas = set(df_nueva['JEFE_FAMILIA_NUEVA'].astype(str).unique()) # Ahora comparamos por los jefes únicos de la nueva DB
-        personas_vieja_total = len(df_vieja)
-        personas_nueva_total = len(df_nueva)
-        personas_faltantes_total = 0
-        lista_personas_faltantes = []
-        reporte_por_familia = {}
-        advertencias_viejas = []
-
-        for familia_vieja, miembros_vieja_docs in df_vieja_grouped.items():
-            jefe_familia_nueva_doc = None
-            for doc_viejo in miembros_vieja_docs:
-                if doc_viejo in df_nueva_jefes_set: # Verificamos si el documento antiguo es jefe en la nueva DB
-                    jefe_familia_nueva_doc = doc_viejo
-                    break
-
-            miembros_nueva_docs = set()
-            faltantes = []
-            miembros_vieja_info_familia = {doc: df_vieja_info.get(doc) for doc in miembros_vieja_docs}
-            jefe_nueva_info = {}
-
-            if jefe_familia_nueva_doc:
-                jefe_nueva_info['documento'] = jefe_familia_nueva_doc
-                jefe_nueva_info['nombre'] = df_nueva_doc_nombre_completo.get(jefe_familia_nueva_doc, 'No encontrado')
-                # Obtener los miembros de la nueva familia basados en el jefe encontrado
-                nueva_familia_df = df_nueva[df_nueva['JEFE_FAMILIA_NUEVA'].astype(str) == jefe_familia_nueva_doc]
-                miembros_nueva_docs = set(nueva_familia_df['DOCUMENTO_NUEVO'].astype(str).tolist())
-
-                for doc_viejo in miembros_vieja_docs:
-                    nombre_viejo = miembros_vieja_info_familia.get(doc_viejo, f"Nombre no encontrado (Doc: {doc_viejo})")
-                    parentesco_nuevo = df_nueva_doc_parentesco.get(doc_viejo, 'No encontrado')
-                    if doc_viejo not in miembros_nueva_docs:
-                        faltantes.append(f"{nombre_viejo} ({doc_viejo}) - Parentesco (Nueva DB): {parentesco_nuevo}")
-                        personas_faltantes_total = personas_vieja_total - personas_nueva_total
-                        lista_personas_faltantes.append(f"{nombre_viejo} ({doc_viejo}) - Familia Antigua (ID): {familia_vieja} - Parentesco (Nueva DB): {parentesco_nuevo}")
-
-                reporte_por_familia[familia_vieja] = {
-                    'jefe_nueva_info': jefe_nueva_info,
-                    'miembros_vieja': [f"{miembros_vieja_info_familia.get(doc, f'Nombre no encontrado (Doc: {doc})')} ({doc})" for doc in miembros_vieja_docs],
-                    'miembros_nueva': [f"{df_nueva_doc_nombre_completo.get(doc, 'No encontrado')} ({doc}) - Parentesco: {df_nueva_doc_parentesco.get(doc, 'No encontrado')}" for doc in miembros_nueva_docs],
-                    'faltantes': faltantes
-                }
-            else:
-                for doc_viejo in miembros_vieja_docs:
-                    nombre_viejo = miembros_vieja_info_familia.get(doc_viejo, f"Nombre no encontrado (Doc: {doc_viejo})")
-                    parentesco_nuevo = df_nueva_doc_parentesco.get(doc_viejo, 'No encontrado')
-                    advertencias_viejas.append({'Persona (Antigua)': f"{nombre_viejo} ({doc_viejo})", 'Familia Antigua (ID)': familia_vieja, 'Parentesco (Nueva DB)': parentesco_nuevo})
-
-        return {
-            'total_familias_comparadas_vieja': str(len(familias_comparadas_vieja)),
-            'total_familias_comparadas': str(len(familias_comparadas)),
-            'total_personas_vieja': str(personas_vieja_total),
-            'total_personas_nueva': str(personas_nueva_total),
-            'total_personas_faltantes': str(personas_faltantes_total),
-            'reporte_por_familia': reporte_por_familia,
-            'advertencias_viejas': advertencias_viejas
-        }
+        if tamano_lote:
+            # Lectura por lotes conservando solo las columnas que usa la comparación
+            df_vieja = leer_columnas_por_lotes(ruta_vieja, COLUMNAS_VIEJA, tamano_lote)
+            df_nueva = leer_columnas_por_lotes(ruta_nueva, COLUMNAS_NUEVA, tamano_lote)
+        else:
+            df_vieja = leer_excel(ruta_vieja)
+            df_nueva = leer_excel(ruta_nueva)
+
+        return comparar_tablas(df_vieja, df_nueva)
 
     except FileNotFoundError as e:
         return {'error': f"Error: Archivo no encontrado: {e}"}
     except Exception as e:
         return {'error': f"Error al procesar los archivos: {e}"}
 
-if __name__ == "__main__":
-    ruta_archivo_viejo = 'Archivo/basededatosvieja.xlsx'
-    ruta_archivo_nuevo = 'Archivo/Cuestionario.xlsx'
-    ruta_reporte_pdf = 'reportes/reportes_avanzados'
+def guardar_reporte_avanzado(resultado_comparacion, ruta_reporte_pdf='reportes/reportes_avanzados'):
+    """Guarda en PDF el resultado de comparar_bases_de_datos (o de comparar_tablas)."""
     nombre_reporte_pdf = os.path.join(ruta_reporte_pdf, 'reporte_avanzado.pdf')
     report_title = "REPORTE AVANZADO DE COMPARACIÓN DE BASES DE DATOS"
 
     os.makedirs(ruta_reporte_pdf, exist_ok=True)
 
-    resultado_comparacion = comparar_bases_de_datos(ruta_archivo_viejo, ruta_archivo_nuevo)
+    with Fase('reporte_pdf_avanzado', len(resultado_comparacion.get('reporte_por_familia', {})), 'reporte_avanzado.pdf'):
+        pdf = PDFReportAvanzado(report_title)
+        pdf.add_page()
+        pdf.print_resumen(resultado_comparacion)
+        pdf.print_reporte_familias(resultado_comparacion.get('reporte_por_familia', {'error': 'No se generó el reporte por familia debido a un error previo.'}))
+        pdf.print_advertencias_viejas_table(resultado_comparacion.get('advertencias_viejas', {'error': 'No se generaron las advertencias debido a un error previo.'}))
+        pdf.output(nombre_reporte_pdf)
+
+    print(f"Reporte avanzado generado exitosamente en: {nombre_reporte_pdf}")
 
-    pdf = PDFReportAvanzado(report_title)
-    pdf.add_page()
-    pdf.print_resumen(resultado_comparacion)
-    pdf.print_reporte_familias(resultado_comparacion.get('reporte_por_familia', {'error': 'No se generó el reporte por familia debido a un error previo.'}))
-    pdf.print_advertencias_viejas_table(resultado_comparacion.get('advertencias_viejas', {'error': 'No se generaron las advertencias debido a un error previo.'}))
-    pdf.output(nombre_reporte_pdf, 'F')
+def generar_reporte_avanzado(ruta_archivo_viejo, ruta_archivo_nuevo, ruta_reporte_pdf='reportes/reportes_avanzados', tamano_lote=None):
+    """Compara las dos bases de datos y guarda el reporte avanzado en PDF."""
+    guardar_reporte_avanzado(comparar_bases_de_datos(ruta_archivo_viejo, ruta_archivo_nuevo, tamano_lote), ruta_reporte_pdf)
+
+if __name__ == "__main__":
+    ruta_archivo_viejo = 'Archivo/basededatosvieja.xlsx'
+    ruta_archivo_nuevo = 'Archivo/Cuestionario.xlsx'
 
-    print(f"Reporte avanzado generado exitosamente en: {nombre_reporte_pdf}")
\ No newline at end of file
+    generar_reporte_avanzado(ruta_archivo_viejo, ruta_archivo_nuevo)
\ No newline at end of file
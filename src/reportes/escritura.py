@@ -0,0 +1,52 @@
+"""
+Escritura concurrente de los archivos de un formato de reporte.
+
+Los cuatro reportes de un formato (familias, jefes solos, advertencias y repetidos) son
+independientes, así que se escriben a la vez en un pool de hilos. Armar el texto (tabulate,
+json) es trabajo de CPU en Python puro que el GIL sigue serializando; los hilos solo
+solapan la escritura en disco de un archivo con el armado de los demás. Cada archivo se
+abre con un búfer de TAMANO_BUFER bytes, de modo que llega al disco en bloques grandes y
+no en una escritura por línea.
+
+Quien ya se ejecuta dentro de un proceso trabajador (generar_todos, generar_comunidades)
+pasa max_hilos=1 y los archivos se escriben uno tras otro, sin abrir otro pool.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TAMANO_BUFER = 1024 * 1024
+
+def abrir_reporte(nombre_archivo):
+    """Abre el archivo del reporte para escribir texto UTF-8 con un búfer de TAMANO_BUFER bytes."""
+    return open(nombre_archivo, 'w', encoding='utf-8', buffering=TAMANO_BUFER)
+
+def _cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+def escribir_en_paralelo(tareas, max_hilos=None):
+    """
+    Ejecuta los escritores de los reportes a la vez y espera a que todos terminen.
+
+    Args:
+        tareas (dict): Nombre del archivo -> (función, argumentos) del escritor.
+        max_hilos (int): Número máximo de hilos; None usa un hilo por archivo y 1 escribe
+            los archivos uno tras otro en el hilo que llama.
+
+    Returns:
+        dict: Segundos que tardó cada archivo (hasta quedar cerrado), en el orden de las tareas.
+        Si algún escritor falla, la excepción se propaga (con varios hilos, después de que
+        terminen los demás).
+    """
+    if max_hilos == 1:
+        return {nombre: _cronometrar(funcion, *args) for nombre, (funcion, args) in tareas.items()}
+    with ThreadPoolExecutor(max_workers=max_hilos or len(tareas)) as pool:
+        futuros = {nombre: pool.submit(_cronometrar, funcion, *args) for nombre, (funcion, args) in tareas.items()}
+    return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+def mostrar_tiempos(tiempos, segundos_total):
+    """Muestra el tiempo de cada archivo y el total del formato."""
+    for nombre, segundos in tiempos.items():
+        print(f"-> {nombre:<30} {segundos:8.2f} s")
+    print(f"-> {'Total (en paralelo)':<30} {segundos_total:8.2f} s (suma de archivos: {sum(tiempos.values()):.2f} s)")
@@ -0,0 +1,20 @@
+"""
+Registro de las fuentes DejaVu en los documentos PDF.
+
+Todos los documentos (reportes por separado, reporte completo y reporte avanzado) usan
+las mismas fuentes; aquí se registran con FPDF.add_font. Cada documento analiza los TTF
+al registrarlos (unos 0,1 s por documento) y lleva su propia copia de la fuente para
+construir su subconjunto de glifos al guardarse: fpdf2 no ofrece una forma pública de
+compartir una fuente ya analizada entre documentos.
+"""
+
+FUENTES = {
+    '': 'fonts/DejaVuSans.ttf',
+    'B': 'fonts/DejaVuSans-Bold.ttf'
+}
+
+def agregar_fuentes(pdf, familia='DejaVu'):
+    """Registra las fuentes de FUENTES en el documento (las ya registradas se omiten)."""
+    for estilo, ruta in FUENTES.items():
+        if f"{familia.lower()}{estilo}" not in pdf.fonts:
+            pdf.add_font(familia, estilo, ruta)
@@ -0,0 +1,224 @@
+"""
+Procesa los cuestionarios de varias comunidades (cabildos y resguardos) en paralelo.
+
+Recibe un directorio o un patrón glob de libros XLSX y, en un pool de procesos, ejecuta
+procesar_datos y los generadores de reportes de cada libro, escribiendo los reportes de
+cada comunidad en su propia subcarpeta. Al final escribe un resumen conjunto de todas
+las comunidades y la lista de personas registradas en más de una comunidad.
+
+Uso:
+    python -m src.reportes.generar_comunidades --entrada Archivo/
+    python -m src.reportes.generar_comunidades --entrada "Archivo/Cuestionario*.xlsx" --formatos txt json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from openpyxl import load_workbook
+from tabulate import tabulate
+from .. import metricas
+from ..esquema import texto_documento
+from ..procesamiento import procesar_datos
+from .generar_todos import GENERADORES, OPCIONES_EN_TRABAJADOR
+
+# Encabezados que identifican un cuestionario (la base de datos antigua y la plantilla del Formato Censal no los tienen)
+COLUMNAS_CUESTIONARIO = {'Cedula de jefe(a) de Familia', 'Documento', 'Parentesco'}
+COLUMNAS_RESUMEN = ['Comunidad', 'Archivo', 'Total Personas', 'Familias con Miembros', 'Jefes Solos', 'Advertencias', 'Repetidos', 'Segundos', 'Error']
+
+def buscar_libros(entrada):
+    """Devuelve los libros XLSX de un directorio o de un patrón glob, sin los archivos temporales de Excel ('~$')."""
+    patron = os.path.join(entrada, '*.xlsx') if os.path.isdir(entrada) else entrada
+    return sorted(ruta for ruta in glob.glob(patron) if not os.path.basename(ruta).startswith('~$'))
+
+def es_cuestionario(ruta_archivo):
+    """
+    Indica si la primera fila del libro tiene los encabezados de COLUMNAS_CUESTIONARIO.
+
+    Solo se lee el encabezado. Un libro que no se puede abrir se considera cuestionario,
+    para que el error aparezca en el resumen de su comunidad.
+    """
+    try:
+        wb = load_workbook(ruta_archivo, read_only=True)
+        try:
+            encabezado = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+    except Exception:
+        return True
+    return COLUMNAS_CUESTIONARIO <= {str(valor).strip() for valor in encabezado if valor is not None}
+
+def nombre_comunidad(ruta_archivo):
+    """Nombre de la comunidad a partir del archivo: 'Cuestionario Cabildo X (Respuestas).xlsx' -> 'Cabildo X'."""
+    nombre = os.path.splitext(os.path.basename(ruta_archivo))[0]
+    nombre = re.sub(r'^\s*Cuestionario\s+', '', nombre, flags=re.IGNORECASE)
+    nombre = re.sub(r'\s*\(Respuestas\)\s*$', '', nombre, flags=re.IGNORECASE)
+    return nombre.strip() or 'comunidad'
+
+def procesar_comunidad(ruta_archivo, comunidad, ruta_base, formatos, tamano_lote=None):
+    """
+    Analiza un libro y genera sus reportes en '<ruta_base>/<comunidad>/reportes_<formato>'.
+
+    Se ejecuta en un proceso trabajador: los formatos de una comunidad (y los archivos de
+    cada formato, con OPCIONES_EN_TRABAJADOR) se generan uno tras otro y el paralelismo se
+    obtiene procesando varias comunidades a la vez, sin pools anidados.
+
+    Returns:
+        tuple: Fila del resumen (dict con COLUMNAS_RESUMEN) y DataFrame con una fila por
+        persona ('Documento', 'Nombre Completo Persona') para el cruce entre comunidades.
+    """
+    inicio = time.perf_counter()
+    resumen = dict.fromkeys(COLUMNAS_RESUMEN, 0)
+    resumen.update({'Comunidad': comunidad, 'Archivo': os.path.basename(ruta_archivo), 'Error': ''})
+    personas = pd.DataFrame(columns=['Documento', 'Nombre Completo Persona'])
+
+    *resultado_analisis, resumen_personas = procesar_datos(ruta_archivo, tamano_lote, con_personas=True)
+    if isinstance(resultado_analisis[0], str):
+        resumen['Error'] = resultado_analisis[0]
+    else:
+        familias_multiples, familias_uno, advertencias, total_personas, personas_repetidas = resultado_analisis
+        resumen.update({
+            'Total Personas': total_personas,
+            'Familias con Miembros': len(familias_multiples),
+            'Jefes Solos': len(familias_uno),
+            'Advertencias': len(advertencias),
+            'Repetidos': len(personas_repetidas)
+        })
+        ruta_comunidad = os.path.join(ruta_base, comunidad)
+        for formato in formatos:
+            GENERADORES[formato](*resultado_analisis, os.path.join(ruta_comunidad, f'reportes_{formato}'), **OPCIONES_EN_TRABAJADOR[formato])
+        personas = resumen_personas[['Documento', 'Nombre Completo Persona']]
+
+    resumen['Segundos'] = round(time.perf_counter() - inicio, 2)
+    return resumen, personas
+
+def detectar_personas_en_varias_comunidades(personas_por_comunidad):
+    """
+    Busca los documentos registrados en más de una comunidad.
+
+    Args:
+        personas_por_comunidad (dict): Comunidad -> DataFrame con 'Documento' y 'Nombre Completo Persona'.
+
+    Returns:
+        pandas.DataFrame: Una fila por documento con 'Documento', 'Nombres', 'Comunidades' y
+        'Cantidad Comunidades', ordenado por documento.
+    """
+    columnas = ['Documento', 'Nombres', 'Comunidades', 'Cantidad Comunidades']
+    tablas = [personas.assign(Comunidad=comunidad) for comunidad, personas in personas_por_comunidad.items() if not personas.empty]
+    if not tablas:
+        return pd.DataFrame(columns=columnas)
+
+    personas = pd.concat(tablas, ignore_index=True)
+    personas['Documento'] = texto_documento(personas['Documento'])
+    personas = personas[personas['Documento'].notna()]
+
+    cantidad = personas.groupby('Documento')['Comunidad'].nunique()
+    en_varias = personas[personas['Documento'].isin(cantidad.index[cantidad > 1])]
+    agrupadas = en_varias.groupby('Documento', sort=True)
+    return pd.DataFrame({
+        'Nombres': agrupadas['Nombre Completo Persona'].agg(lambda nombres: ", ".join(dict.fromkeys(nombres))),
+        'Comunidades': agrupadas['Comunidad'].agg(lambda comunidades: ", ".join(dict.fromkeys(comunidades))),
+        'Cantidad Comunidades': agrupadas['Comunidad'].nunique()
+    }).reset_index()[columnas]
+
+def escribir_resumen_comunidades(resumen_df, en_varias_df, ruta_base):
+    """Escribe el resumen conjunto y las personas en varias comunidades en TXT y JSON."""
+    os.makedirs(ruta_base, exist_ok=True)
+    nombre_archivo_txt = os.path.join(ruta_base, 'resumen_comunidades.txt')
+    with open(nombre_archivo_txt, 'w', encoding='utf-8') as archivo:
+        archivo.write("=" * 20 + " RESUMEN DE COMUNIDADES " + "=" * 20 + "\n\n")
+        archivo.write(f"Se procesaron {len(resumen_df)} comunidades ({int((resumen_df['Error'] != '').sum())} con error) con un total de {int(resumen_df['Total Personas'].sum())} personas.\n\n")
+        archivo.write(tabulate(resumen_df, headers='keys', tablefmt='grid', showindex=False) + "\n\n")
+        archivo.write("=" * 20 + " PERSONAS REGISTRADAS EN MÁS DE UNA COMUNIDAD " + "=" * 20 + "\n\n")
+        if en_varias_df.empty:
+            archivo.write("No se encontraron personas registradas en más de una comunidad.\n")
+        else:
+            archivo.write(f"Se encontraron {len(en_varias_df)} documentos registrados en más de una comunidad.\n\n")
+            archivo.write(tabulate(en_varias_df, headers='keys', tablefmt='grid', showindex=False))
+
+    nombre_archivo_json = os.path.join(ruta_base, 'resumen_comunidades.json')
+    reporte = {
+        "titulo": "RESUMEN DE COMUNIDADES",
+        "total_comunidades": len(resumen_df),
+        "total_personas": int(resumen_df['Total Personas'].sum()),
+        "comunidades": resumen_df.to_dict(orient='records'),
+        "personas_en_varias_comunidades": en_varias_df.to_dict(orient='records')
+    }
+    with open(nombre_archivo_json, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=4, ensure_ascii=False, default=str)
+
+    print(f"El resumen de comunidades ha sido guardado en '{nombre_archivo_txt}' y '{nombre_archivo_json}'.")
+
+def generar_comunidades(entrada, formatos=('pdf', 'txt', 'json'), ruta_base='reportes/comunidades', max_procesos=None, tamano_lote=None):
+    """
+    Procesa en paralelo todos los cuestionarios de `entrada` (directorio o patrón glob).
+
+    Los libros sin las columnas del cuestionario (la base de datos antigua, la plantilla
+    del Formato Censal) se omiten.
+
+    Args:
+        entrada (str): Directorio con los libros XLSX o patrón glob ('Archivo/*.xlsx').
+        formatos (tuple): Formatos de reporte a generar para cada comunidad.
+        ruta_base (str): Carpeta donde se crea una subcarpeta por comunidad y el resumen conjunto.
+        max_procesos (int): Número máximo de procesos; None usa el número de CPU.
+        tamano_lote (int): Si se indica, los archivos se leen por lotes de ese número de filas.
+
+    Returns:
+        tuple: DataFrame del resumen por comunidad y DataFrame de personas en varias comunidades;
+        None si no se encontraron libros.
+    """
+    libros = []
+    for ruta in buscar_libros(entrada):
+        if es_cuestionario(ruta):
+            libros.append(ruta)
+        else:
+            print(f"-> Se omite '{os.path.basename(ruta)}': no tiene las columnas del cuestionario.")
+    if not libros:
+        print(f"No se encontraron cuestionarios XLSX en '{entrada}'.")
+        return None
+
+    # Dos libros con el mismo nombre de comunidad se distinguen con un sufijo numérico
+    comunidades = {}
+    for ruta in libros:
+        comunidad = nombre_comunidad(ruta)
+        repeticiones = sum(1 for nombre in comunidades.values() if nombre == comunidad or nombre.startswith(f"{comunidad} ("))
+        comunidades[ruta] = comunidad if repeticiones == 0 else f"{comunidad} ({repeticiones + 1})"
+
+    filas_resumen = {}
+    personas_por_ruta = {}
+    with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        futuros = {pool.submit(procesar_comunidad, ruta, comunidad, ruta_base, formatos, tamano_lote): (ruta, comunidad) for ruta, comunidad in comunidades.items()}
+        for futuro in as_completed(futuros):
+            ruta, comunidad = futuros[futuro]
+            try:
+                resumen, personas = futuro.result()
+            except Exception as e:
+                resumen = dict.fromkeys(COLUMNAS_RESUMEN, 0)
+                resumen.update({'Comunidad': comunidad, 'Archivo': os.path.basename(ruta), 'Error': str(e)})
+                personas = pd.DataFrame(columns=['Documento', 'Nombre Completo Persona'])
+            filas_resumen[ruta] = resumen
+            personas_por_ruta[ruta] = personas
+            estado = f"error: {resumen['Error']}" if resumen['Error'] else f"{resumen['Total Personas']} personas en {resumen['Segundos']:.2f} s"
+            print(f"-> {comunidad}: {estado}")
+
+    resumen_df = pd.DataFrame([filas_resumen[ruta] for ruta in libros], columns=COLUMNAS_RESUMEN)
+    en_varias_df = detectar_personas_en_varias_comunidades({comunidades[ruta]: personas_por_ruta[ruta] for ruta in libros})
+    escribir_resumen_comunidades(resumen_df, en_varias_df, ruta_base)
+    return resumen_df, en_varias_df
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entrada', default='Archivo', help='Directorio con los libros XLSX o patrón glob (entre comillas).')
+    parser.add_argument('--formatos', nargs='+', choices=list(GENERADORES), default=list(GENERADORES), help='Formatos a generar para cada comunidad.')
+    parser.add_argument('--salida', default='reportes/comunidades', help='Carpeta de salida (una subcarpeta por comunidad).')
+    parser.add_argument('--procesos', type=int, default=None, help='Número máximo de procesos.')
+    parser.add_argument('--lote', type=int, default=None, help='Leer los archivos por lotes de este número de filas (archivos muy grandes).')
+    parser.add_argument('--metricas', nargs='?', const=metricas.DIRECTORIO_METRICAS_POR_DEFECTO, default=None, help='Guardar el tiempo, la CPU, la memoria y las filas de cada fase en un archivo JSON Lines dentro de esta carpeta.')
+    args = parser.parse_args()
+
+    if args.metricas:
+        metricas.activar_metricas(args.metricas)
+    generar_comunidades(args.entrada, args.formatos, args.salida, args.procesos, args.lote)
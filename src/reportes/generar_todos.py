@@ -0,0 +1,164 @@
+"""
+Genera todos los reportes con un solo análisis del archivo XLSX.
+
+procesar_datos se ejecuta una sola vez y los reportes PDF, TXT y JSON (y, si se
+indica la base de datos antigua, el reporte avanzado) se generan en paralelo en
+un pool de procesos. Al final se muestra el tiempo de cada formato y el total.
+
+Uso:
+    python -m src.reportes.generar_todos
+    python -m src.reportes.generar_todos --formatos pdf json --vieja Archivo/basededatosvieja.xlsx
+    python -m src.reportes.generar_todos --metricas reportes/metricas
+    python -m src.reportes.generar_todos --almacen --vieja Archivo/basededatosvieja.xlsx
+    python -m src.reportes.generar_todos --formatos pdf --pdf-partes 4
+"""
+import argparse
+import os
+import time
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .. import metricas
+from ..almacen_censo import RUTA_ALMACEN, generar_reporte_avanzado_almacen, procesar_datos_almacen
+from ..procesamiento import procesar_datos
+from ..duplicados_aproximados import generar_reporte_duplicados_aproximados
+from ..reporte_avanzado import generar_reporte_avanzado
+from .reportes_pdf import generar_reportes_pdf
+from .reportes_txt import generar_reportes_txt
+from .reportes_json import generar_reportes_json
+
+GENERADORES = {
+    'pdf': generar_reportes_pdf,
+    'txt': generar_reportes_txt,
+    'json': generar_reportes_json
+}
+
+# Opciones de cada generador cuando ya se ejecuta dentro de un proceso trabajador: los archivos
+# de un formato se escriben uno tras otro, sin abrir otro pool (el PDF solo abre uno con partes_familias)
+OPCIONES_EN_TRABAJADOR = {
+    'pdf': {},
+    'txt': {'max_hilos': 1},
+    'json': {'max_hilos': 1}
+}
+
+def _cronometrar(funcion, *args):
+    """Ejecuta la función (en un proceso trabajador o en este) y devuelve su tiempo de reloj."""
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+def generar_todos(ruta_archivo_xlsx, formatos=('pdf', 'txt', 'json'), ruta_archivo_viejo=None, ruta_base='reportes', max_procesos=None, tamano_lote=None, pdf_unico=False, json_lineas=False, incremental=False, duplicados_aproximados=False, ruta_almacen=None, pdf_partes=None):
+    """
+    Analiza el archivo una vez y genera los reportes de cada formato en paralelo.
+
+    Args:
+        ruta_archivo_xlsx (str): La ruta al archivo XLSX del cuestionario.
+        formatos (iterable): Formatos a generar ('pdf', 'txt' y/o 'json').
+        ruta_archivo_viejo (str): Base de datos antigua para el reporte avanzado; None para omitirlo.
+        ruta_base (str): Directorio raíz de los reportes (se usan sus carpetas reportes_*).
+        max_procesos (int): Número máximo de procesos del pool; None usa todos los núcleos.
+        tamano_lote (int): Si se indica, los archivos se leen por lotes de ese número de filas.
+        pdf_unico (bool): Si es True los cuatro reportes PDF se escriben como secciones de un solo archivo.
+        json_lineas (bool): Si es True los reportes JSON se escriben como JSON Lines con un resumen aparte.
+        incremental (bool): Si es True solo se recalculan las familias tocadas desde la ejecución anterior.
+        duplicados_aproximados (bool): Si es True se genera también el reporte de personas casi duplicadas.
+        ruta_almacen (str): Almacén SQLite del censo; si se indica, el análisis y el reporte avanzado
+            se hacen con consultas sobre él y los libros solo se leen si cambiaron desde la última carga.
+        pdf_partes (int): Si se indica, el reporte PDF de familias se dibuja en ese número de partes
+            en procesos aparte y se une en un solo archivo (0 usa todos los núcleos). Cada parte
+            empieza en una página nueva. Los reportes PDF se generan entonces en este proceso,
+            mientras el pool genera los demás formatos. None (por defecto) no divide el reporte.
+
+    Returns:
+        dict: Segundos empleados por el análisis, por cada formato y en total; None si el análisis falla.
+    """
+    inicio_total = time.perf_counter()
+    tiempos = {}
+
+    if ruta_almacen:
+        resultado_analisis = procesar_datos_almacen(ruta_archivo_xlsx, ruta_almacen)
+    else:
+        resultado_analisis = procesar_datos(ruta_archivo_xlsx, tamano_lote, incremental)
+    if isinstance(resultado_analisis[0], str):
+        print(resultado_analisis[0])
+        return None
+    tiempos['analisis'] = time.perf_counter() - inicio_total
+
+    with ProcessPoolExecutor(max_workers=max_procesos) as pool:
+        futuros = {}
+        pdf_por_partes = None
+        for formato in formatos:
+            ruta_formato = os.path.join(ruta_base, f'reportes_{formato}')
+            generador = GENERADORES[formato]
+            if formato == 'pdf' and pdf_unico:
+                generador = partial(generador, un_solo_archivo=True)
+            elif formato == 'pdf' and pdf_partes is not None:
+                generador = partial(generador, partes_familias=pdf_partes)
+            elif formato == 'json' and json_lineas:
+                generador = partial(generador, formato='jsonl')
+            if formato == 'pdf' and pdf_partes is not None and not pdf_unico:
+                # Las partes se dibujan en un pool propio: se genera en este proceso para no anidar pools
+                pdf_por_partes = generador, ruta_formato
+                continue
+            generador = partial(generador, **OPCIONES_EN_TRABAJADOR[formato])
+            futuros[pool.submit(_cronometrar, generador, *resultado_analisis, ruta_formato)] = formato
+        if ruta_archivo_viejo:
+            ruta_avanzados = os.path.join(ruta_base, 'reportes_avanzados')
+            if ruta_almacen:
+                futuros[pool.submit(_cronometrar, generar_reporte_avanzado_almacen, ruta_archivo_viejo, ruta_archivo_xlsx, ruta_avanzados, ruta_almacen)] = 'avanzado'
+            else:
+                futuros[pool.submit(_cronometrar, generar_reporte_avanzado, ruta_archivo_viejo, ruta_archivo_xlsx, ruta_avanzados, tamano_lote)] = 'avanzado'
+        if duplicados_aproximados:
+            ruta_duplicados = os.path.join(ruta_base, 'reportes_duplicados')
+            futuros[pool.submit(_cronometrar, generar_reporte_duplicados_aproximados, ruta_archivo_xlsx, ruta_duplicados, tamano_lote)] = 'duplicados'
+
+        if pdf_por_partes:
+            generador, ruta_formato = pdf_por_partes
+            try:
+                tiempos['pdf'] = _cronometrar(generador, *resultado_analisis, ruta_formato)
+            except Exception as e:
+                print(f"Error al generar los reportes pdf: {e}")
+
+        for futuro in as_completed(futuros):
+            formato = futuros[futuro]
+            try:
+                tiempos[formato] = futuro.result()
+            except Exception as e:
+                print(f"Error al generar los reportes {formato}: {e}")
+
+    tiempos['total'] = time.perf_counter() - inicio_total
+
+    print("\n" + "=" * 40)
+    print("TIEMPOS DE GENERACION")
+    print("=" * 40)
+    for etapa, segundos in tiempos.items():
+        print(f"-> {etapa:<10} {segundos:8.2f} s")
+    suma_secuencial = sum(segundos for etapa, segundos in tiempos.items() if etapa != 'total')
+    print(f"-> Suma de etapas (ejecución secuencial): {suma_secuencial:.2f} s")
+
+    return tiempos
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--archivo', default='Archivo/Cuestionario Cabildo TATACHIO MIRABEL (Respuestas).xlsx', help='Archivo XLSX del cuestionario.')
+    parser.add_argument('--formatos', nargs='+', choices=list(GENERADORES), default=list(GENERADORES), help='Formatos a generar.')
+    parser.add_argument('--vieja', default=None, help='Base de datos antigua; si se indica se genera también el reporte avanzado.')
+    parser.add_argument('--procesos', type=int, default=None, help='Número máximo de procesos.')
+    parser.add_argument('--lote', type=int, default=None, help='Leer los archivos por lotes de este número de filas (archivos muy grandes); no se combina con --incremental.')
+    parser.add_argument('--pdf-unico', action='store_true', help='Escribir los cuatro reportes PDF como secciones de un solo archivo con marcadores.')
+    parser.add_argument('--pdf-partes', type=int, nargs='?', const=0, default=None, help='Dibujar el reporte PDF de familias en este número de partes en paralelo y unirlas en un solo archivo (sin número, una parte por núcleo).')
+    parser.add_argument('--json-lineas', action='store_true', help='Escribir los reportes JSON como JSON Lines (un registro por línea) con un resumen aparte.')
+    parser.add_argument('--incremental', action='store_true', help='Recalcular solo las familias tocadas desde la ejecución anterior (manifiesto de huellas por fila); no se combina con --lote.')
+    parser.add_argument('--duplicados-aproximados', action='store_true', help='Generar también el reporte de personas casi duplicadas (tildes, orden de nombres, errores en el documento).')
+    parser.add_argument('--almacen', nargs='?', const=RUTA_ALMACEN, default=None, help='Usar el almacén SQLite del censo (se carga o se actualiza si los libros cambiaron) en lugar de leer los libros en cada ejecución.')
+    parser.add_argument('--metricas', nargs='?', const=metricas.DIRECTORIO_METRICAS_POR_DEFECTO, default=None, help='Guardar el tiempo, la CPU, la memoria y las filas de cada fase en un archivo JSON Lines dentro de esta carpeta.')
+    args = parser.parse_args()
+    if args.lote and args.incremental:
+        parser.error("--lote y --incremental no se pueden combinar: el modo incremental necesita la hoja completa.")
+
+    if args.metricas:
+        metricas.activar_metricas(args.metricas)
+
+    generar_todos(args.archivo, args.formatos, args.vieja, max_procesos=args.procesos, tamano_lote=args.lote, pdf_unico=args.pdf_unico, json_lineas=args.json_lineas, incremental=args.incremental, duplicados_aproximados=args.duplicados_aproximados, ruta_almacen=args.almacen, pdf_partes=args.pdf_partes)
+
+    if metricas.METRICAS_ACTIVAS:
+        print(f"-> Métricas por fase guardadas en '{metricas.ARCHIVO_METRICAS}' (resumen: python -m src.metricas {metricas.ARCHIVO_METRICAS}).")
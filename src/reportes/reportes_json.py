@@ -1,107 +1,149 @@
 import json
+from ..metricas import medir_fase
 from ..procesamiento import procesar_datos
+from .escritura import abrir_reporte, escribir_en_paralelo, mostrar_tiempos
 import os
+import time
 
-def generar_reporte_familias_json(familias, nombre_archivo, total_personas):
+def escribir_json(resumen, clave_registros, registros, nombre_archivo):
+    """Escribe el reporte completo (resumen y lista de registros) como un solo JSON con sangría."""
+    reporte = dict(resumen)
+    reporte[clave_registros] = list(registros)
+    # Los fragmentos de json.dump se acumulan en el búfer del archivo, sin armar el texto completo
+    with abrir_reporte(nombre_archivo) as archivo:
+        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+
+def escribir_jsonl(resumen, registros, nombre_archivo):
+    """
+    Escribe un registro JSON por línea a medida que se producen (JSON Lines) y el resumen
+    en un archivo aparte '<nombre>_resumen.json', sin armar el reporte completo en memoria.
+    """
+    with abrir_reporte(nombre_archivo) as archivo:
+        for registro in registros:
+            archivo.write(json.dumps(registro, ensure_ascii=False))
+            archivo.write('\n')
+
+    nombre_resumen = f"{os.path.splitext(nombre_archivo)[0]}_resumen.json"
+    with open(nombre_resumen, 'w', encoding='utf-8') as archivo:
+        json.dump(dict(resumen, archivo_registros=os.path.basename(nombre_archivo)), archivo, indent=4, ensure_ascii=False)
+
+def escribir_reporte(resumen, clave_registros, registros, nombre_archivo, formato):
+    """Escribe el reporte en el formato indicado: 'json' (un solo documento) o 'jsonl' (un registro por línea)."""
+    if formato == 'jsonl':
+        escribir_jsonl(resumen, registros, nombre_archivo)
+    else:
+        escribir_json(resumen, clave_registros, registros, nombre_archivo)
+
+@medir_fase('reporte_json_familias', filas=len)
+def generar_reporte_familias_json(familias, nombre_archivo, total_personas, formato='json'):
     num_familias = len(familias)
-    reporte = {
+    resumen = {
         "titulo": "REPORTE DE FAMILIAS CON MÁS DE UN MIEMBRO",
         "total_familias": num_familias,
         "total_personas_en_familias": sum(len(data['miembros']) + 1 for data in familias.values()),
-        "total_personas_analizadas": total_personas,
-        "familias": []
+        "total_personas_analizadas": total_personas
     }
-    for jefe_cedula, data in familias.items():
-        familia_data = {
-            "cedula_jefe_familia": jefe_cedula,
-            "jefe_de_familia": {"documento": data['jefe'][0], "nombre_completo": data['jefe'][1]},
-            "miembros_de_familia": data['miembros'].to_dict(orient='records')
-        }
-        reporte["familias"].append(familia_data)
-
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+    registros = ({
+        "cedula_jefe_familia": jefe_cedula,
+        "jefe_de_familia": {"documento": data['jefe'][0], "nombre_completo": data['jefe'][1]},
+        "miembros_de_familia": data['miembros'].to_dict(orient='records')
+    } for jefe_cedula, data in familias.items())
+
+    escribir_reporte(resumen, "familias", registros, nombre_archivo, formato)
     print(f"El reporte de familias con más de 1 miembro ha sido guardado en '{nombre_archivo}'.")
 
-def generar_reporte_un_miembro_json(familias, nombre_archivo, total_personas):
+@medir_fase('reporte_json_un_miembro', filas=len)
+def generar_reporte_un_miembro_json(familias, nombre_archivo, total_personas, formato='json'):
     num_jefes_solos = len(familias)
-    reporte = {
+    resumen = {
         "titulo": "REPORTE DE JEFES DE FAMILIA REGISTRADOS SIN OTROS MIEMBROS",
         "descripcion": "Esta tabla muestra a los jefes de familia que se registraron como el único miembro de su núcleo familiar. Esto podría indicar que faltan miembros por registrar o que realmente son familias unipersonales.",
         "total_jefes_solos": num_jefes_solos,
-        "total_personas_analizadas": total_personas,
-        "jefes_de_familia_solos": []
+        "total_personas_analizadas": total_personas
     }
-    for jefe_cedula, data in familias.items():
-        reporte["jefes_de_familia_solos"].append({
-            "cedula_jefe": data['jefe'][0],
-            "nombre_jefe": data['jefe'][1]
-        })
+    registros = ({
+        "cedula_jefe": data['jefe'][0],
+        "nombre_jefe": data['jefe'][1]
+    } for data in familias.values())
 
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+    escribir_reporte(resumen, "jefes_de_familia_solos", registros, nombre_archivo, formato)
     print(f"El reporte de jefes de familia registrados sin otros miembros ha sido guardado en '{nombre_archivo}'.")
 
-def generar_reporte_advertencias_json(advertencias, nombre_archivo, total_personas):
+@medir_fase('reporte_json_advertencias', filas=len)
+def generar_reporte_advertencias_json(advertencias, nombre_archivo, total_personas, formato='json'):
     num_advertencias = len(advertencias)
-    reporte = {
+    resumen = {
         "titulo": "REPORTE DE ADVERTENCIAS EN LOS REGISTROS DE FAMILIA",
         "descripcion": "No se encontró ningún jefe de familia asociado a estas persona. Se recomienda revisar la cédula del jefe de familia.",
         "total_advertencias": num_advertencias,
-        "total_personas_analizadas": total_personas,
-        "advertencias": []
+        "total_personas_analizadas": total_personas
     }
-    for adv in advertencias:
-        advertencia_data = {
-            "cedula_jefe_familia": adv[0],
-            "nombre_completo_persona": adv[1],
-            "cedula_persona": adv[2]        
-        }
-        reporte["advertencias"].append(advertencia_data)
-
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+    registros = ({
+        "cedula_jefe_familia": adv[0],
+        "nombre_completo_persona": adv[1],
+        "cedula_persona": adv[2]
+    } for adv in advertencias)
+
+    escribir_reporte(resumen, "advertencias", registros, nombre_archivo, formato)
     print(f"El reporte de advertencias ha sido guardado en '{nombre_archivo}'.")
 
-def generar_reporte_repetidos_json(repetidos_df, nombre_archivo, total_personas):
+@medir_fase('reporte_json_repetidos', filas=len)
+def generar_reporte_repetidos_json(repetidos_df, nombre_archivo, total_personas, formato='json'):
     num_repetidos = len(repetidos_df)
-    reporte = {
+    resumen = {
         "titulo": "REPORTE DE PERSONAS REPETIDAS EN EL REGISTRO",
         "descripcion": f"Este reporte muestra las personas que aparecen más de una vez en el registro, identificadas por su número de documento. Se encontraron {num_repetidos} registros repetidos de un total de {total_personas} personas.",
         "total_registros_repetidos": num_repetidos,
-        "total_personas_analizadas": total_personas,
-        "personas_repetidas": []
+        "total_personas_analizadas": total_personas
     }
+    registros = []
     if not repetidos_df.empty:
-        for index, row in repetidos_df.iterrows():
-            reporte["personas_repetidas"].append({
-                "cedula_jefe_familia": row['Cedula de jefe(a) de Familia'],
-                "nombre_completo_persona": row['Nombre Completo Persona'],
-                "cedula_persona": row['Cedula Persona'],
-                "cantidad_repeticiones": row['Cantidad']
-            })
-
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
-        json.dump(reporte, archivo, indent=4, ensure_ascii=False)
+        registros = repetidos_df[['Cedula de jefe(a) de Familia', 'Nombre Completo Persona', 'Cedula Persona', 'Cantidad_Docs_Repetido']].set_axis(
+            ["cedula_jefe_familia", "nombre_completo_persona", "cedula_persona", "cantidad_repeticiones"], axis=1
+        ).to_dict(orient='records')
+
+    escribir_reporte(resumen, "personas_repetidas", registros, nombre_archivo, formato)
     print(f"El reporte de personas repetidas ha sido guardado en '{nombre_archivo}'.")
 
+def generar_reportes_json(familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas, ruta_base_json='reportes/reportes_json', formato='json', max_hilos=None):
+    """
+    Genera los cuatro reportes JSON a partir del resultado de procesar_datos.
+
+    Con formato='jsonl' cada reporte se escribe como JSON Lines ('.jsonl', un registro por
+    línea) con su resumen en '<reporte>_resumen.json'. Los cuatro archivos se escriben a la
+    vez (ver escritura.escribir_en_paralelo) y la función vuelve cuando todos están cerrados.
+
+    Args:
+        max_hilos (int): Hilos de escritura; 1 escribe los archivos uno tras otro (dentro de un
+            proceso trabajador).
+
+    Returns:
+        dict: Segundos que tardó cada archivo.
+    """
+    os.makedirs(ruta_base_json, exist_ok=True)
+    inicio = time.perf_counter()
+    tiempos = escribir_en_paralelo({
+        f'reporte_familias.{formato}': (generar_reporte_familias_json, (familias_multiples, os.path.join(ruta_base_json, f'reporte_familias.{formato}'), total_personas, formato)),
+        f'reporte_1_miembro.{formato}': (generar_reporte_un_miembro_json, (familias_uno, os.path.join(ruta_base_json, f'reporte_1_miembro.{formato}'), total_personas, formato)),
+        f'reporte_advertencias.{formato}': (generar_reporte_advertencias_json, (lista_advertencias, os.path.join(ruta_base_json, f'reporte_advertencias.{formato}'), total_personas, formato)),
+        f'reporte_repetidos.{formato}': (generar_reporte_repetidos_json, (personas_repetidas, os.path.join(ruta_base_json, f'reporte_repetidos.{formato}'), total_personas, formato))
+    }, max_hilos)
+    mostrar_tiempos(tiempos, time.perf_counter() - inicio)
+    return tiempos
+
+def leer_jsonl(nombre_archivo):
+    """Recorre un reporte JSON Lines registro a registro, sin cargarlo completo en memoria."""
+    with open(nombre_archivo, encoding='utf-8') as archivo:
+        for linea in archivo:
+            if linea.strip():
+                yield json.loads(linea)
+
 if __name__ == "__main__":
     ruta_archivo_xlsx = 'Archivo/Cuestionario Cabildo TATACHIO MIRABEL (Respuestas).xlsx'
-    ruta_base_json = 'reportes/reportes_json'
-    os.makedirs(ruta_base_json, exist_ok=True)
-    nombre_archivo_familias_json = os.path.join(ruta_base_json, 'reporte_familias.json')
-    nombre_archivo_un_miembro_json = os.path.join(ruta_base_json, 'reporte_1_miembro.json')
-    nombre_archivo_advertencias_json = os.path.join(ruta_base_json, 'reporte_advertencias.json')
-    nombre_archivo_repetidos_json = os.path.join(ruta_base_json, 'reporte_repetidos.json')
 
     resultado_analisis = procesar_datos(ruta_archivo_xlsx)
 
     if isinstance(resultado_analisis, str):
         print(resultado_analisis)
     else:
-        familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas = resultado_analisis
-
-        generar_reporte_familias_json(familias_multiples, nombre_archivo_familias_json, total_personas)
-        generar_reporte_un_miembro_json(familias_uno, nombre_archivo_un_miembro_json, total_personas)
-        generar_reporte_advertencias_json(lista_advertencias, nombre_archivo_advertencias_json, total_personas)
-        generar_reporte_repetidos_json(personas_repetidas, nombre_archivo_repetidos_json, total_personas)
\ No newline at end of file
+        generar_reportes_json(*resultado_analisis)
\ No newline at end of file
@@ -1,5 +1,13 @@
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
 from fpdf import FPDF
+from pypdf import PdfReader, PdfWriter
+from ..metricas import Fase
 from ..procesamiento import procesar_datos
+from .fuentes_pdf import agregar_fuentes
+from .tablas_pdf import dibujar_tabla, formatear_columnas
+import io
 import os
 import pandas as pd
 
@@ -12,13 +20,17 @@ class PDFReport:
         self.title = title
         self.pdf = FPDF(orientation='P', unit='mm', format='A3')
         # Unicode font
-        self.pdf.add_font('DejaVu', '', 'fonts/DejaVuSans.ttf')
-        self.pdf.add_font('DejaVu', 'B', 'fonts/DejaVuSans-Bold.ttf')
+        agregar_fuentes(self.pdf)
         self.pdf.set_font('DejaVu', size=10)
 
-    def add_title(self):
-        """Agrega el título al PDF."""
+    def add_title(self, seccion: bool = False):
+        """
+        Agrega el título al PDF en una página nueva.
+        :param seccion: Si es True el título se registra también como marcador (sección) del documento.
+        """
         self.pdf.add_page()
+        if seccion:
+            self.pdf.start_section(self.title)
         self.pdf.set_font("DejaVu", style="B", size=18)
         self.pdf.cell(0, 10, self.title, new_x="LMARGIN", new_y="NEXT", align="C")
         self.pdf.ln(10)
@@ -55,31 +67,14 @@ class PDFReport:
 
 
     def create_table_from_dataframe(self, df: pd.DataFrame, col_widths=None):
-        """Crea una tabla en el PDF a partir de un DataFrame de Pandas."""
+        """Crea una tabla en el PDF a partir de un DataFrame de Pandas (anchos según el contenido si no se indican)."""
         if df.empty:
             self.pdf.cell(0, 10, "No hay datos para mostrar en esta tabla.", new_x="LMARGIN", new_y="NEXT")
             return
 
-        # Calcular el ancho de las columnas si no se proporciona
-        if col_widths is None:
-            col_widths = [self.pdf.epw / len(df.columns)] * len(df.columns)
-
-        # Print headers
-        self.pdf.set_font('DejaVu', 'B', 13)
-        self.pdf.set_fill_color(200, 220, 255)  # Azul claro para encabezados
-
-        for i, col in enumerate(df.columns):
-            self.pdf.cell(col_widths[i], 7, str(col), border=1, align='C', fill=True)
-        self.pdf.ln()
-
-        # Print data rows
         self.pdf.set_font('DejaVu', '', 13)
-        self.pdf.set_fill_color(255, 255, 255)  # Blanco para filas de datos
-
-        for _, row in df.iterrows():
-            for i, col in enumerate(df.columns):
-                self.pdf.cell(col_widths[i], 6, str(row[col]), border=1, align='L')
-            self.pdf.ln()
+        dibujar_tabla(self.pdf, list(df.columns), formatear_columnas(df), col_widths)
+        self.pdf.set_fill_color(255, 255, 255)  # Blanco para lo que siga a la tabla
 
         self.pdf.ln(2)
 
@@ -87,89 +82,192 @@ class PDFReport:
         """Genera el PDF y lo guarda en un archivo."""
         self.pdf.output(filename)
 
+def escribir_encabezado_familias(reporte, num_familias, total_personas, seccion=False):
+    """Escribe el título y la descripción del reporte de familias registradas."""
+    reporte.title = "REPORTE DE FAMILIAS REGISTRADAS"
+    reporte.add_title(seccion)
+    reporte.add_description(
+        f"Este reporte detalla las familias que se registraron por medio de la encuesta. Se encontraron {num_familias} familias de un total de {total_personas} personas registradas.\n\n"
+        "NOTA: Si usted no aparece en este reporte debera registrar a su familia por medio del siguiente formulario:",
+        link_text="haciendo click aquí. (Es muy importante que lea bien lo que le preguntan en el formulario)",
+        link_url="https://docs.google.com/forms/d/e/1FAIpQLScSEcH_fBTjVTwaQEKQVub78TnbFTwBLpWL-dbak4sc-ya5Ew/viewform?usp=sharing."
+    )
+    reporte.add_description("Si usted y toda su familia aparecen registrados omita el mensaje anterior.")
+
+def escribir_familias(reporte, familias_multiples):
+    """Escribe, a continuación de lo ya escrito, el jefe y la tabla de miembros de cada familia."""
+    for jefe_cedula, data in familias_multiples.items():
+        # Primero se muestra al jefe de familia
+        nombre_completo = data['jefe'][1]   # Nombre completo del jefe
+        documento = data['jefe'][0]         # Documento del jefe
+        jefe_info = f"Jefe de Familia: {nombre_completo} ({documento})"
+        # Configuramos la fuente y se muestra la información del jefe
+        reporte.pdf.set_font("DejaVu", style="B", size=13)
+        reporte.pdf.cell(0, 10, jefe_info, new_x="LMARGIN", new_y="NEXT", align='L')
+        reporte.pdf.cell(0, 10, "Miembros de la Familia:", new_x="LMARGIN", new_y="NEXT", align='C')
+        reporte.create_table_from_dataframe(data['miembros'])
+        reporte.pdf.ln(5)
+
+def escribir_reporte_familias(reporte, familias_multiples, total_personas, seccion=False):
+    """Escribe el reporte de familias registradas en el PDFReport indicado."""
+    escribir_encabezado_familias(reporte, len(familias_multiples), total_personas, seccion)
+
+    if familias_multiples:
+        escribir_familias(reporte, familias_multiples)
+    else:
+        reporte.pdf.cell(0, 10, "No se encontraron familias con más de un miembro.", new_x="LMARGIN", new_y="NEXT", align='C')
+
+def _dividir_familias(familias_multiples, partes):
+    """
+    Divide las familias, en orden, en hasta `partes` trozos con un número parecido de filas
+    (los miembros de cada familia más una por su jefe), que es lo que ocupa el dibujo.
+    """
+    acumulado = list(accumulate(len(data['miembros']) + 1 for data in familias_multiples.values()))
+    cortes = sorted({bisect_left(acumulado, acumulado[-1] * parte / partes) + 1 for parte in range(1, partes)} - {len(acumulado)})
+    jefes = list(familias_multiples)
+    return [{jefe: familias_multiples[jefe] for jefe in jefes[inicio:fin]} for inicio, fin in zip([0] + cortes, cortes + [len(jefes)])]
+
+def _escribir_parte_familias(familias, num_familias, total_personas, primera):
+    """
+    Escribe una parte del reporte de familias en un documento propio y devuelve su contenido.
+
+    La primera parte lleva el título y la descripción; las demás empiezan en una página nueva.
+    """
+    reporte = PDFReport(title="")
+    if primera:
+        escribir_encabezado_familias(reporte, num_familias, total_personas)
+    else:
+        # Mismo estado con el que una familia empieza página en el reporte secuencial
+        reporte.pdf.set_fill_color(255, 255, 255)
+        reporte.pdf.set_font("DejaVu", style="B", size=13)
+        reporte.pdf.add_page()
+    escribir_familias(reporte, familias)
+    return bytes(reporte.pdf.output())
+
+def escribir_reporte_familias_por_partes(familias_multiples, total_personas, ruta_pdf, partes=None):
+    """
+    Escribe el reporte de familias dividiendo las familias en partes que se dibujan en paralelo.
+
+    Las familias se reparten en orden en partes con un número parecido de filas. Cada parte
+    se dibuja con escribir_familias en un proceso aparte y los documentos se unen en orden
+    con pypdf, así que las páginas quedan en el mismo orden. La única diferencia
+    con escribir_reporte_familias es que la primera familia de cada parte empieza en una
+    página nueva, de modo que el documento puede tener hasta partes - 1 páginas más.
+
+    Args:
+        familias_multiples (dict): Familias con varios miembros (resultado de procesar_datos).
+        total_personas (int): Número de personas analizadas.
+        ruta_pdf (str): Ruta del archivo PDF a escribir.
+        partes (int): Número de partes (y de procesos); None usa todos los núcleos.
+
+    Returns:
+        int: Número de partes en que se dibujó el reporte.
+    """
+    partes = partes or os.cpu_count() or 1
+    trozos = _dividir_familias(familias_multiples, partes) if partes > 1 and familias_multiples else []
+
+    if len(trozos) < 2:
+        reporte = PDFReport(title="")
+        escribir_reporte_familias(reporte, familias_multiples, total_personas)
+        reporte.save_pdf(ruta_pdf)
+        return 1
+
+    with ProcessPoolExecutor(max_workers=len(trozos)) as pool:
+        futuros = [pool.submit(_escribir_parte_familias, trozo, len(familias_multiples), total_personas, i == 0) for i, trozo in enumerate(trozos)]
+        documentos = [futuro.result() for futuro in futuros]
+
+    escritor = PdfWriter()
+    for documento in documentos:
+        escritor.append(io.BytesIO(documento))
+    escritor.add_metadata(PdfReader(io.BytesIO(documentos[0])).metadata)
+    escritor.write(ruta_pdf)
+    return len(trozos)
+
+def escribir_reporte_un_miembro(reporte, familias_uno, total_personas, seccion=False):
+    """Escribe el reporte de jefes de familia registrados sin otros miembros en el PDFReport indicado."""
+    reporte.title = "REPORTE DE JEFES DE FAMILIA REGISTRADOS SIN OTROS MIEMBROS"
+    reporte.add_title(seccion)
+    reporte.add_description(f"Este reporte muestra a los jefes de familia que se registraron como el único miembro de su núcleo familiar. En total se encontraron {len(familias_uno)} jefes de familias registrados sin sus demas miembros de un total de {total_personas} personas analizadas.")
+    reporte.add_description("Nota: Si usted es el único miembro de su familia, no es necesario registrar a otros miembros.")
+    if familias_uno:
+        jefes_solos_data = [{"Cédula del Jefe": data['jefe'][0], "Nombre del Jefe": data['jefe'][1]} for data in familias_uno.values()]
+        jefes_solos_df = pd.DataFrame(jefes_solos_data)
+        reporte.create_table_from_dataframe(jefes_solos_df)
+    else:
+        reporte.pdf.cell(0, 10, "No se encontraron jefes de familia registrados sin otros miembros.", new_x="LMARGIN", new_y="NEXT", align='C')
+
+def escribir_reporte_advertencias(reporte, lista_advertencias, total_personas, seccion=False):
+    """Escribe el reporte de advertencias en el PDFReport indicado."""
+    reporte.title = "REPORTE DE ADVERTENCIAS EN LOS REGISTROS DE FAMILIA"
+    reporte.add_title(seccion)
+    reporte.add_description(f"Este reporte detalla los posibles problemas encontrados en la información de los registros de familia. Se encontraron {len(lista_advertencias)} advertencias de un total de {total_personas} personas analizadas.")
+    reporte.add_description("No se encontró ningún jefe de familia asociado a los siguientes miembros registrados. Se recomienda revisar si la cédula del jefe de familia es incorrecta o si este aún no está registrado; (es obligatorio que este registrado).")
+    if lista_advertencias:
+        advertencias_df = pd.DataFrame(lista_advertencias, columns=["Cédula de Jefe de familia", "Nombre Completo (Persona)", "Cédula (Persona)"])
+        reporte.create_table_from_dataframe(advertencias_df)
+    else:
+        reporte.pdf.cell(0, 10, "No se encontraron advertencias en los registros de familia.", new_x="LMARGIN", new_y="NEXT", align='C')
+
+def escribir_reporte_repetidos(reporte, personas_repetidas, total_personas, seccion=False):
+    """Escribe el reporte de personas repetidas en el PDFReport indicado."""
+    reporte.title = "REPORTE DE PERSONAS REPETIDAS"
+    reporte.add_title(seccion)
+    reporte.add_description(f"Este reporte muestra las personas que aparecen más de una vez en el registro, identificadas por su número de documento. Se encontraron {len(personas_repetidas)} personas repetidas de un total de {total_personas} personas analizadas.")
+    if not personas_repetidas.empty:
+        reporte.create_table_from_dataframe(personas_repetidas)
+    else:
+        reporte.pdf.cell(0, 10, "No se encontraron personas repetidas en el registro.", new_x="LMARGIN", new_y="NEXT", align='C')
+
+def generar_reportes_pdf(familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas, ruta_base_pdf='reportes/reportes_pdf', un_solo_archivo=False, partes_familias=None):
+    """
+    Genera los cuatro reportes PDF a partir del resultado de procesar_datos.
+
+    Con un_solo_archivo=True se escribe un único 'reporte_completo.pdf' con los cuatro
+    reportes como secciones (con marcadores), que comparten un solo subconjunto de fuentes.
+    Con partes_familias se dibuja 'reporte_familias.pdf' en ese número de partes en
+    paralelo (0 usa todos los núcleos; ver escribir_reporte_familias_por_partes); no se
+    aplica a un_solo_archivo.
+    """
+    os.makedirs(ruta_base_pdf, exist_ok=True)
+    secciones = [
+        ('reporte_familias.pdf', escribir_reporte_familias, familias_multiples,
+         "Reporte de familias con varios miembros en formato PDF generado exitosamente!"),
+        ('reporte_1_miembro.pdf', escribir_reporte_un_miembro, familias_uno,
+         "Reporte de jefes de familia registrados sin otros miembros en formato PDF generado exitosamente!"),
+        ('reporte_advertencias.pdf', escribir_reporte_advertencias, lista_advertencias,
+         "Reporte de advertencia en formato PDF generado exitosamente!"),
+        ('reporte_repetidos.pdf', escribir_reporte_repetidos, personas_repetidas,
+         "Reporte de personas repetidas en formato PDF generado exitosamente!")
+    ]
+
+    if un_solo_archivo:
+        reporte = PDFReport(title="REPORTE DEL CENSO")
+        for nombre_archivo, escribir, datos, _ in secciones:
+            with Fase('reporte_pdf_seccion', len(datos), nombre_archivo):
+                escribir(reporte, datos, total_personas, seccion=True)
+        with Fase('reporte_pdf_guardado', detalle='reporte_completo.pdf'):
+            reporte.save_pdf(os.path.join(ruta_base_pdf, 'reporte_completo.pdf'))
+        print("Reporte completo (cuatro secciones) en formato PDF generado exitosamente!")
+        return
+
+    for nombre_archivo, escribir, datos, mensaje in secciones:
+        with Fase('reporte_pdf', len(datos), nombre_archivo):
+            if escribir is escribir_reporte_familias and partes_familias is not None:
+                partes = escribir_reporte_familias_por_partes(datos, total_personas, os.path.join(ruta_base_pdf, nombre_archivo), partes_familias)
+                if partes > 1:
+                    mensaje = f"{mensaje} ({partes} partes en paralelo)"
+            else:
+                reporte = PDFReport(title="")
+                escribir(reporte, datos, total_personas)
+                reporte.save_pdf(os.path.join(ruta_base_pdf, nombre_archivo))
+        print(mensaje)
+
 if __name__ == "__main__":
     ruta_archivo_xlsx = 'Archivo/Cuestionario Cabildo TATACHIO MIRABEL (Respuestas).xlsx'
-    ruta_base_pdf = 'reportes/reportes_pdf'
-    os.makedirs(ruta_base_pdf, exist_ok=True)
-    nombre_archivo_familias_pdf = os.path.join(ruta_base_pdf, 'reporte_familias.pdf')
-    nombre_archivo_un_miembro_pdf = os.path.join(ruta_base_pdf, 'reporte_1_miembro.pdf')
-    nombre_archivo_advertencias_pdf = os.path.join(ruta_base_pdf, 'reporte_advertencias.pdf')
-    nombre_archivo_repetidos_pdf = os.path.join(ruta_base_pdf, 'reporte_repetidos.pdf')
 
     resultado_analisis = procesar_datos(ruta_archivo_xlsx)
 
     if isinstance(resultado_analisis, str):
         print(resultado_analisis)
     else:
-        familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas = resultado_analisis
-
-        # Reporte de Familias Registradas
-        reporte_familias = PDFReport(title="REPORTE DE FAMILIAS REGISTRADAS")
-        reporte_familias.add_title()
-        reporte_familias.add_description(
-            f"Este reporte detalla las familias que se registraron por medio de la encuesta. Se encontraron {len(familias_multiples)} familias de un total de {total_personas} personas registradas.\n\n"
-            "NOTA: Si usted no aparece en este reporte debera registrar a su familia por medio del siguiente formulario:",
-            link_text="haciendo click aquí. (Es muy importante que lea bien lo que le preguntan en el formulario)",
-            link_url="https://docs.google.com/forms/d/e/1FAIpQLScSEcH_fBTjVTwaQEKQVub78TnbFTwBLpWL-dbak4sc-ya5Ew/viewform?usp=sharing."
-        )
-        reporte_familias.add_description("Si usted y toda su familia aparecen registrados omita el mensaje anterior.")
-
-        if familias_multiples:
-            for jefe_cedula, data in familias_multiples.items():
-                # Primero se muestra al jefe de familia
-                nombre_completo = data['jefe'][1]   # Nombre completo del jefe
-                documento = data['jefe'][0]         # Documento del jefe
-                jefe_info = f"Jefe de Familia: {nombre_completo} ({documento})"
-                # Configuramos la fuente y se muestra la información del jefe
-                reporte_familias.pdf.set_font("DejaVu", style="B", size=13)
-                reporte_familias.pdf.cell(0, 10, jefe_info, new_x="LMARGIN", new_y="NEXT", align='L')
-                reporte_familias.pdf.cell(0, 10, "Miembros de la Familia:", new_x="LMARGIN", new_y="NEXT", align='C')
-                reporte_familias.create_table_from_dataframe(data['miembros'])
-                reporte_familias.pdf.ln(5)
-        else:
-            reporte_familias.pdf.cell(0, 10, "No se encontraron familias con más de un miembro.", new_x="LMARGIN", new_y="NEXT", align='C')
-        reporte_familias.save_pdf(nombre_archivo_familias_pdf)
-
-        print("Reporte de familias con varios miembros en formato PDF generado exitosamente!")
-
-
-        # Reporte de Jefes de Familia Solos
-        reporte_un_miembro = PDFReport(title="REPORTE DE JEFES DE FAMILIA REGISTRADOS SIN OTROS MIEMBROS")
-        reporte_un_miembro.add_title()
-        reporte_un_miembro.add_description(f"Este reporte muestra a los jefes de familia que se registraron como el único miembro de su núcleo familiar. En total se encontraron {len(familias_uno)} jefes de familias registrados sin sus demas miembros de un total de {total_personas} personas analizadas.")
-        reporte_un_miembro.add_description("Nota: Si usted es el único miembro de su familia, no es necesario registrar a otros miembros.")
-        if familias_uno:
-            jefes_solos_data = [{"Cédula del Jefe": data['jefe'][0], "Nombre del Jefe": data['jefe'][1]} for data in familias_uno.values()]
-            jefes_solos_df = pd.DataFrame(jefes_solos_data)
-            reporte_un_miembro.create_table_from_dataframe(jefes_solos_df)
-        else:
-            reporte_un_miembro.pdf.cell(0, 10, "No se encontraron jefes de familia registrados sin otros miembros.", new_x="LMARGIN", new_y="NEXT", align='C')
-        reporte_un_miembro.save_pdf(nombre_archivo_un_miembro_pdf)
-
-        print("Reporte de jefes de familia registrados sin otros miembros en formato PDF generado exitosamente!")
-
-        # Reporte de advertencias
-        reporte_advertencias = PDFReport(title="REPORTE DE ADVERTENCIAS EN LOS REGISTROS DE FAMILIA")
-        reporte_advertencias.add_title()
-        reporte_advertencias.add_description(f"Este reporte detalla los posibles problemas encontrados en la información de los registros de familia. Se encontraron {len(lista_advertencias)} advertencias de un total de {total_personas} personas analizadas.")
-        reporte_advertencias.add_description("No se encontró ningún jefe de familia asociado a los siguientes miembros registrados. Se recomienda revisar si la cédula del jefe de familia es incorrecta o si este aún no está registrado; (es obligatorio que este registrado).")
-        if lista_advertencias:
-            advertencias_df = pd.DataFrame(lista_advertencias, columns=["Cédula de Jefe de familia", "Nombre Completo (Persona)", "Cédula (Persona)"])
-            reporte_advertencias.create_table_from_dataframe(advertencias_df)
-        else:
-            reporte_advertencias.pdf.cell(0, 10, "No se encontraron advertencias en los registros de familia.", new_x="LMARGIN", new_y="NEXT", align='C')
-        reporte_advertencias.save_pdf(nombre_archivo_advertencias_pdf)
-
-        print("Reporte de advertencia en formato PDF generado exitosamente!")
-
-        # Reporte de personas repetidas
-        reporte_repetidos = PDFReport(title="REPORTE DE PERSONAS REPETIDAS")
-        reporte_repetidos.add_title()
-        reporte_repetidos.add_description(f"Este reporte muestra las personas que aparecen más de una vez en el registro, identificadas por su número de documento. Se encontraron {len(personas_repetidas)} personas repetidas de un total de {total_personas} personas analizadas.")
-        if not personas_repetidas.empty:
-            reporte_repetidos.create_table_from_dataframe(personas_repetidas)
-        else:
-            reporte_repetidos.pdf.cell(0, 10, "No se encontraron personas repetidas en el registro.", new_x="LMARGIN", new_y="NEXT", align='C')
-        reporte_repetidos.save_pdf(nombre_archivo_repetidos_pdf)
-
-        print("Reporte de personas repetidas en formato PDF generado exitosamente!")
\ No newline at end of file
+        generar_reportes_pdf(*resultado_analisis)
\ No newline at end of file
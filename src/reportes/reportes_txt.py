@@ -1,10 +1,15 @@
 from tabulate import tabulate
+from ..metricas import medir_fase
 from ..procesamiento import procesar_datos
+from .escritura import abrir_reporte, escribir_en_paralelo, mostrar_tiempos
+import os
+import time
 
+@medir_fase('reporte_txt_familias', filas=len)
 def generar_reporte_familias_txt(familias, nombre_archivo, total_personas):
     num_familias = len(familias)
     total_miembros = 0
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+    with abrir_reporte(nombre_archivo) as archivo:
         archivo.write("=" * 20 + " FAMILIAS CON MAS DE 1 MIEMBRO REGISTRADO " + "=" * 20 + "\n\n")
         archivo.write("Esta tabla muestra a las familias por jefe de las mismas\n")
         archivo.write(f"\nSe encontraron {num_familias} familias con más de 1 miembro registrado de un total de {total_personas} personas.\n")
@@ -15,9 +20,10 @@ def generar_reporte_familias_txt(familias, nombre_archivo, total_personas):
             total_miembros += len(data['miembros']) + 1 # +1 para el jefe
     print(f"El reporte de familias con más de 1 miembro ha sido guardado en '{nombre_archivo}'.")
 
+@medir_fase('reporte_txt_un_miembro', filas=len)
 def generar_reporte_un_miembro_txt(familias, nombre_archivo, total_personas):
     num_jefes_solos = len(familias)
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+    with abrir_reporte(nombre_archivo) as archivo:
         archivo.write("=" * 20 + " JEFES DE FAMILIA REGISTRADOS SIN OTROS MIEMBROS " + "=" * 20 + "\n\n")
         archivo.write("Esta tabla muestra a los jefes de familia que se registraron como el único miembro de su núcleo familiar.\nEsto podría indicar que faltan miembros por registrar o que realmente son familias unipersonales.\n\n")
         tabla_jefes_solos = [["Cédula del Jefe", "Nombre del Jefe"]]
@@ -28,9 +34,10 @@ def generar_reporte_un_miembro_txt(familias, nombre_archivo, total_personas):
         archivo.write(f"\n\nSe encontraron {num_jefes_solos} jefes de familia registrados sin otros miembros de un total de {total_personas} personas en el registro.\n")
     print(f"El reporte de jefes de familia registrados sin otros miembros ha sido guardado en '{nombre_archivo}'.")
 
+@medir_fase('reporte_txt_advertencias', filas=len)
 def generar_reporte_advertencias_txt(advertencias, nombre_archivo, total_personas):
     num_advertencias = len(advertencias)
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+    with abrir_reporte(nombre_archivo) as archivo:
         archivo.write("=" * 20 + " REPORTE DE ADVERTENCIAS EN LOS REGISTROS DE FAMILIA " + "=" * 20 + "\n\n")
         archivo.write("No se encontró ningún jefe de familia asociado a estas persona. Se recomienda revisar la cédula del jefe de familia.\n\n")
         archivo.write(f"Se encontraron {num_advertencias} personas con advertencias de un total de {total_personas} personas en el registro.\n")
@@ -43,9 +50,10 @@ def generar_reporte_advertencias_txt(advertencias, nombre_archivo, total_persona
             archivo.write("No se encontraron advertencias en los registros de familia.\n")
             print(f"No se encontraron advertencias. El archivo '{nombre_archivo}' ha sido creado.")
 
+@medir_fase('reporte_txt_repetidos', filas=len)
 def generar_reporte_repetidos_txt(repetidos_df, nombre_archivo, total_personas):
     num_repetidos = len(repetidos_df)
-    with open(nombre_archivo, 'w', encoding='utf-8') as archivo:
+    with abrir_reporte(nombre_archivo) as archivo:
         archivo.write("=" * 20 + " REPORTE DE PERSONAS REPETIDAS EN EL REGISTRO " + "=" * 20 + "\n\n")
         archivo.write(f"Este reporte muestra las personas que aparecen más de una vez en el registro, identificadas por su número de documento.\n\nSe encontraron {num_repetidos} registros repetidos de un total de {total_personas} personas.\n\n")
         if not repetidos_df.empty:
@@ -55,21 +63,37 @@ def generar_reporte_repetidos_txt(repetidos_df, nombre_archivo, total_personas):
             archivo.write("No se encontraron personas repetidas en el registro.\n")
             print(f"No se encontraron personas repetidas. El archivo '{nombre_archivo}' ha sido creado.")
 
+def generar_reportes_txt(familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas, ruta_base_txt='reportes/reportes_txt', max_hilos=None):
+    """
+    Genera los cuatro reportes TXT a partir del resultado de procesar_datos.
+
+    Los cuatro archivos se escriben a la vez (ver escritura.escribir_en_paralelo) y la
+    función vuelve cuando todos están cerrados.
+
+    Args:
+        max_hilos (int): Hilos de escritura; 1 escribe los archivos uno tras otro (dentro de un
+            proceso trabajador).
+
+    Returns:
+        dict: Segundos que tardó cada archivo.
+    """
+    os.makedirs(ruta_base_txt, exist_ok=True)
+    inicio = time.perf_counter()
+    tiempos = escribir_en_paralelo({
+        'reporte_familias.txt': (generar_reporte_familias_txt, (familias_multiples, os.path.join(ruta_base_txt, 'reporte_familias.txt'), total_personas)),
+        'reporte_1_miembro.txt': (generar_reporte_un_miembro_txt, (familias_uno, os.path.join(ruta_base_txt, 'reporte_1_miembro.txt'), total_personas)),
+        'reporte_advertencias.txt': (generar_reporte_advertencias_txt, (lista_advertencias, os.path.join(ruta_base_txt, 'reporte_advertencias.txt'), total_personas)),
+        'reporte_repetidos.txt': (generar_reporte_repetidos_txt, (personas_repetidas, os.path.join(ruta_base_txt, 'reporte_repetidos.txt'), total_personas))
+    }, max_hilos)
+    mostrar_tiempos(tiempos, time.perf_counter() - inicio)
+    return tiempos
+
 if __name__ == "__main__":
     ruta_archivo_xlsx = 'Archivo/Cuestionario Cabildo TATACHIO MIRABEL (Respuestas).xlsx'
-    nombre_archivo_familias_txt = 'reportes/reportes_txt/reporte_familias.txt'
-    nombre_archivo_un_miembro_txt = 'reportes/reportes_txt/reporte_1_miembro.txt'
-    nombre_archivo_advertencias_txt = 'reportes/reportes_txt/reporte_advertencias.txt'
-    nombre_archivo_repetidos_txt = 'reportes/reportes_txt/reporte_repetidos.txt'
 
     resultado_analisis = procesar_datos(ruta_archivo_xlsx)
 
     if isinstance(resultado_analisis, str):
         print(resultado_analisis)
     else:
-        familias_multiples, familias_uno, lista_advertencias, total_personas, personas_repetidas = resultado_analisis
-
-        generar_reporte_familias_txt(familias_multiples, nombre_archivo_familias_txt, total_personas)
-        generar_reporte_un_miembro_txt(familias_uno, nombre_archivo_un_miembro_txt, total_personas)
-        generar_reporte_advertencias_txt(lista_advertencias, nombre_archivo_advertencias_txt, total_personas)
-        generar_reporte_repetidos_txt(personas_repetidas, nombre_archivo_repetidos_txt, total_personas)
\ No newline at end of file
+        generar_reportes_txt(*resultado_analisis)
\ No newline at end of file
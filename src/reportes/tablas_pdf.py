@@ -0,0 +1,89 @@
+"""
+Dibujo rápido de tablas grandes en documentos FPDF.
+
+En lugar de llamar a pdf.cell por cada celda (que mide, codifica y posiciona el texto
+con toda la lógica de formato de fpdf2), cada celda se dibuja con un rectángulo y un
+texto en posición fija. Los valores se convierten a texto una vez por columna, los
+anchos se calculan a partir del contenido y los encabezados se repiten al comienzo de
+cada página.
+"""
+import pandas as pd
+
+def formatear_columnas(df: pd.DataFrame):
+    """Convierte cada columna del DataFrame en una lista de textos."""
+    return [df[col].map(str).tolist() for col in df.columns]
+
+def formatear_filas(filas):
+    """Convierte una secuencia de filas (tuplas o registros) en una lista de textos por columna."""
+    return [list(map(str, columna)) for columna in zip(*filas)]
+
+def calcular_anchos(pdf, encabezados, columnas, estilo_encabezado='B'):
+    """
+    Calcula el ancho de cada columna a partir de su texto más ancho (encabezado incluido).
+
+    Los anchos se escalan para ocupar todo el ancho útil de la página, de modo que las
+    columnas con textos más largos reciben más espacio.
+    """
+    familia, estilo, tamano = pdf.font_family, pdf.font_style, pdf.font_size_pt
+    margen = 2 * pdf.c_margin
+
+    pdf.set_font(familia, estilo_encabezado, tamano)
+    anchos = [pdf.get_string_width(str(encabezado)) + margen for encabezado in encabezados]
+
+    pdf.set_font(familia, '', tamano)
+    for i, columna in enumerate(columnas):
+        ancho_valores = max((pdf.get_string_width(valor) for valor in set(columna)), default=0) + margen
+        anchos[i] = max(anchos[i], ancho_valores)
+
+    pdf.set_font(familia, estilo, tamano)
+    escala = pdf.epw / sum(anchos)
+    return [ancho * escala for ancho in anchos]
+
+def dibujar_tabla(pdf, encabezados, columnas, anchos=None, alto_encabezado=7, alto_fila=6, color_encabezado=(200, 220, 255)):
+    """
+    Dibuja una tabla con los encabezados repetidos en cada página.
+
+    Args:
+        pdf (FPDF): Documento donde se dibuja la tabla, con la fuente y el tamaño ya definidos.
+        encabezados (list): Títulos de las columnas.
+        columnas (list): Una lista de textos por columna (ver formatear_columnas y formatear_filas).
+        anchos (list): Ancho de cada columna; None los calcula a partir del contenido.
+        alto_encabezado (float): Alto de la fila de encabezados.
+        alto_fila (float): Alto de cada fila de datos.
+        color_encabezado (tuple): Color de fondo RGB de los encabezados.
+    """
+    familia, tamano = pdf.font_family, pdf.font_size_pt
+    if anchos is None:
+        anchos = calcular_anchos(pdf, encabezados, columnas)
+    posiciones = [pdf.l_margin + sum(anchos[:i]) for i in range(len(anchos))]
+    encabezados = [str(encabezado) for encabezado in encabezados]
+
+    def escribir_encabezados():
+        pdf.set_font(familia, 'B', tamano)
+        pdf.set_fill_color(*color_encabezado)
+        y = pdf.y
+        base = y + alto_encabezado / 2 + 0.3 * pdf.font_size
+        for x, ancho, texto in zip(posiciones, anchos, encabezados):
+            pdf.rect(x, y, ancho, alto_encabezado, style='DF')
+            pdf.text(x + (ancho - pdf.get_string_width(texto)) / 2, base, texto)
+        pdf.set_xy(pdf.l_margin, y + alto_encabezado)
+        pdf.set_font(familia, '', tamano)
+
+    if pdf.y + alto_encabezado + alto_fila > pdf.page_break_trigger:
+        pdf.add_page()
+    escribir_encabezados()
+
+    y = pdf.y
+    desplazamiento_texto = alto_fila / 2 + 0.3 * pdf.font_size
+    for fila in zip(*columnas):
+        if y + alto_fila > pdf.page_break_trigger:
+            pdf.add_page()
+            escribir_encabezados()
+            y = pdf.y
+        base = y + desplazamiento_texto
+        for x, ancho, texto in zip(posiciones, anchos, fila):
+            pdf.rect(x, y, ancho, alto_fila)
+            pdf.text(x + pdf.c_margin, base, texto)
+        y += alto_fila
+
+    pdf.set_xy(pdf.l_margin, y)